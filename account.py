@@ -0,0 +1,272 @@
+import time
+import weakref
+import threading
+from collections import OrderedDict, deque
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+
+import settings
+
+# ----------------------
+# 가상 계좌 (app.py / app_2.py / 백테스트 / 전략 실행기가 함께 사용)
+# ----------------------
+# 포지션 키는 거래소:심볼 로 통일합니다. 예: "krx:005930", "upbit:KRW-BTC", "binance:BTCUSDT"
+def instrument(venue, symbol):
+    return f"{venue}:{symbol}"
+
+def to_decimal(value):
+    """float 는 화면/API 에 보이는 값(str) 그대로 Decimal 로 바꿔 이진 소수 오차가 장부에 들어가지 않게 합니다."""
+    if isinstance(value, Decimal):
+        return value
+    return Decimal(str(value))
+
+class Position:
+    """종목별 보유 수량, 매입 원가 합계, 실현 손익 (모두 Decimal)"""
+    __slots__ = ("qty", "cost", "realized")
+
+    def __init__(self):
+        self.qty = Decimal(0)
+        self.cost = Decimal(0)
+        self.realized = Decimal(0)
+
+    @property
+    def avg_cost(self):
+        return self.cost / self.qty if self.qty else Decimal(0)
+
+class VirtualAccount:
+    """
+    장부(ledger) 기반 가상 계좌.
+    현금, 매입 원가, 실현 손익은 Decimal 로 정확히 계산하고 모든 체결을 ledger 에 순서대로 기록합니다.
+    (메모리에는 최근 LEDGER_MEMORY 건만 두고, 전체 기록은 listener 로 붙인 journal.AccountJournal 이 보관합니다)
+    평가(시가 평가)는 포지션별 수량/원가/최신가를 numpy 배열로 함께 들고 있다가
+    update_price() 로 최신가 하나만 바꾸고 valuation() 에서 벡터 연산 한 번으로 계산합니다.
+    """
+    def __init__(self, init_cash=0):
+        self.cash = to_decimal(init_cash)
+        self.positions = {}
+        self.ledger = deque(maxlen=settings.LEDGER_MEMORY)
+        self.seq = 0
+        self._listeners = []
+        # 화면(세션 스레드)과 백그라운드 전략 실행기가 같은 계좌로 주문할 수 있으므로 잠금
+        self.lock = threading.RLock()
+        # 시가 평가용 배열 (positions 와 같은 순서, 필요할 때 2배로 늘림)
+        self._keys = []
+        self._index = {}
+        self._qty = np.zeros(8)
+        self._cost = np.zeros(8)
+        self._realized = np.zeros(8)
+        self._price = np.full(8, np.nan)
+
+    @property
+    def holdings(self):
+        """종목별 보유 수량 dict (이전 버전과 같은 형태)"""
+        with self.lock:
+            return {key: pos.qty for key, pos in self.positions.items()}
+
+    def add_listener(self, listener):
+        """입금/체결이 기록될 때마다 listener(entry) 를 호출합니다. (계좌 잠금 안에서 seq 순서대로)"""
+        with self.lock:
+            self._listeners.append(listener)
+
+    def deposit(self, amount):
+        with self.lock:
+            amount = to_decimal(amount)
+            self.cash += amount
+            self._record("deposit", None, None, amount, Decimal(0))
+
+    def get_cash(self):
+        return self.cash
+
+    def _slot(self, name):
+        i = self._index.get(name)
+        if i is None:
+            i = self._index[name] = len(self._keys)
+            self._keys.append(name)
+            self.positions[name] = Position()
+            if i == len(self._qty):
+                self._qty = np.concatenate([self._qty, np.zeros(i)])
+                self._cost = np.concatenate([self._cost, np.zeros(i)])
+                self._realized = np.concatenate([self._realized, np.zeros(i)])
+                self._price = np.concatenate([self._price, np.full(i, np.nan)])
+        return i
+
+    def _record(self, side, name, price, qty, realized):
+        self.seq += 1
+        entry = {
+            "seq": self.seq,
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "side": side,
+            "instrument": name,
+            "price": price,
+            "qty": qty,
+            "realized": realized,
+            "cash": self.cash,
+        }
+        self.ledger.append(entry)
+        for listener in self._listeners:
+            listener(entry)
+
+    def apply(self, entry):
+        """journal 에 기록된 입금/체결 하나를 다시 적용합니다. (복구용)"""
+        side = entry["side"]
+        if side == "deposit":
+            self.deposit(entry["qty"])
+        elif side == "buy":
+            self.buy(entry["instrument"], entry["price"], entry["qty"])
+        elif side == "sell":
+            self.sell(entry["instrument"], entry["price"], entry["qty"])
+
+    def snapshot(self):
+        """현재 잔고/포지션 상태를 JSON 으로 저장할 수 있는 dict 로 반환합니다. (Decimal 은 문자열)"""
+        with self.lock:
+            return {
+                "seq": self.seq,
+                "cash": str(self.cash),
+                "positions": {key: [str(p.qty), str(p.cost), str(p.realized)] for key, p in self.positions.items()},
+            }
+
+    @classmethod
+    def from_snapshot(cls, state):
+        account = cls(Decimal(state["cash"]))
+        account.seq = state["seq"]
+        for key, (qty, cost, realized) in state["positions"].items():
+            i = account._slot(key)
+            pos = account.positions[key]
+            pos.qty, pos.cost, pos.realized = Decimal(qty), Decimal(cost), Decimal(realized)
+            account._qty[i], account._cost[i], account._realized[i] = pos.qty, pos.cost, pos.realized
+        return account
+
+    def buy(self, name, price, qty):
+        with self.lock:
+            price, qty = to_decimal(price), to_decimal(qty)
+            cost = price * qty
+            if self.cash >= cost:
+                self.cash -= cost
+                i = self._slot(name)
+                pos = self.positions[name]
+                pos.qty += qty
+                pos.cost += cost
+                self._qty[i], self._cost[i], self._price[i] = pos.qty, pos.cost, price
+                self._record("buy", name, price, qty, Decimal(0))
+                return True
+            return False
+
+    def sell(self, name, price, qty):
+        with self.lock:
+            price, qty = to_decimal(price), to_decimal(qty)
+            pos = self.positions.get(name)
+            holding = pos.qty if pos else Decimal(0)
+            if holding >= qty:
+                if pos is None:
+                    return True  # 보유 0, 매도 0
+                proceeds = price * qty
+                # 평균 단가 기준으로 원가를 덜어냄 (전량 매도 시 원가 0 으로 정확히 정리)
+                removed = pos.cost if qty == holding else pos.cost * qty / holding
+                realized = proceeds - removed
+                self.cash += proceeds
+                pos.qty -= qty
+                pos.cost -= removed
+                pos.realized += realized
+                i = self._index[name]
+                self._qty[i], self._cost[i], self._price[i] = pos.qty, pos.cost, price
+                self._realized[i] = pos.realized
+                self._record("sell", name, price, qty, realized)
+                return True
+            return False
+
+    def update_price(self, name, price):
+        """보유 종목의 최신가를 바꿉니다. (틱마다 호출해도 O(1))"""
+        i = self._index.get(name)
+        if i is not None:
+            self._price[i] = price
+
+    def valuation(self):
+        """
+        전체 포지션을 최신가로 평가합니다. (numpy 벡터 연산 한 번)
+        최신가가 없는 종목은 원가로 평가합니다.
+        반환: {"cash", "market_value", "unrealized", "realized", "equity"} (float)
+        """
+        with self.lock:
+            n = len(self._keys)
+            qty, cost, price = self._qty[:n], self._cost[:n], self._price[:n]
+            value = np.where(np.isnan(price), cost, qty * price)
+            market_value = float(value.sum())
+            unrealized = float((value - cost).sum())
+            realized = float(self._realized[:n].sum())
+            cash = float(self.cash)
+        return {
+            "cash": cash,
+            "market_value": market_value,
+            "unrealized": unrealized,
+            "realized": realized,
+            "equity": cash + market_value,
+        }
+
+    def positions_frame(self):
+        """보유 포지션 표 (종목, 수량, 평균 단가, 최신가, 평가금액, 평가손익, 실현손익)"""
+        with self.lock:
+            n = len(self._keys)
+            qty, cost, price = self._qty[:n].copy(), self._cost[:n].copy(), self._price[:n].copy()
+            realized = self._realized[:n].copy()
+            keys = list(self._keys)
+        value = np.where(np.isnan(price), cost, qty * price)
+        avg = np.divide(cost, qty, out=np.zeros_like(cost), where=qty != 0)
+        df = pd.DataFrame({
+            "종목": keys, "수량": qty, "평균 단가": avg, "최신가": price,
+            "평가금액": value, "평가손익": value - cost, "실현손익": realized,
+        })
+        return df[(df["수량"] != 0) | (df["실현손익"] != 0)].reset_index(drop=True)
+
+    def ledger_frame(self):
+        """체결 장부 표 (오래된 순)"""
+        with self.lock:
+            return pd.DataFrame(list(self.ledger))
+
+
+# ----------------------
+# 이름별 계좌 캐시 (journal.AccountRegistry / margin.FuturesAccountRegistry 가 사용)
+# ----------------------
+class AccountCache:
+    """
+    최근에 연 계좌 max_size 개만 강한 참조로 들고 있고, idle 초 동안 열지 않은 계좌도 내려놓습니다. (LRU)
+    내려놓은 계좌라도 세션/예약 주문/전략 실행기가 아직 들고 있으면 약한 참조로 같은 객체를 다시 돌려주므로
+    같은 이름의 계좌가 메모리에 두 개 생겨 journal 에 같은 seq 를 겹쳐 쓰는 일은 없습니다.
+    아무도 들고 있지 않은 계좌는 메모리에서 해제되고, 다음에 열 때 journal 에서 다시 복구됩니다.
+    max_size / idle 이 None 이면 그 기준으로는 내려놓지 않습니다. (잠금은 호출하는 쪽에서)
+    """
+    def __init__(self, max_size=None, idle=None):
+        self.max_size = max_size
+        self.idle = idle
+        self._recent = OrderedDict()                # name -> (계좌, 마지막으로 연 시각), 오래된 것부터
+        self._live = weakref.WeakValueDictionary()  # name -> 계좌 (메모리에 남아 있는 모든 계좌)
+
+    def get(self, name):
+        account = self._live.get(name)
+        if account is not None:
+            self.put(name, account)
+        return account
+
+    def put(self, name, account):
+        now = time.monotonic()
+        self._recent[name] = (account, now)
+        self._recent.move_to_end(name)
+        self._live[name] = account
+        while self._recent:
+            oldest, (_, used) = next(iter(self._recent.items()))
+            over = self.max_size is not None and len(self._recent) > self.max_size
+            stale = self.idle is not None and now - used > self.idle
+            if not (over or stale) or oldest == name:
+                break
+            del self._recent[oldest]
+
+    def values(self):
+        """메모리에 남아 있는 계좌 목록"""
+        return list(self._live.values())
+
+    def __len__(self):
+        return len(self._recent)
+
+    def __contains__(self, name):
+        return name in self._live
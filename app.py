@@ -1,46 +1,30 @@
 import streamlit as st
-import requests
 import re
 from bs4 import BeautifulSoup
-import pyupbit
-
-# ----------------------
-# 가상 계좌 클래스 정의
-# ----------------------
-class VirtualAccount:
-    def __init__(self, init_cash=0):
-        self.cash = init_cash
-        self.holdings = {}
-        
-    def deposit(self, amount):
-        self.cash += amount
-
-    def get_cash(self):
-        return self.cash
-
-    def buy(self, name, price, qty):
-        cost = price * qty
-        if self.cash >= cost:
-            self.cash -= cost
-            self.holdings[name] = self.holdings.get(name, 0) + qty
-            return True
-        return False
-
-    def sell(self, name, price, qty):
-        holding = self.holdings.get(name, 0)
-        if holding >= qty:
-            self.cash += price * qty
-            self.holdings[name] = holding - qty
-            return True
-        return False
+from account import instrument
+from clients import naver_get
+from execlog import ExecutionLog
+from journal import accounts, new_account_name
+from naver_parser import fetch_item_quote
+from quotes import upbit_price
+from symbols import upbit_index
+import settings
 
 # ----------------------
 # 세션 상태 초기화
 # ----------------------
+if "account_name" not in st.session_state:
+    # 주소에 ?account=이름 이 없으면 이 세션만의 계좌를 새로 만들고 그 이름을 주소에 남김
+    # (모든 방문자가 한 계좌를 함께 쓰지 않도록. 같은 주소로 새로고침/재접속하면 같은 계좌를 다시 엶)
+    st.session_state.account_name = st.query_params.get("account") or new_account_name()
+if st.query_params.get("account") != st.session_state.account_name:
+    st.query_params["account"] = st.session_state.account_name
 if 'account' not in st.session_state:
-    st.session_state.account = VirtualAccount()
+    # 계좌는 journal 에서 복구되므로 새로고침/서버 재시작 후에도 유지됨
+    st.session_state.account = accounts.get(st.session_state.account_name)
 if "log" not in st.session_state:
-    st.session_state.log = []  # 실행 로그를 저장할 리스트
+    # 실행 로그: 최근 EXEC_LOG_SIZE 건만 보관하는 링 버퍼 (WEBCOSTOCK_EXEC_LOG_FILE 설정 시 파일에도 기록)
+    st.session_state.log = ExecutionLog(session=st.session_state.account_name)
 
 # ----------------------
 # 화면 구성
@@ -58,7 +42,7 @@ deposit_input = st.number_input("입금 금액 입력", min_value=0, step=1000,
 if st.button("입금", key="deposit_button"):
     amount = deposit_input
     st.session_state.account.deposit(amount)
-    st.session_state.log.append(f"입금 완료: {amount:,}원")
+    st.session_state.log.add("deposit", f"입금 완료: {amount:,}원", qty=amount)
     st.success(f"{amount:,}원 입금됨")
     st.rerun()
 
@@ -68,26 +52,18 @@ st.write(f"현재 잔고: {st.session_state.account.cash:,} 원")
 # 주식 시세 조회 함수
 # ----------------------
 def get_stock_price(query):
-    headers = {"User-Agent": "Mozilla/5.0"}
-
     # 종목 코드로 입력된 경우
     if query.isdigit() and len(query) == 6:
         code = query
-        detail_url = f"https://finance.naver.com/item/main.nhn?code={code}"
-        detail_res = requests.get(detail_url, headers=headers)
-        soup = BeautifulSoup(detail_res.text, 'html.parser')
-        price_tag = soup.select_one('p.no_today span.blind')
-        name_tag = soup.select_one('div.wrap_company h2 a')
-        if price_tag and name_tag:
-            price = int(price_tag.text.replace(',', ''))
-            name = name_tag.text.strip()
+        name, price = fetch_item_quote(code)
+        if price is not None and name:
             return name, price, code
         else:
             return None, -1, code
 
     # 한글 종목명 검색
     search_url = f"https://finance.naver.com/search/search.naver?query={query}"
-    res = requests.get(search_url, headers=headers)
+    res = naver_get(search_url)
     soup = BeautifulSoup(res.text, 'html.parser')
     link = (
         soup.select_one('td.tit a') or
@@ -100,13 +76,9 @@ def get_stock_price(query):
 
     code = re.search(r'code=(\d+)', link['href']).group(1)
     name = link.text.strip()
-    detail_url = f"https://finance.naver.com/item/main.nhn?code={code}"
-    detail_res = requests.get(detail_url, headers=headers)
-    soup = BeautifulSoup(detail_res.text, 'html.parser')
-    price_tag = soup.select_one('p.no_today span.blind')
-    if not price_tag:
+    _, price = fetch_item_quote(code)
+    if price is None:
         return name, -1, code
-    price = int(price_tag.text.replace(',', ''))
     return name, price, code
 
 # ----------------------
@@ -114,14 +86,12 @@ def get_stock_price(query):
 # ----------------------
 def get_crypto_price(name):
     try:
-        tickers = pyupbit.get_tickers(fiat="KRW", verbose=True)
-        for t in tickers:
-            if t['korean_name'] == name:
-                market = t['market']
-                price = pyupbit.get_current_price(market)
-                return market, price
-    except:
-        passa
+        market = upbit_index.find(name)
+        if market is not None:
+            price = upbit_price(market)
+            return market, price
+    except Exception:
+        pass
     return None, -1
 
 # ----------------------
@@ -139,10 +109,10 @@ if st.button("주식 시세 조회", key="stock_search"):
         name, price, code = get_stock_price(stock_name)
         if price != -1:
             st.session_state.stock_info = {"name": name, "price": price, "code": code}
-            st.session_state.log.append(f"주식 시세 조회 성공: [{name}] 현재가 {price:,}원 (코드: {code})")
+            st.session_state.log.add("quote", f"주식 시세 조회 성공: [{name}] 현재가 {price:,}원 (코드: {code})", symbol=code, price=price)
             st.success(f"[{name}] 현재가: {price:,}원 (코드: {code})")
         else:
-            st.session_state.log.append("주식 정보 조회 실패")
+            st.session_state.log.add("error", "주식 정보 조회 실패")
             st.error("주식 정보를 찾을 수 없습니다.")
 
 # 거래 방식 선택: "수량 기준" 또는 "금액 기준"
@@ -158,7 +128,7 @@ if st.button("주식 거래 실행", key="stock_trade_execute"):
     if not st.session_state.stock_info:
         st.error("주식 정보를 먼저 조회하세요.")
     else:
-        name = st.session_state.stock_info["name"]
+        name = instrument("krx", st.session_state.stock_info["code"])
         price = st.session_state.stock_info["price"]
         
         if trade_method_stock == "수량 기준":
@@ -171,17 +141,17 @@ if st.button("주식 거래 실행", key="stock_trade_execute"):
                 
         if action_stock == "매수":
             if st.session_state.account.buy(name, price, qty):
-                st.session_state.log.append(f"주식 매수 완료: {qty}주 @ {price:,}원")
+                st.session_state.log.add("buy", f"주식 매수 완료: {qty}주 @ {price:,}원", symbol=name, qty=qty, price=price)
                 st.success(f"[매수 완료] {qty}주 @ {price:,}원")
             else:
-                st.session_state.log.append("주식 매수 실패: 잔고 부족")
+                st.session_state.log.add("rejected", "주식 매수 실패: 잔고 부족", symbol=name, qty=qty, price=price)
                 st.error("[매수 실패] 잔고 부족")
         elif action_stock == "매도":
             if st.session_state.account.sell(name, price, qty):
-                st.session_state.log.append(f"주식 매도 완료: {qty}주 @ {price:,}원")
+                st.session_state.log.add("sell", f"주식 매도 완료: {qty}주 @ {price:,}원", symbol=name, qty=qty, price=price)
                 st.success(f"[매도 완료] {qty}주 @ {price:,}원")
             else:
-                st.session_state.log.append("주식 매도 실패: 보유 수량 부족")
+                st.session_state.log.add("rejected", "주식 매도 실패: 보유 수량 부족", symbol=name, qty=qty, price=price)
                 st.error("[매도 실패] 보유 수량 부족")
         st.rerun()
 
@@ -194,10 +164,10 @@ if st.button("코인 시세 조회", key="crypto_search"):
     symbol, cprice = get_crypto_price(crypto_name)
     if cprice != -1:
         st.session_state.crypto_info = {"symbol": symbol, "price": cprice}
-        st.session_state.log.append(f"코인 시세 조회 성공: [{crypto_name}] 현재가 {cprice:,}원 ({symbol})")
+        st.session_state.log.add("quote", f"코인 시세 조회 성공: [{crypto_name}] 현재가 {cprice:,}원 ({symbol})", symbol=symbol, price=cprice)
         st.success(f"[{crypto_name}] 현재가: {cprice:,}원 ({symbol})")
     else:
-        st.session_state.log.append("코인 정보 조회 실패")
+        st.session_state.log.add("error", "코인 정보 조회 실패")
         st.error("코인 정보를 찾을 수 없습니다.")
 
 # 거래 방식 선택: "수량 기준" 또는 "금액 기준"
@@ -226,18 +196,18 @@ if st.button("코인 거래 실행", key="crypto_trade_execute"):
             st.error("거래할 수량이 0 이하입니다.")
         else:
             if action == "코인 매수":
-                if st.session_state.account.buy(symbol, cprice, qty):
-                    st.session_state.log.append(f"코인 매수 완료: {qty}개 @ {cprice:,}원")
+                if st.session_state.account.buy(instrument("upbit", symbol), cprice, qty):
+                    st.session_state.log.add("buy", f"코인 매수 완료: {qty}개 @ {cprice:,}원", symbol=instrument("upbit", symbol), qty=qty, price=cprice)
                     st.success(f"[코인 매수 완료] {qty}개 @ {cprice:,}원")
                 else:
-                    st.session_state.log.append("코인 매수 실패: 잔고 부족")
+                    st.session_state.log.add("rejected", "코인 매수 실패: 잔고 부족", symbol=instrument("upbit", symbol), qty=qty, price=cprice)
                     st.error("[코인 매수 실패] 잔고 부족")
             elif action == "코인 매도":
-                if st.session_state.account.sell(symbol, cprice, qty):
-                    st.session_state.log.append(f"코인 매도 완료: {qty}개 @ {cprice:,}원")
+                if st.session_state.account.sell(instrument("upbit", symbol), cprice, qty):
+                    st.session_state.log.add("sell", f"코인 매도 완료: {qty}개 @ {cprice:,}원", symbol=instrument("upbit", symbol), qty=qty, price=cprice)
                     st.success(f"[코인 매도 완료] {qty}개 @ {cprice:,}원")
                 else:
-                    st.session_state.log.append("코인 매도 실패: 보유 수량 부족")
+                    st.session_state.log.add("rejected", "코인 매도 실패: 보유 수량 부족", symbol=instrument("upbit", symbol), qty=qty, price=cprice)
                     st.error("[코인 매도 실패] 보유 수량 부족")
         st.rerun()
 
@@ -245,8 +215,13 @@ if st.button("코인 거래 실행", key="crypto_trade_execute"):
 # 실행 로그 출력
 # ----------------------
 st.markdown("### 실행 로그")
-if st.session_state.log:
-    for log in st.session_state.log:
-        st.write(log)
+# 최근 기록부터 한 페이지 분량만 표 하나로 표시 (기록 수와 무관하게 리런 비용 일정)
+execution_log = st.session_state.log
+if len(execution_log):
+    log_pages = execution_log.pages(settings.EXEC_LOG_PAGE_SIZE)
+    log_page = 1
+    if log_pages > 1:
+        log_page = st.number_input(f"페이지 (1 = 최신, 전체 {log_pages}쪽)", min_value=1, max_value=log_pages, value=1, step=1, key="log_page")
+    st.dataframe(execution_log.page(log_page, settings.EXEC_LOG_PAGE_SIZE), width="stretch", hide_index=True)
 else:
     st.write("로그가 없습니다.")
\ No newline at end of file
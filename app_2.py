@@ -2,55 +2,53 @@ import streamlit as st
 from datetime import datetime, timedelta
 import requests
 import pandas as pd  # 데이터프레임 생성용
-import altair as alt
-import pyupbit
-from pykrx import stock
-import json
-import FinanceDataReader as fdr
 from streamlit_autorefresh import st_autorefresh
 import time
-from binance.client import Client
-from bs4 import BeautifulSoup
-import numpy as np
+from account import instrument
+from backfill import backfill_symbol
+from cache import market_cache
+from candles import sync_upbit_minutes, sync_binance_minutes, apply_live_candle
+from charts import candlestick_spec
+from execlog import ExecutionLog
+from governor import upstream
+from indicators import CHART_INDICATORS, add_indicators, indicator_chart_frame
+from journal import accounts, futures_accounts, new_account_name
+from lazy import lazy_import
+from metrics import metrics, serve_metrics
+from orders import order_book
+from prefetch import RerunPrefetch
+from quotes import get_watchlist_quotes, parse_watchlist, stock_quote, crypto_quote, futures_quote
+from resample import TIMEFRAMES
+from store import column_store
+from strategy_runner import SmaCrossStrategy, strategy_runner
+from streaming import market_stream, tick_store
+import settings
+
+# 분봉 차트를 처음 그릴 때 불러옴
+fdr = lazy_import("FinanceDataReader")
 
 st.set_page_config(page_title="자동매매 시스템", layout="centered")
 
+# 이번 리런의 구간 시간 기록 시작 (진단 패널 / 수집용 엔드포인트에 표시)
+rerun_trace = metrics.start_rerun()
+serve_metrics()
+
+def stop_run():
+    """이번 리런 기록을 마치고 스크립트를 멈춥니다. (st.stop() 은 맨 아래 finish_rerun 까지 가지 않으므로)"""
+    metrics.finish_rerun(rerun_trace)
+    st.stop()
+
+def restart_run():
+    """이번 리런 기록을 마치고 처음부터 다시 실행합니다. (st.rerun() 도 맨 아래까지 가지 않음)"""
+    metrics.finish_rerun(rerun_trace)
+    st.rerun()
+
 # 60초마다 새로 고침 (60000ms), 최대 100회 새로 고침
 st_autorefresh(interval=60000, limit=100, key="fizzbuzzcounter")
 
 # 10초마다 새로고침 (10000ms)
 st_autorefresh(interval=10000, key="crypto_chart_autorefresh")
 
-# ----------------------
-# 가상 계좌 클래스 정의
-# ----------------------
-class VirtualAccount:
-    def __init__(self, init_cash=0):
-        self.cash = init_cash
-        self.holdings = {}
-        
-    def deposit(self, amount):
-        self.cash += amount
-
-    def get_cash(self):
-        return self.cash
-
-    def buy(self, name, price, qty):
-        cost = price * qty
-        if self.cash >= cost:
-            self.cash -= cost
-            self.holdings[name] = self.holdings.get(name, 0) + qty
-            return True
-        return False
-
-    def sell(self, name, price, qty):
-        holding = self.holdings.get(name, 0)
-        if holding >= qty:
-            self.cash += price * qty
-            self.holdings[name] = holding - qty
-            return True
-        return False
-
 # ----------------------
 # 바이낸스 선물 시세 조회 함수 (최초 정의, 이후 중복 제거)
 # ----------------------
@@ -59,48 +57,40 @@ def get_binance_futures_price(query):
     바이낸스 USDT 선물 마켓에서 심볼 혹은 이름으로 시세를 조회합니다.
     예: BTC, ETH, 비트코인, 이더리움 등 입력 가능하며, 모든 선물 코인을 검색할 수 있습니다.
     """
-    query = query.strip().upper()
-    # 한글명 매핑 (필요시 확장)
-    kor_map = {
-        "비트코인": "BTCUSDT",
-        "이더리움": "ETHUSDT",
-        "리플": "XRPUSDT",
-        "도지코인": "DOGEUSDT",
-        "비트코인캐시": "BCHUSDT"
-    }
-    if query in kor_map:
-        symbol = kor_map[query]
-    else:
-        try:
-            client = Client()  # 공용 API이므로 API Key 없이 조회 가능
-            tickers = client.futures_ticker()  # 전체 선물 티커 목록 조회
-            # 티커의 심볼에 query가 포함되는 항목 필터링 (대소문자 구분 없이)
-            filtered = [item for item in tickers if query in item['symbol'].upper()]
-            if filtered:
-                # 첫번째 매칭 항목 사용 (필요시 추가 로직으로 여러 결과 중 선택 가능)
-                symbol = filtered[0]['symbol']
-            else:
-                # 일치 항목 없음: query가 USDT로 끝나지 않으면 붙여서 시도
-                symbol = query if query.endswith("USDT") else query + "USDT"
-        except Exception as e:
-            st.error(f"Binance 선물 티커 조회 중 오류 발생: {e}")
-            return None, -1
     try:
-        client = Client()
-        ticker = client.futures_symbol_ticker(symbol=symbol)
-        price = float(ticker["price"])
-        return symbol, price
+        return futures_quote(query)
+    except ValueError as e:
+        st.error(str(e))
     except Exception as e:
         st.error(f"선물 가격 조회 중 오류 발생: {e}")
-        return symbol, -1
+    return None, -1
 
 # ----------------------
 # 세션 상태 초기화 및 화면 구성
 # ----------------------
+if "account_name" not in st.session_state:
+    # 주소에 ?account=이름 이 없으면 이 세션만의 계좌를 새로 만들고 그 이름을 주소에 남김
+    # (모든 방문자가 한 계좌를 함께 쓰지 않도록. 같은 주소로 새로고침/재접속하면 같은 계좌를 다시 엶)
+    st.session_state.account_name = st.query_params.get("account") or new_account_name()
+if st.query_params.get("account") != st.session_state.account_name:
+    st.query_params["account"] = st.session_state.account_name
 if 'account' not in st.session_state:
-    st.session_state.account = VirtualAccount()
+    # 계좌는 journal 에서 복구되므로 새로고침/서버 재시작 후에도 유지됨
+    st.session_state.account = accounts.get(st.session_state.account_name)
 if "log" not in st.session_state:
-    st.session_state.log = []  # 실행 로그 저장
+    # 실행 로그: 최근 EXEC_LOG_SIZE 건만 보관하는 링 버퍼 (WEBCOSTOCK_EXEC_LOG_FILE 설정 시 파일에도 기록)
+    st.session_state.log = ExecutionLog(session=st.session_state.account_name)
+
+# ----------------------
+# 이번 리런에 필요한 차트/시세 데이터를 한꺼번에 조회 시작 (화면을 그리는 동안 병렬로 진행)
+# ----------------------
+prefetched = RerunPrefetch()
+if st.session_state.get("crypto_info", {}).get("symbol"):
+    prefetched.submit("crypto_candles", sync_upbit_minutes, st.session_state.crypto_info["symbol"])
+if st.session_state.get("futures_info", {}).get("symbol"):
+    prefetched.submit("futures_candles", sync_binance_minutes, st.session_state.futures_info["symbol"])
+if st.session_state.get("watchlist", "").strip():
+    prefetched.submit("watchlist", get_watchlist_quotes, parse_watchlist(st.session_state.watchlist))
 
 # ----------------------
 # 화면 구성 (변경 없음)
@@ -115,9 +105,72 @@ deposit_input = st.number_input("입금 금액 입력", min_value=0, step=1000,
 if st.button("입금", key="deposit_button"):
     amount = deposit_input
     st.session_state.account.deposit(amount)
-    st.session_state.log.append(f"입금 완료: {amount:,}원")
+    st.session_state.log.add("deposit", f"입금 완료: {amount:,}원", qty=amount)
     st.success(f"{amount:,}원 입금됨")
 
+# ----------------------
+# 보유 포지션 / 평가손익 (장부 기준)
+# ----------------------
+with st.expander("📒 보유 포지션 및 손익"):
+    account = st.session_state.account
+    # 실시간 시세가 있는 종목은 최신가로, 주식은 조회 당시 가격으로 평가
+    for key in list(account.positions):
+        venue, _, symbol = key.partition(":")
+        if venue in ("upbit", "binance"):
+            live = tick_store.latest_price(venue, symbol)
+            if live is not None:
+                account.update_price(key, live)
+        elif venue == "krx" and st.session_state.get("stock_info", {}).get("code") == symbol:
+            account.update_price(key, st.session_state.stock_info["price"])
+    valuation = account.valuation()
+    col_equity, col_unrealized, col_realized = st.columns(3)
+    col_equity.metric("총 평가금액", f"{valuation['equity']:,.0f}")
+    col_unrealized.metric("평가손익", f"{valuation['unrealized']:,.0f}")
+    col_realized.metric("실현손익", f"{valuation['realized']:,.0f}")
+    positions = account.positions_frame()
+    if not positions.empty:
+        st.dataframe(positions, width="stretch", hide_index=True)
+    if account.ledger:
+        st.caption("체결 장부")
+        st.dataframe(account.ledger_frame().iloc[::-1].astype(str), width="stretch", hide_index=True)
+
+# ----------------------
+# 예약 주문 (지정가 / 스탑 / 익절) 입력 UI - 주식/코인 거래 영역에서 함께 사용
+# ----------------------
+ORDER_KINDS = {"지정가": "limit", "스탑(손절)": "stop", "익절": "take_profit"}
+ORDER_SIDES = {"매수": "buy", "매도": "sell"}
+
+def render_reserved_orders(venue, symbol, key_prefix, qty_step):
+    """
+    예약 주문 입력 폼과 이 계좌의 해당 종목 주문 목록을 표시합니다.
+    업비트/바이낸스는 실시간 체결가마다, 주식은 시세를 조회할 때마다 발동 여부를 확인합니다.
+    예약 주문은 계좌와 달리 저장되지 않으므로 서버가 다시 시작되면 사라진다는 것을 화면에 알립니다.
+    """
+    with st.expander("⏰ 예약 주문 (지정가 / 스탑 / 익절)"):
+        st.caption("⚠️ 예약 주문은 서버 메모리에만 보관됩니다. 서버가 다시 시작되면 대기 중인 주문과 주문 기록이 사라지니 다시 넣어 주세요. (계좌 잔고/체결 내역은 유지됩니다)")
+        kind_label = st.radio("주문 종류", list(ORDER_KINDS), horizontal=True, key=f"{key_prefix}_order_kind")
+        side_label = st.radio("방향", list(ORDER_SIDES), horizontal=True, key=f"{key_prefix}_order_side")
+        level = st.number_input("발동 가격", min_value=0.0, step=1.0, format="%.4f", key=f"{key_prefix}_order_level")
+        qty = st.number_input("수량", min_value=0.0, step=qty_step, format="%.4f", key=f"{key_prefix}_order_qty")
+        oco = st.checkbox("같은 종목의 다른 OCO 주문과 묶기 (하나가 체결되면 나머지 취소)", key=f"{key_prefix}_order_oco")
+        if st.button("예약 주문 넣기", key=f"{key_prefix}_order_place"):
+            try:
+                order = order_book.place(st.session_state.account, venue, symbol, ORDER_SIDES[side_label],
+                                         ORDER_KINDS[kind_label], level, qty, group=f"oco:{venue}:{symbol}" if oco else None)
+                st.session_state.log.add("order", f"예약 주문 접수: #{order.id} {symbol} {kind_label} {side_label} {qty} @ {level:,}", symbol=symbol, qty=qty, price=level)
+                st.success(f"예약 주문 #{order.id} 접수")
+            except ValueError as e:
+                st.error(str(e))
+        orders = [o for o in order_book.orders(st.session_state.account) if (o["venue"], o["symbol"]) == (venue, symbol)]
+        if orders:
+            st.dataframe(pd.DataFrame(orders).drop(columns=["venue", "group"]), width="stretch", hide_index=True)
+            open_ids = [o["id"] for o in orders if o["status"] == "open"]
+            if open_ids:
+                cancel_id = st.selectbox("취소할 주문", open_ids, key=f"{key_prefix}_order_cancel_id")
+                if st.button("주문 취소", key=f"{key_prefix}_order_cancel"):
+                    if order_book.cancel(cancel_id):
+                        st.session_state.log.add("cancel", f"예약 주문 취소: #{cancel_id}", symbol=symbol)
+
 # ---------------------------------
 # 주식 시세 조회 UI (API 입력 부분 포함)
 # ---------------------------------
@@ -127,68 +180,15 @@ if "stock_info" not in st.session_state:
 
 stock_name = st.text_input("주식 이름 입력 (예: 삼성전자)", key="stock_name")
 
-def get_realtime_stock_price_naver(code):
-    """
-    네이버 금융을 이용하여 해당 종목의 실시간 주가를 조회합니다.
-    code: 6자리 종목 코드 (예: 005930)
-    """
-    url = f"https://finance.naver.com/item/main.naver?code={code}"
-    headers = {"User-Agent": "Mozilla/5.0"}
-    try:
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, "html.parser")
-        price_tag = soup.find("p", class_="no_today")
-        if price_tag:
-            price_span = price_tag.find("span", class_="blind")
-            if price_span:
-                price = float(price_span.text.replace(',', '').strip())
-                return price
-        return -1
-    except Exception as e:
-        st.error(f"네이버 금융 데이터 조회 중 오류 발생: {e}")
-        return -1
-
 def get_stock_price(query):
+    """조회 로직은 quotes.stock_quote (Streamlit 없이 동작), 여기서는 실패 메시지만 화면에 표시"""
     try:
-        krx = fdr.StockListing('KRX')
-        # 컬럼명 좌우 공백 제거
-        krx.columns = [col.strip() for col in krx.columns]
-        # 한글/영문 컬럼 모두 대응
-        col_map = {}
-        for col in krx.columns:
-            if col in ['종목코드', 'Code']:
-                col_map[col] = 'Symbol'
-            elif col in ['종목명', 'Name']:
-                col_map[col] = 'Name'
-        krx = krx.rename(columns=col_map)
-
-        # Symbol, Name 컬럼이 없으면 오류
-        if 'Symbol' not in krx.columns or 'Name' not in krx.columns:
-            st.error("KRX 목록에 필수 컬럼('Symbol' 또는 'Name')이 존재하지 않습니다.")
-            return None, -1, None
-
-        # 6자리 숫자면 종목코드로 처리
-        if query.isdigit() and len(query) == 6:
-            code = query
-            found = krx[krx['Symbol'] == code]
-            if found.empty:
-                st.error("해당 종목 코드를 찾을 수 없습니다.")
-                return None, -1, None
-            name = found.iloc[0]['Name']
-        else:
-            # 한글 종목명 검색 (대소문자 구분 없이)
-            found = krx[krx['Name'].str.contains(query, case=False, na=False)]
-            if found.empty:
-                st.error("해당 종목을 찾을 수 없습니다.")
-                return None, -1, None
-            code = found.iloc[0]['Symbol']
-            name = found.iloc[0]['Name']
-        price = get_realtime_stock_price_naver(code)
-        return name, price, code
+        return stock_quote(query)
+    except ValueError as e:
+        st.error(str(e))
     except Exception as e:
         st.error(f"주식 시세 조회 중 오류 발생: {e}")
-        return None, -1, None
+    return None, -1, None
 
 if st.button("주식 시세 조회", key="stock_search"):
     if stock_name.strip() == "":
@@ -197,10 +197,12 @@ if st.button("주식 시세 조회", key="stock_search"):
         name, price, code = get_stock_price(stock_name)
         if price != -1:
             st.session_state.stock_info = {"name": name, "price": price, "code": code}
-            st.session_state.log.append(f"주식 시세 조회 성공: [{name}] 현재가 {price:,}원 (코드: {code})")
+            # 주식은 실시간 스트림이 없으므로 조회한 시세로 예약 주문 발동 여부 확인
+            order_book.on_price("krx", code, price)
+            st.session_state.log.add("quote", f"주식 시세 조회 성공: [{name}] 현재가 {price:,}원 (코드: {code})", symbol=code, price=price)
             st.success(f"[{name}] 현재가: {price:,}원 (코드: {code})")
         else:
-            st.session_state.log.append("주식 정보 조회 실패")
+            st.session_state.log.add("error", "주식 정보 조회 실패")
             st.error("주식 정보를 찾을 수 없습니다.")
 
 # ----------------------
@@ -235,6 +237,9 @@ def get_realtime_stock_chart(code, token):
         st.error(f"실시간 데이터 조회 중 오류 발생: {e}")
         return pd.DataFrame()
 
+# 주식 차트(분봉/일봉)에 함께 표시할 보조지표
+stock_indicators = [CHART_INDICATORS[label] for label in st.multiselect("보조지표 (주식)", list(CHART_INDICATORS), key="stock_indicators")]
+
 if st.button("실시간 차트 보기", key="stock_realtime_chart_button"):
     if "stock_info" in st.session_state and st.session_state.stock_info.get("code"):
         code = st.session_state.stock_info["code"]
@@ -242,73 +247,45 @@ if st.button("실시간 차트 보기", key="stock_realtime_chart_button"):
         end = datetime.now()
         start = end - timedelta(minutes=30)
         try:
-            df = fdr.DataReader(code, start.strftime("%Y-%m-%d %H:%M"), end.strftime("%Y-%m-%d %H:%M"), data_source='naver-min')
+            start, end = start.strftime("%Y-%m-%d %H:%M"), end.strftime("%Y-%m-%d %H:%M")
+            df = market_cache.fetch("chart", ("naver-min", code, start, end), upstream.call,
+                                    "naver", ("minute", code, start, end), fdr.DataReader, code, start, end, data_source='naver-min')
             df = df.reset_index().rename(columns={'index': 'timestamp'})
         except Exception as e:
             st.error(f"분봉 데이터 조회 중 오류 발생: {e}")
             df = pd.DataFrame()
         if not df.empty:
-            df['color'] = np.where(df['Close'] > df['Open'], 'up', 'down')
-            min_price = df['Low'].min()
-            max_price = df['High'].max()
-            margin = (max_price - min_price) * 0.05
             # 컬럼명 일치시키기
             df = df.rename(columns={'Open': 'open', 'High': 'high', 'Low': 'low', 'Close': 'close', 'Volume': 'volume'})
-
-            stems = alt.Chart(df).mark_rule().encode(
-                x=alt.X('timestamp:T', title='시간', axis=alt.Axis(labelAngle=-45)),
-                y=alt.Y('low:Q', title='가격',
-                        scale=alt.Scale(domain=[min_price - margin, max_price + margin])),
-                y2='high:Q',
-                color=alt.condition(
-                    "datum.color == 'up'",
-                    alt.value('#FF0000'),
-                    alt.value('#0066FF')
-                )
-            )
-
-            candles = alt.Chart(df).mark_bar(size=20).encode(
-                x='timestamp:T',
-                y=alt.Y('open:Q', scale=alt.Scale(domain=[min_price - margin, max_price + margin])),
-                y2='close:Q',
-                color=alt.condition(
-                    "datum.color == 'up'",
-                    alt.value('#FF0000'),
-                    alt.value('#0066FF')
-                )
-            )
-
-            volume = alt.Chart(df).mark_bar(size=20).encode(
-                x='timestamp:T',
-                y=alt.Y('volume:Q', title='거래량'),
-                color=alt.condition(
-                    "datum.color == 'up'",
-                    alt.value('#FF0000'),
-                    alt.value('#0066FF')
-                )
-            ).properties(
-                width=900,
-                height=120
-            )
-
-            zoom = alt.selection_interval(bind='scales')
-
-            chart = alt.vconcat(
-                alt.layer(stems, candles).properties(width=900, height=420).add_params(zoom),
-                volume
-            ).configure_axis(
-                labelFontSize=13,
-                titleFontSize=15
-            ).configure_view(
-                strokeWidth=0
-            )
-
-            st.altair_chart(chart, use_container_width=True)
-            st.session_state.log.append(f"{st.session_state.stock_info['name']}의 실시간 캔들차트를 표시했습니다.")
+            with metrics.span("render", "stock_minute_chart"):
+                df, overlays, panels = add_indicators(df, stock_indicators)
+                st.vega_lite_chart(candlestick_spec(df, overlays=overlays, panels=panels), width="stretch")
+            st.session_state.log.add("chart", f"{st.session_state.stock_info['name']}의 실시간 캔들차트를 표시했습니다.", symbol=st.session_state.stock_info["code"])
         else:
             st.error("실시간 차트 데이터를 가져올 수 없습니다.")
     else:
         st.error("먼저 주식 정보를 조회하세요.")
+
+# ----------------------
+# 일봉 차트 (로컬 저장소에서 읽기, 저장되지 않은 최근 일봉만 백필)
+# ----------------------
+if st.button("일봉 차트 보기", key="stock_daily_chart_button"):
+    if "stock_info" in st.session_state and st.session_state.stock_info.get("code"):
+        code = st.session_state.stock_info["code"]
+        try:
+            backfill_symbol(code)
+        except Exception as e:
+            st.warning(f"일봉 백필 중 오류 발생 (저장된 데이터로 표시합니다): {e}")
+        df = column_store.read_frame("krx", code, "1d")
+        if not df.empty:
+            with metrics.span("render", "stock_daily_chart"):
+                df, overlays, panels = add_indicators(df, stock_indicators)
+                st.vega_lite_chart(candlestick_spec(df, overlays=overlays, panels=panels), width="stretch")
+            st.session_state.log.add("chart", f"{st.session_state.stock_info['name']}의 일봉 차트를 표시했습니다.", symbol=st.session_state.stock_info["code"])
+        else:
+            st.error("일봉 데이터를 가져올 수 없습니다.")
+    else:
+        st.error("먼저 주식 정보를 조회하세요.")
         
 # 거래 방식 선택: "수량 기준" 또는 "금액 기준"
 trade_method_stock = st.radio("거래 방식 선택", ["수량 기준", "금액 기준"], horizontal=True, key="stock_trade_method")
@@ -323,7 +300,7 @@ if st.button("주식 거래 실행", key="stock_trade_execute"):
     if not st.session_state.stock_info:
         st.error("주식 정보를 먼저 조회하세요.")
     else:
-        name = st.session_state.stock_info["name"]
+        name = instrument("krx", st.session_state.stock_info["code"])
         price = st.session_state.stock_info["price"]
         
         if trade_method_stock == "수량 기준":
@@ -332,24 +309,27 @@ if st.button("주식 거래 실행", key="stock_trade_execute"):
             qty = trade_amount_stock // price
             if qty < 1:
                 st.error("입력한 금액이 1주 가격보다 작습니다.")
-                st.stop()
+                stop_run()
                 
         if action_stock == "매수":
             if st.session_state.account.buy(name, price, qty):
-                st.session_state.log.append(f"주식 매수 완료: {qty}주 @ {price:,}원")
+                st.session_state.log.add("buy", f"주식 매수 완료: {qty}주 @ {price:,}원", symbol=name, qty=qty, price=price)
                 st.success(f"[매수 완료] {qty}주 @ {price:,}원")
             else:
-                st.session_state.log.append("주식 매수 실패: 잔고 부족")
+                st.session_state.log.add("rejected", "주식 매수 실패: 잔고 부족", symbol=name, qty=qty, price=price)
                 st.error("[매수 실패] 잔고 부족")
         elif action_stock == "매도":
             if st.session_state.account.sell(name, price, qty):
-                st.session_state.log.append(f"주식 매도 완료: {qty}주 @ {price:,}원")
+                st.session_state.log.add("sell", f"주식 매도 완료: {qty}주 @ {price:,}원", symbol=name, qty=qty, price=price)
                 st.success(f"[매도 완료] {qty}주 @ {price:,}원")
             else:
-                st.session_state.log.append("주식 매도 실패: 보유 수량 부족")
+                st.session_state.log.add("rejected", "주식 매도 실패: 보유 수량 부족", symbol=name, qty=qty, price=price)
                 st.error("[매도 실패] 보유 수량 부족")
-        st.experimental_rerun()
-        
+        restart_run()
+
+if st.session_state.stock_info.get("code"):
+    render_reserved_orders("krx", st.session_state.stock_info["code"], "stock", 1.0)
+
 # ----------------------
 # 코인 시세 조회 UI
 # ----------------------
@@ -358,35 +338,17 @@ crypto_name = st.text_input("코인 이름 입력 (예: BTC, ETH 또는 비트
 
 def get_crypto_price(query):
     """
-    Upbit KRW 마켓의 코인 리스트를 기반으로,
+    Upbit KRW 마켓 인덱스(한글명/영문명/심볼)를 기반으로,
     사용자가 입력한 query(예: "BTC", "ETH", "비트코인", "이더리움" 등)를 활용하여
     해당 코인의 티커와 현재가를 반환합니다.
     """
-    query = query.strip().upper()
-    # 한국어 이름 매핑 (필요에 따라 확장)
-    kor_map = {
-        "비트코인": "KRW-BTC",
-        "이더리움": "KRW-ETH",
-        "리플": "KRW-XRP",
-        "도지코인": "KRW-DOGE",
-        "비트코인캐시": "KRW-BCH"
-    }
-    if query in kor_map:
-        symbol = kor_map[query]
-    else:
-        # Upbit에서 KRW 마켓 모든 티커 조회
-        tickers = pyupbit.get_tickers(fiat="KRW")
-        # 티커 코드("KRW-" 제거 후)에 query가 포함되는 티커 필터링
-        filtered = [t for t in tickers if query in t.replace("KRW-", "")]
-        if not filtered:
-            st.error("해당 코인을 찾을 수 없습니다. 예: BTC, ETH 또는 비트코인, 이더리움 등")
-            return None, -1
-        symbol = filtered[0]
-    price = pyupbit.get_current_price(symbol)
-    if price is None:
-        st.error("코인 현재가를 가져오지 못했습니다.")
-        return symbol, -1
-    return symbol, price
+    try:
+        return crypto_quote(query)
+    except ValueError as e:
+        st.error(str(e))
+    except Exception as e:
+        st.error(f"업비트 시세 조회 중 오류 발생: {e}")
+    return None, -1
 
 # 시세 조회 버튼
 if st.button("코인 시세 조회", key="crypto_search"):
@@ -396,11 +358,11 @@ if st.button("코인 시세 조회", key="crypto_search"):
         symbol, price = get_crypto_price(crypto_name)
         if price != -1:
             st.session_state.crypto_info = {"symbol": symbol, "price": price}
-            st.session_state.log.append(f"코인 시세 조회 성공: [{symbol}] 현재가 {price:,}원")
+            st.session_state.log.add("quote", f"코인 시세 조회 성공: [{symbol}] 현재가 {price:,}원", symbol=symbol, price=price)
             st.success(f"[{symbol}] 현재가: {price:,}원")
         else:
             st.session_state.crypto_info = {}  # 그래프 안보이게 초기화
-            st.session_state.log.append("코인 정보 조회 실패")
+            st.session_state.log.add("error", "코인 정보 조회 실패")
             st.error("코인 정보를 찾을 수 없습니다.")
 
 # 코인 시세가 있으면 차트 항상 표시 + 거래 UI
@@ -409,70 +371,36 @@ if "crypto_info" in st.session_state and st.session_state.crypto_info.get("symbo
     ticker = st.session_state.crypto_info["symbol"]
     st.info("실시간 차트는 10초마다 자동 갱신됩니다. 코인 시세를 변경하면 차트가 갱신됩니다.")
 
-    df = pyupbit.get_ohlcv(ticker, interval="minute1", count=30)
-    if df is not None and not df.empty:
-        df = df.reset_index().rename(columns={'index': 'timestamp'})
-        df['color'] = ['up' if c > o else 'down' for o, c in zip(df['open'], df['close'])]
-
-        min_price = df['low'].min()
-        max_price = df['high'].max()
-        margin = (max_price - min_price) * 0.05
-
-        stems = alt.Chart(df).mark_rule().encode(
-            x=alt.X('timestamp:T', title='시간', axis=alt.Axis(labelAngle=-45)),
-            y=alt.Y('low:Q', title='가격',
-                    scale=alt.Scale(domain=[min_price - margin, max_price + margin])),
-            y2='high:Q',
-            color=alt.condition(
-                "datum.color == 'up'",
-                alt.value('#FF0000'),
-                alt.value('#0066FF')
-            )
-        )
-
-        candles = alt.Chart(df).mark_bar(size=20).encode(
-            x='timestamp:T',
-            y=alt.Y('open:Q', scale=alt.Scale(domain=[min_price - margin, max_price + margin])),
-            y2='close:Q',
-            color=alt.condition(
-                "datum.color == 'up'",
-                alt.value('#FF0000'),
-                alt.value('#0066FF')
-            )
-        )
-
-        volume = alt.Chart(df).mark_bar(size=20).encode(
-            x='timestamp:T',
-            y=alt.Y('volume:Q', title='거래량'),
-            color=alt.condition(
-                "datum.color == 'up'",
-                alt.value('#FF0000'),
-                alt.value('#0066FF')
-            )
-        ).properties(
-            width=900,
-            height=120
-        )
-
-        zoom = alt.selection_interval(bind='scales')
-
-        chart = alt.vconcat(
-            alt.layer(stems, candles).properties(width=900, height=420).add_params(zoom),
-            volume
-        ).configure_axis(
-            labelFontSize=13,
-            titleFontSize=15
-        ).configure_view(
-            strokeWidth=0
-        )
-
-        st.altair_chart(chart, use_container_width=True)
+    # 실시간 체결가/진행 중 캔들은 WebSocket 저장소에서 읽음
+    if settings.STREAMING_ENABLED:
+        market_stream.subscribe("upbit", ticker)
+    live_coin_price = tick_store.latest_price("upbit", ticker)
+    if live_coin_price is not None:
+        st.metric("실시간 현재가", f"{live_coin_price:,.2f}원")
+
+    # 심볼별 캔들 버퍼에 마지막 봉 이후만 받아 채우고, 진행 중 봉은 WebSocket 캔들로 갱신
+    with metrics.span("render", "crypto_candles"):
+        candle_buffer = prefetched.get("crypto_candles", sync_upbit_minutes, ticker)
+    apply_live_candle(candle_buffer, tick_store.candle("upbit", ticker))
+    # 상위 주기는 로컬 1분봉으로 만들므로 주기를 바꿔도 추가 요청 없음
+    crypto_timeframe = st.radio("봉 주기", list(TIMEFRAMES), horizontal=True, key="crypto_timeframe")
+    # 보조지표는 버퍼 전체 기간 기준으로 새 봉만 증분 계산
+    crypto_indicators = [CHART_INDICATORS[label] for label in st.multiselect("보조지표", list(CHART_INDICATORS), key="crypto_indicators")]
+    with metrics.span("render", "crypto_frame"):
+        df, overlays, panels = indicator_chart_frame("upbit", ticker, crypto_timeframe, crypto_indicators, last=settings.CHART_WINDOW, tz='Asia/Seoul')
+    if not df.empty:
+        with metrics.span("render", "crypto_chart"):
+            st.vega_lite_chart(candlestick_spec(df, overlays=overlays, panels=panels), width="stretch")
+    elif crypto_timeframe != "1m" and len(candle_buffer):
+        # 상위 주기는 1분봉 기록이 봉 구간 전체를 덮은 봉만 만들어짐 (일부 구간만 담긴 첫 봉은 버림)
+        st.info(f"1분봉 기록이 아직 {crypto_timeframe} 봉 하나를 온전히 덮지 못해 표시할 봉이 없습니다.")
     else:
         st.warning("실시간 차트 데이터를 가져올 수 없습니다.")
 
     # 코인 거래 UI (차트 아래에만 표시, 거래 실행 아래에는 X)
     coin_symbol = st.session_state.crypto_info["symbol"]
-    coin_price = st.session_state.crypto_info["price"]
+    # 실시간 체결가가 있으면 그 가격으로 거래 (없으면 조회 당시 가격)
+    coin_price = live_coin_price if live_coin_price is not None else st.session_state.crypto_info["price"]
 
     trade_method_crypto = st.radio("거래 방식 선택 (코인)", ["수량 기준", "금액 기준"], horizontal=True, key="crypto_trade_method")
     if trade_method_crypto == "수량 기준":
@@ -483,7 +411,7 @@ if "crypto_info" in st.session_state and st.session_state.crypto_info.get("symbo
     action_crypto = st.radio("코인 거래 선택", ["매수", "매도"], horizontal=True, key="crypto_trade_action")
 
     if st.button("코인 거래 실행", key="crypto_trade_execute"):
-        name = coin_symbol
+        name = instrument("upbit", coin_symbol)
         price = coin_price
 
         if trade_method_crypto == "수량 기준":
@@ -492,24 +420,53 @@ if "crypto_info" in st.session_state and st.session_state.crypto_info.get("symbo
             qty = trade_amount_crypto / price
             if qty < 0.0001:
                 st.error("입력한 금액이 최소 거래 수량보다 작습니다.")
-                st.stop()
+                stop_run()
 
         if action_crypto == "매수":
             if st.session_state.account.buy(name, price, qty):
-                st.session_state.log.append(f"코인 매수 완료: {qty:.4f}개 @ {price:,.2f}원")
+                st.session_state.log.add("buy", f"코인 매수 완료: {qty:.4f}개 @ {price:,.2f}원", symbol=name, qty=qty, price=price)
                 st.success(f"[매수 완료] {qty:.4f}개 @ {price:,.2f}원")
             else:
-                st.session_state.log.append("코인 매수 실패: 잔고 부족")
+                st.session_state.log.add("rejected", "코인 매수 실패: 잔고 부족", symbol=name, qty=qty, price=price)
                 st.error("[매수 실패] 잔고 부족")
         elif action_crypto == "매도":
             if st.session_state.account.sell(name, price, qty):
-                st.session_state.log.append(f"코인 매도 완료: {qty:.4f}개 @ {price:,.2f}원")
+                st.session_state.log.add("sell", f"코인 매도 완료: {qty:.4f}개 @ {price:,.2f}원", symbol=name, qty=qty, price=price)
                 st.success(f"[매도 완료] {qty:.4f}개 @ {price:,.2f}원")
             else:
-                st.session_state.log.append("코인 매도 실패: 보유 수량 부족")
+                st.session_state.log.add("rejected", "코인 매도 실패: 보유 수량 부족", symbol=name, qty=qty, price=price)
                 st.error("[매도 실패] 보유 수량 부족")
         # rerun 하지 않음
 
+    render_reserved_orders("upbit", coin_symbol, "crypto", 0.0001)
+
+    # 자동 매매: 백그라운드 실행기가 1분봉 마감마다 전략을 평가하여 이 계좌로 주문 (새로고침/탭과 무관)
+    with st.expander("🤖 자동 매매 (이동평균 교차)"):
+        auto_fast = st.number_input("단기 이동평균 (봉)", min_value=2, value=5, step=1, key="auto_fast")
+        auto_slow = st.number_input("장기 이동평균 (봉)", min_value=3, value=20, step=1, key="auto_slow")
+        auto_amount = st.number_input("1회 매수 금액 (원)", min_value=1000, value=100000, step=1000, format="%d", key="auto_amount")
+        auto_jobs = st.session_state.setdefault("auto_jobs", {})
+        job_id = auto_jobs.get(coin_symbol)
+        if job_id is None:
+            if st.button("자동 매매 시작", key="auto_start"):
+                if auto_fast >= auto_slow:
+                    st.error("단기 이동평균은 장기 이동평균보다 짧아야 합니다.")
+                else:
+                    strategy = SmaCrossStrategy(int(auto_fast), int(auto_slow))
+                    auto_jobs[coin_symbol] = strategy_runner.register(strategy, st.session_state.account, "upbit", coin_symbol, auto_amount)
+                    st.session_state.log.add("strategy", f"자동 매매 시작: {coin_symbol} SMA {auto_fast}/{auto_slow}, 1회 {auto_amount:,}원", symbol=coin_symbol)
+                    st.success("자동 매매를 시작했습니다.")
+        else:
+            if st.button("자동 매매 중지", key="auto_stop"):
+                strategy_runner.unregister(auto_jobs.pop(coin_symbol))
+                st.session_state.log.add("strategy", f"자동 매매 중지: {coin_symbol}", symbol=coin_symbol)
+                st.success("자동 매매를 중지했습니다.")
+            else:
+                fills = strategy_runner.fills(job_id)
+                st.caption(f"실행 중 (체결 {len(fills)}건)")
+                if fills:
+                    st.dataframe(pd.DataFrame(fills[::-1]), width="stretch")
+
 else:
     st.info("먼저 코인 시세를 조회하세요.")
 
@@ -526,10 +483,10 @@ if st.button("선물 시세 조회", key="futures_search"):
         symbol, price = get_binance_futures_price(futures_name)
         if price != -1:
             st.session_state.futures_info = {"symbol": symbol, "price": price}
-            st.session_state.log.append(f"선물 시세 조회 성공: [{symbol}] 현재가 ${price:,.3f}")
+            st.session_state.log.add("quote", f"선물 시세 조회 성공: [{symbol}] 현재가 ${price:,.3f}", symbol=symbol, price=price)
             st.success(f"[{symbol}] 현재가: ${price:,.3f}")
         else:
-            st.session_state.log.append("선물 정보 조회 실패")
+            st.session_state.log.add("error", "선물 정보 조회 실패")
             st.error("선물 정보를 찾을 수 없습니다.")
 
 # ----------------------
@@ -539,72 +496,27 @@ if "futures_info" in st.session_state and st.session_state.futures_info.get("sym
     st.header("📊 실시간 선물 차트")
     futures_symbol = st.session_state.futures_info["symbol"]
     st.info("실시간 차트는 10초마다 자동 갱신됩니다. 선물 시세가 변경되면 차트도 갱신됩니다.")
+    if settings.STREAMING_ENABLED:
+        market_stream.subscribe("binance", futures_symbol)
+    live_futures_price = tick_store.latest_price("binance", futures_symbol)
+    if live_futures_price is not None:
+        st.metric("실시간 현재가", f"${live_futures_price:,.3f}")
     try:
-        client = Client()
-        # 1분봉, 최근 30개 데이터 (리밋 조절 가능)
-        klines = client.futures_klines(symbol=futures_symbol, interval="1m", limit=30)
-        # klines: [ open time, open, high, low, close, volume, close time, ... ]
-        df = pd.DataFrame(klines, columns=[
-            'open_time','open','high','low','close','volume',
-            'close_time','qav','num_trades','taker_base_vol','taker_quote_vol','ignore'
-        ])
-        df['timestamp'] = pd.to_datetime(df['open_time'], unit='ms')
-        df[['open','high','low','close','volume']] = df[['open','high','low','close','volume']].astype(float)
-        df['color'] = ['up' if c > o else 'down' for o, c in zip(df['open'], df['close'])]
-
-        min_price = df['low'].min()
-        max_price = df['high'].max()
-        margin = (max_price - min_price) * 0.05
-
-        stems = alt.Chart(df).mark_rule().encode(
-            x=alt.X('timestamp:T', title='시간', axis=alt.Axis(labelAngle=-45)),
-            y=alt.Y('low:Q', title='가격',
-                    scale=alt.Scale(domain=[min_price - margin, max_price + margin])),
-            y2='high:Q',
-            color=alt.condition(
-                "datum.color == 'up'",
-                alt.value('#FF0000'),
-                alt.value('#0066FF')
-            )
-        )
-
-        candles = alt.Chart(df).mark_bar(size=20).encode(
-            x='timestamp:T',
-            y=alt.Y('open:Q', scale=alt.Scale(domain=[min_price - margin, max_price + margin])),
-            y2='close:Q',
-            color=alt.condition(
-                "datum.color == 'up'",
-                alt.value('#FF0000'),
-                alt.value('#0066FF')
-            )
-        )
-
-        volume = alt.Chart(df).mark_bar(size=20).encode(
-            x='timestamp:T',
-            y=alt.Y('volume:Q', title='거래량'),
-            color=alt.condition(
-                "datum.color == 'up'",
-                alt.value('#FF0000'),
-                alt.value('#0066FF')
-            )
-        ).properties(
-            width=900,
-            height=120
-        )
-
-        zoom = alt.selection_interval(bind='scales')
-
-        chart = alt.vconcat(
-            alt.layer(stems, candles).properties(width=900, height=420).add_params(zoom),
-            volume
-        ).configure_axis(
-            labelFontSize=13,
-            titleFontSize=15
-        ).configure_view(
-            strokeWidth=0
-        )
-
-        st.altair_chart(chart, use_container_width=True)
+        # 1분봉 버퍼 (마지막 봉 이후만 요청), 최근 CHART_WINDOW 개 표시
+        with metrics.span("render", "futures_candles"):
+            candle_buffer = prefetched.get("futures_candles", sync_binance_minutes, futures_symbol)
+        apply_live_candle(candle_buffer, tick_store.candle("binance", futures_symbol))
+        futures_timeframe = st.radio("봉 주기", list(TIMEFRAMES), horizontal=True, key="futures_timeframe")
+        futures_indicators = [CHART_INDICATORS[label] for label in st.multiselect("보조지표", list(CHART_INDICATORS), key="futures_indicators")]
+        with metrics.span("render", "futures_frame"):
+            df, overlays, panels = indicator_chart_frame("binance", futures_symbol, futures_timeframe, futures_indicators, last=settings.CHART_WINDOW)
+        if not df.empty:
+            with metrics.span("render", "futures_chart"):
+                st.vega_lite_chart(candlestick_spec(df, overlays=overlays, panels=panels), width="stretch")
+        elif futures_timeframe != "1m" and len(candle_buffer):
+            st.info(f"1분봉 기록이 아직 {futures_timeframe} 봉 하나를 온전히 덮지 못해 표시할 봉이 없습니다.")
+        else:
+            st.warning("실시간 선물 차트 데이터를 가져올 수 없습니다.")
 
     except Exception as e:
         st.error(f"실시간 선물 차트 데이터를 가져올 수 없습니다: {e}")
@@ -614,52 +526,135 @@ if "futures_info" in st.session_state and st.session_state.futures_info.get("sym
 # ----------------------
 if "futures_info" in st.session_state and st.session_state.futures_info.get("symbol"):
     futures_symbol = st.session_state.futures_info["symbol"]
-    futures_price = st.session_state.futures_info["price"]
+    live_futures_price = tick_store.latest_price("binance", futures_symbol)
+    # 실시간 체결가가 있으면 그 가격으로 거래 (없으면 조회 당시 가격)
+    futures_price = live_futures_price if live_futures_price is not None else st.session_state.futures_info["price"]
+
+    futures_account = futures_accounts.get(st.session_state.account_name)
+    # 마크 가격 스트림이 있으면 그 값으로, 없으면 체결가로 위험도(증거금 비율/청산)를 다시 계산
+    mark = tick_store.mark("binance", futures_symbol)
+    futures_account.update_mark(futures_symbol, mark["price"] if mark else futures_price)
+
+    deposit_col, mode_col = st.columns(2)
+    with deposit_col:
+        futures_deposit = st.number_input("선물 지갑 입금 (USDT)", min_value=0, step=100, format="%d", key="futures_deposit")
+        if st.button("USDT 입금", key="futures_deposit_button") and futures_deposit > 0:
+            futures_account.deposit(futures_deposit)
+            st.session_state.log.add("deposit", f"선물 지갑 입금: {futures_deposit:,} USDT", qty=futures_deposit)
+    with mode_col:
+        margin_mode = st.radio("마진 모드", ["격리", "교차"], horizontal=True, key="futures_margin_mode")
+        leverage = st.slider("레버리지", 1, settings.FUTURES_MAX_LEVERAGE, 10, key="futures_leverage")
+    st.caption(f"지갑 잔고 {futures_account.balance:,.3f} USDT / 주문 가능 {futures_account.available():,.3f} USDT")
 
     trade_method_futures = st.radio("거래 방식 선택 (선물)", ["수량 기준", "금액 기준"], horizontal=True, key="futures_trade_method")
     if trade_method_futures == "수량 기준":
         futures_qty = st.number_input("선물 수량 입력", min_value=0.001, step=0.001, format="%.3f", key="futures_qty")
     else:
-        trade_amount_futures = st.number_input("거래 금액 입력 (USDT)", min_value=0, step=10, format="%d", key="trade_amount_futures")
+        trade_amount_futures = st.number_input("주문 금액 입력 (USDT, 명목가)", min_value=0, step=10, format="%d", key="trade_amount_futures")
 
-    action_futures = st.radio("선물 거래 선택", ["매수", "매도"], horizontal=True, key="futures_trade_action")
+    action_futures = st.radio("선물 거래 선택", ["롱", "숏", "포지션 종료"], horizontal=True, key="futures_trade_action")
 
     if st.button("선물 거래 실행", key="futures_trade_execute"):
-        name = futures_symbol
         price = futures_price
-
-        if trade_method_futures == "수량 기준":
-            qty = futures_qty
+        if action_futures == "포지션 종료":
+            if futures_account.close(futures_symbol, price):
+                st.session_state.log.add("futures", f"선물 포지션 종료: {futures_symbol} @ ${price:,.3f}", symbol=futures_symbol, price=price)
+                st.success(f"[포지션 종료] {futures_symbol} @ ${price:,.3f}")
+            else:
+                st.warning("종료할 포지션이 없습니다.")
         else:
-            qty = trade_amount_futures / price
-            if qty < 0.001:
-                st.error("입력한 금액이 최소 거래 수량보다 작습니다.")
-                st.stop()
-
-        if action_futures == "매수":
-            if st.session_state.account.buy(name, price, qty):
-                st.session_state.log.append(f"선물 매수 완료: {qty:.3f}개 @ ${price:,.3f}")
-                st.success(f"[매수 완료] {qty:.3f}개 @ ${price:,.3f}")
+            if trade_method_futures == "수량 기준":
+                qty = futures_qty
             else:
-                st.session_state.log.append("선물 매수 실패: 잔고 부족")
-                st.error("[매수 실패] 잔고 부족")
-        elif action_futures == "매도":
-            if st.session_state.account.sell(name, price, qty):
-                st.session_state.log.append(f"선물 매도 완료: {qty:.3f}개 @ ${price:,.3f}")
-                st.success(f"[매도 완료] {qty:.3f}개 @ ${price:,.3f}")
+                qty = trade_amount_futures / price
+                if qty < 0.001:
+                    st.error("입력한 금액이 최소 거래 수량보다 작습니다.")
+                    stop_run()
+
+            try:
+                futures_account.configure(futures_symbol, leverage, "isolated" if margin_mode == "격리" else "cross")
+            except ValueError as e:
+                st.error(str(e))
+                stop_run()
+            side = "buy" if action_futures == "롱" else "sell"
+            if futures_account.order(futures_symbol, side, qty, price):
+                st.session_state.log.add("futures", f"선물 {action_futures} 완료: {qty:.3f}개 @ ${price:,.3f} ({margin_mode} {leverage}x)", symbol=futures_symbol, qty=qty, price=price)
+                st.success(f"[{action_futures} 완료] {qty:.3f}개 @ ${price:,.3f}")
             else:
-                st.session_state.log.append("선물 매도 실패: 보유 수량 부족")
-                st.error("[매도 실패] 보유 수량 부족")
+                st.session_state.log.add("rejected", f"선물 {action_futures} 실패: 증거금 부족", symbol=futures_symbol, qty=qty, price=price)
+                st.error(f"[{action_futures} 실패] 증거금 부족")
         # rerun 하지 않음
+
+    futures_positions = futures_account.positions_frame()
+    if not futures_positions.empty:
+        st.subheader("선물 포지션")
+        st.dataframe(futures_positions, width="stretch")
+    liquidations = [e for e in futures_account.events if e["kind"] == "liquidation"]
+    if liquidations:
+        last = liquidations[-1]
+        st.warning(f"최근 청산: {last['symbol']} @ ${last['price']:,.3f} ({last['time']}, 손실 {-last['pnl']:,.3f} USDT)")
 else:
     st.info("먼저 선물 시세를 조회하세요.")
 
+# ----------------------
+# 관심종목 일괄 시세 (주식/업비트/바이낸스 선물 혼합)
+# ----------------------
+st.header("👀 관심종목 시세")
+watchlist_text = st.text_input("관심종목 입력 (쉼표로 구분, 예: 삼성전자, 000660, upbit:BTC, binance:ETH)", key="watchlist")
+if watchlist_text.strip():
+    with metrics.span("render", "watchlist"):
+        watch_quotes = prefetched.get("watchlist", get_watchlist_quotes, parse_watchlist(watchlist_text))
+    df_watch = pd.DataFrame(watch_quotes).rename(columns={
+        "venue": "거래소", "query": "입력", "symbol": "심볼", "name": "이름", "price": "현재가"
+    })
+    df_watch["현재가"] = df_watch["현재가"].where(df_watch["현재가"] != -1)
+    # 조회한 시세로 예약 주문 발동 여부 확인 (실시간 스트림이 없는 주식 포함)
+    for quote in watch_quotes:
+        if quote["price"] != -1 and quote["symbol"]:
+            order_book.on_price(quote["venue"], quote["symbol"], quote["price"])
+    st.dataframe(df_watch, width="stretch", hide_index=True)
+
 # ----------------------
 # 실행 로그 출력 (기존)
 # ----------------------
 st.markdown("### 실행 로그")
-if st.session_state.log:
-    for log in st.session_state.log:
-        st.write(log)
+# 최근 기록부터 한 페이지 분량만 표 하나로 표시 (기록 수와 무관하게 리런 비용 일정)
+execution_log = st.session_state.log
+if len(execution_log):
+    log_pages = execution_log.pages(settings.EXEC_LOG_PAGE_SIZE)
+    log_page = 1
+    if log_pages > 1:
+        log_page = st.number_input(f"페이지 (1 = 최신, 전체 {log_pages}쪽)", min_value=1, max_value=log_pages, value=1, step=1, key="log_page")
+    st.dataframe(execution_log.page(log_page, settings.EXEC_LOG_PAGE_SIZE), width="stretch", hide_index=True)
 else:
     st.write("로그가 없습니다.")
+
+# ----------------------
+# 진단 패널 (WEBCOSTOCK_DIAGNOSTICS=1 또는 주소에 ?diagnostics=1)
+# ----------------------
+if settings.DIAGNOSTICS_PANEL or st.query_params.get("diagnostics") == "1":
+    with st.expander("🩺 진단 (리런 구간 시간 / 외부 요청 / 캐시)"):
+        st.caption(f"이번 리런: 지금까지 {rerun_trace.elapsed() * 1000:,.1f} ms")
+        st.dataframe(rerun_trace.frame(), width="stretch", hide_index=True)
+        st.markdown("**누적 구간 통계 (프로세스 전체)**")
+        st.dataframe(metrics.span_frame(), width="stretch", hide_index=True)
+        diagnostics = metrics.snapshot()
+        st.markdown("**캐시 적중률**")
+        cache_rows = [
+            {"캐시": f"시세 ({kind})", "적중": s["hits"], "실패": s["misses"], "축출": s["evictions"],
+             "적중률": None if s["hit_rate"] is None else round(s["hit_rate"] * 100, 1)}
+            for kind, s in diagnostics["market_cache"]["kinds"].items()
+        ]
+        chart_cache = diagnostics["chart_cache"]
+        cache_rows.append({"캐시": "차트 스펙", "적중": chart_cache["hits"], "실패": chart_cache["misses"], "축출": None,
+                           "적중률": None if chart_cache["hit_rate"] is None else round(chart_cache["hit_rate"] * 100, 1)})
+        st.dataframe(pd.DataFrame(cache_rows), width="stretch", hide_index=True)
+        st.markdown("**외부 요청 (호스트별)**")
+        st.dataframe(pd.DataFrame([
+            {"호스트": host, "요청": s["calls"], "제한 대기(s)": round(s["waited"], 3)}
+            for host, s in diagnostics["upstream"]["hosts"].items()
+        ]), width="stretch", hide_index=True)
+        if settings.METRICS_PORT:
+            st.caption(f"수집용 엔드포인트: http://{settings.METRICS_HOST}:{settings.METRICS_PORT}/metrics (Prometheus), /metrics.json")
+
+metrics.finish_rerun(rerun_trace)
@@ -0,0 +1,109 @@
+"""
+KRX 일봉 일괄 백필
+
+pykrx(실패 시 FinanceDataReader)로 일봉을 받아 로컬 저장소(store.column_store)에 기록합니다.
+이미 저장된 종목은 마지막 저장일부터만 받습니다. (장중에 저장된 마지막 일봉을 마감 값으로 갱신)
+
+사용법:
+    python backfill.py 005930 000660 --start 2020-01-01
+    python backfill.py --all-krx --start 2024-01-01 --workers 4
+    python backfill.py --venue fdr --source fdr BTC/KRW US500
+"""
+import argparse
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from governor import upstream
+from lazy import lazy_import
+from store import column_store
+
+fdr = lazy_import("FinanceDataReader")
+stock = lazy_import("pykrx.stock")
+
+DEFAULT_START = "2015-01-01"
+PYKRX_COLUMNS = {"시가": "open", "고가": "high", "저가": "low", "종가": "close", "거래량": "volume"}
+FDR_COLUMNS = {"Open": "open", "High": "high", "Low": "low", "Close": "close", "Volume": "volume"}
+
+def _fetch_pykrx(code, start, end):
+    start, end = start.strftime("%Y%m%d"), end.strftime("%Y%m%d")
+    df = upstream.call("krx", ("ohlcv", code, start, end), stock.get_market_ohlcv, start, end, code)
+    return df.rename(columns=PYKRX_COLUMNS)
+
+def _fetch_fdr(code, start, end):
+    start, end = start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")
+    df = upstream.call("naver", ("daily", code, start, end), fdr.DataReader, code, start, end)
+    return df.rename(columns=FDR_COLUMNS)
+
+def fetch_daily(code, start, end, source="pykrx"):
+    """일봉 DataFrame(open/high/low/close/volume, 날짜 인덱스)을 받습니다. pykrx 가 실패하면 fdr 로 다시 시도합니다."""
+    df = None
+    if source == "pykrx":
+        try:
+            df = _fetch_pykrx(code, start, end)
+        except Exception:
+            df = None
+    if df is None or df.empty:
+        df = _fetch_fdr(code, start, end)
+    if "volume" not in df.columns:
+        df["volume"] = 0.0
+    return df[["open", "high", "low", "close", "volume"]].dropna()
+
+def backfill_symbol(code, start=None, end=None, venue="krx", source="pykrx"):
+    """
+    한 종목의 일봉을 저장소에 채우고 받아서 기록한 봉 수를 반환합니다.
+    start 를 생략하면 저장된 마지막 날짜(없으면 DEFAULT_START)부터 받습니다.
+    마지막 날도 다시 받는 것은 장중에 저장된 미완성 일봉을 마감 값으로 덮어쓰기 위해서입니다. (같은 시각 행은 write 가 교체)
+    """
+    end = end or datetime.now()
+    if start is None:
+        last = column_store.last_timestamp(venue, code, "1d")
+        start = pd.Timestamp(last, unit="ms").to_pydatetime() if last else pd.Timestamp(DEFAULT_START).to_pydatetime()
+    if start > end:
+        return 0
+    df = fetch_daily(code, start, end, source)
+    if df.empty:
+        return 0
+    # 일봉 시각은 해당 날짜 00:00 (UTC 기준 epoch ms) 로 저장
+    timestamps = pd.DatetimeIndex(df.index).tz_localize(None).normalize().asi8 // 1_000_000
+    column_store.write(venue, code, "1d", timestamps, **{c: df[c].to_numpy(dtype=np.float64) for c in df.columns})
+    return len(df)
+
+def main():
+    parser = argparse.ArgumentParser(description="일봉 데이터를 로컬 저장소로 백필합니다.")
+    parser.add_argument("symbols", nargs="*", help="종목 코드 (예: 005930)")
+    parser.add_argument("--all-krx", action="store_true", help="KRX 전체 종목 백필")
+    parser.add_argument("--start", help="시작일 (YYYY-MM-DD). 생략 시 저장된 마지막 날짜부터")
+    parser.add_argument("--end", help="종료일 (YYYY-MM-DD). 생략 시 오늘")
+    parser.add_argument("--venue", default="krx", help="저장소 거래소 이름 (기본: krx)")
+    parser.add_argument("--source", default="pykrx", choices=["pykrx", "fdr"], help="데이터 소스 (기본: pykrx, 실패 시 fdr)")
+    parser.add_argument("--workers", type=int, default=4, help="동시 조회 수")
+    args = parser.parse_args()
+
+    symbols = list(args.symbols)
+    if args.all_krx:
+        from symbols import krx_index
+        symbols += list(krx_index.index()["code_to_name"])
+    if not symbols:
+        parser.error("종목 코드를 입력하거나 --all-krx 를 지정하세요.")
+
+    start = datetime.strptime(args.start, "%Y-%m-%d") if args.start else None
+    end = datetime.strptime(args.end, "%Y-%m-%d") if args.end else None
+
+    total = 0
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        futures = {pool.submit(backfill_symbol, code, start, end, args.venue, args.source): code for code in symbols}
+        for future in as_completed(futures):
+            code = futures[future]
+            try:
+                count = future.result()
+                total += count
+                print(f"{code}: {count}개 저장")
+            except Exception as e:
+                print(f"{code}: 실패 ({e})")
+    print(f"완료: {len(symbols)}개 종목, {total}개 봉 저장")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""
+벡터화 백테스트
+
+로컬 저장소(store.column_store)의 봉 데이터로 매매 규칙을 재생합니다.
+매수는 보유 현금 전액, 매도는 보유 수량 전량이며 VirtualAccount.buy/sell 과 같은 규칙을 따릅니다.
+(주식은 현금 // 가격 으로 정수 주, 코인은 현금 / 가격 으로 소수 수량)
+신호는 봉 종가 기준으로 계산하고, 체결은 다음 봉 시가로 처리해 미래 데이터를 보지 않습니다.
+
+사용법:
+    python backtest.py 005930 000660 --param fast=5:30:5 --param slow=20:120:20
+    python backtest.py --venue upbit --interval 1m --all --strategy breakout --param entry=20,55 --param exit=10,20
+    python backtest.py --all --workers 8 --top 30 --csv result.csv
+"""
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from account import VirtualAccount
+from indicators import sma
+from store import column_store
+
+# ----------------------
+# 지표 (numpy 벡터 연산, 이동평균 등은 indicators 모듈 사용)
+# ----------------------
+def _rolling_extreme(values, window, func):
+    out = np.full(len(values), np.nan)
+    if window <= len(values):
+        out[window - 1:] = func(np.lib.stride_tricks.sliding_window_view(values, window), axis=1)
+    return out
+
+# ----------------------
+# 매매 규칙: 각 봉 종가 시점에 보유하고 싶으면 True 인 배열을 반환
+# ----------------------
+def sma_cross(data, fast=5, slow=20, memo=None):
+    """단기 이동평균이 장기 이동평균 위에 있으면 보유합니다."""
+    memo = {} if memo is None else memo
+    close = data["close"]
+    if fast not in memo:
+        memo[fast] = sma(close, fast)
+    if slow not in memo:
+        memo[slow] = sma(close, slow)
+    return memo[fast] > memo[slow]  # nan 구간은 False
+
+def breakout(data, entry=20, exit=10, memo=None):
+    """종가가 직전 entry 봉 고가를 넘으면 매수, 직전 exit 봉 저가를 깨면 매도합니다. (터틀 방식)"""
+    close = data["close"]
+    upper = np.r_[np.nan, _rolling_extreme(data["high"], entry, np.max)[:-1]]
+    lower = np.r_[np.nan, _rolling_extreme(data["low"], exit, np.min)[:-1]]
+    # 매수 신호 1, 매도 신호 0, 신호 없음 -1 -> 마지막 신호를 이어감
+    signal = np.where(close > upper, 1, np.where(close < lower, 0, -1))
+    last = np.maximum.accumulate(np.where(signal >= 0, np.arange(len(signal)), 0))
+    return signal[last] == 1
+
+STRATEGIES = {
+    "sma_cross": sma_cross,
+    "breakout": breakout,
+}
+
+# ----------------------
+# 체결 / 평가
+# ----------------------
+def _trade_points(hold):
+    # 봉 t 종가에서 결정한 포지션은 t+1 시가에 체결
+    held = np.r_[False, hold[:-1]]
+    prev = np.r_[False, held[:-1]]
+    entries = np.flatnonzero(held & ~prev)
+    exits = np.flatnonzero(~held & prev)
+    return held, entries, exits
+
+def _fill_fractional(init_cash, entry_px, exit_px):
+    # 현금 전액 매수 -> 전량 매도가 반복되므로 거래별 현금은 가격 비율의 누적곱
+    growth = exit_px / entry_px[:len(exit_px)]
+    cash_before = init_cash * np.r_[1.0, np.cumprod(growth)]
+    qty = cash_before[:len(entry_px)] / entry_px
+    return qty, np.zeros(len(entry_px)), cash_before
+
+def _fill_whole_units(init_cash, entry_px, exit_px, name="backtest"):
+    # 정수 주는 잔여 현금이 다음 거래 수량에 영향을 주므로 거래 단위로 VirtualAccount 에 그대로 재생
+    account = VirtualAccount(init_cash)
+    qty = np.zeros(len(entry_px))
+    cash_left = np.zeros(len(entry_px))
+    cash_before = np.zeros(len(exit_px) + 1)
+    cash_before[0] = init_cash
+    for k, price in enumerate(entry_px):
+        qty[k] = float(account.get_cash()) // price
+        account.buy(name, price, qty[k])
+        cash_left[k] = float(account.get_cash())
+        if k < len(exit_px):
+            account.sell(name, exit_px[k], qty[k])
+            cash_before[k + 1] = float(account.get_cash())
+    return qty, cash_left, cash_before
+
+def simulate(data, hold, init_cash=10_000_000, whole_units=False):
+    """
+    보유 여부 배열(hold)로 매매를 재생하고 성과 dict 를 반환합니다.
+    equity 는 각 봉 종가 기준 평가금액 배열입니다.
+    """
+    open_, close = data["open"], data["close"]
+    n = len(close)
+    if n == 0:
+        return {"final_equity": float(init_cash), "return_pct": 0.0, "max_drawdown_pct": 0.0,
+                "trades": 0, "win_rate": 0.0, "exposure": 0.0, "equity": np.full(0, float(init_cash))}
+    held, entries, exits = _trade_points(np.asarray(hold, dtype=bool))
+    entry_px, exit_px = open_[entries], open_[exits]
+    fill = _fill_whole_units if whole_units else _fill_fractional
+    qty, cash_left, cash_before = fill(init_cash, entry_px, exit_px)
+
+    # 봉별 평가금액: 보유 중이면 잔여 현금 + 수량 * 종가, 아니면 마지막 매도 후 현금
+    is_entry = np.zeros(n, dtype=bool)
+    is_entry[entries] = True
+    is_exit = np.zeros(n, dtype=bool)
+    is_exit[exits] = True
+    trade_no = np.cumsum(is_entry) - 1
+    done = np.cumsum(is_exit)
+    k = np.maximum(trade_no, 0)
+    equity = np.where(held, cash_left[k] + qty[k] * close if len(qty) else 0.0, cash_before[done])
+
+    peak = np.maximum.accumulate(equity)
+    drawdown = np.where(peak > 0, (peak - equity) / peak, 0.0)
+    wins = exit_px > entry_px[:len(exit_px)]
+    return {
+        "final_equity": float(equity[-1]),
+        "return_pct": float((equity[-1] / init_cash - 1) * 100),
+        "max_drawdown_pct": float(drawdown.max() * 100),
+        "trades": int(len(entries)),
+        "win_rate": float(wins.mean() * 100) if len(wins) else 0.0,
+        "exposure": float(held.mean() * 100),
+        "equity": equity,
+    }
+
+def run_symbol(venue, symbol, interval, strategy, grid, init_cash=10_000_000, whole_units=None, start=None, end=None):
+    """한 심볼의 데이터를 한 번 읽어 모든 파라미터 조합을 평가하고 결과 dict 목록을 반환합니다."""
+    data = column_store.read(venue, symbol, interval, start, end)
+    data = {k: np.asarray(v) for k, v in data.items()}
+    if whole_units is None:
+        whole_units = venue == "krx"
+    rule = STRATEGIES[strategy]
+    memo = {}  # 같은 심볼 안에서는 지표 계산을 파라미터 조합끼리 공유
+    results = []
+    for params in grid:
+        result = simulate(data, rule(data, memo=memo, **params), init_cash, whole_units)
+        del result["equity"]
+        results.append({"venue": venue, "symbol": symbol, **params, **result, "bars": len(data["close"])})
+    return results
+
+def _run_symbol_task(args):
+    return run_symbol(*args)
+
+def sweep(venue, symbols, interval="1d", strategy="sma_cross", grid=None, init_cash=10_000_000,
+          whole_units=None, start=None, end=None, workers=None):
+    """
+    여러 심볼 x 파라미터 조합을 프로세스 풀에서 병렬로 평가해 수익률 순 DataFrame 으로 반환합니다.
+    작업 단위는 심볼이며, 각 프로세스가 저장소에서 직접 읽으므로 가격 배열을 프로세스 간에 넘기지 않습니다.
+    """
+    grid = grid or [{}]
+    tasks = [(venue, symbol, interval, strategy, grid, init_cash, whole_units, start, end) for symbol in symbols]
+    rows = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(_run_symbol_task, task): task[1] for task in tasks}
+        for future in as_completed(futures):
+            try:
+                rows.extend(future.result())
+            except Exception as e:
+                print(f"{futures[future]}: 실패 ({e})")
+    df = pd.DataFrame(rows)
+    if df.empty:
+        return df
+    return df.sort_values("return_pct", ascending=False, ignore_index=True)
+
+def parse_param(text):
+    """'fast=5:30:5' (시작:끝:간격, 끝 포함) 또는 'fast=5,10,20' 을 (이름, 값 목록)으로 바꿉니다."""
+    name, _, spec = text.partition("=")
+    if ":" in spec:
+        lo, hi, step = (int(v) for v in spec.split(":"))
+        values = list(range(lo, hi + 1, step))
+    else:
+        values = [int(v) for v in spec.split(",") if v]
+    return name.strip(), values
+
+def make_grid(params):
+    """{이름: 값 목록} 의 모든 조합을 dict 목록으로 만듭니다. sma_cross 는 fast < slow 인 조합만 남깁니다."""
+    names = list(params)
+    grid = [dict(zip(names, values)) for values in itertools.product(*(params[n] for n in names))]
+    return [p for p in grid if not ("fast" in p and "slow" in p and p["fast"] >= p["slow"])]
+
+def _to_ms(text):
+    return int(pd.Timestamp(text).value // 1_000_000) if text else None
+
+def main():
+    parser = argparse.ArgumentParser(description="로컬 저장소의 봉 데이터로 매매 규칙을 백테스트합니다.")
+    parser.add_argument("symbols", nargs="*", help="심볼 (예: 005930, KRW-BTC)")
+    parser.add_argument("--all", action="store_true", help="저장소에 있는 해당 거래소/주기의 모든 심볼")
+    parser.add_argument("--venue", default="krx", help="저장소 거래소 이름 (기본: krx)")
+    parser.add_argument("--interval", default="1d", help="봉 주기 (기본: 1d)")
+    parser.add_argument("--strategy", default="sma_cross", choices=sorted(STRATEGIES), help="매매 규칙")
+    parser.add_argument("--param", action="append", default=[], help="파라미터 범위. 예: fast=5:30:5 또는 slow=20,60,120")
+    parser.add_argument("--start", help="시작일 (YYYY-MM-DD)")
+    parser.add_argument("--end", help="종료일 (YYYY-MM-DD)")
+    parser.add_argument("--cash", type=float, default=10_000_000, help="초기 현금 (기본: 10,000,000)")
+    parser.add_argument("--fractional", action="store_true", help="KRX 도 소수 수량으로 계산")
+    parser.add_argument("--workers", type=int, default=None, help="프로세스 수 (기본: CPU 수)")
+    parser.add_argument("--top", type=int, default=20, help="출력할 상위 결과 수")
+    parser.add_argument("--csv", help="전체 결과를 저장할 CSV 경로")
+    args = parser.parse_args()
+
+    symbols = list(args.symbols)
+    if args.all:
+        symbols += column_store.symbols(args.venue, args.interval)
+    if not symbols:
+        parser.error("심볼을 입력하거나 --all 을 지정하세요.")
+    grid = make_grid(dict(parse_param(p) for p in args.param))
+    whole_units = False if args.fractional else None
+
+    df = sweep(args.venue, symbols, args.interval, args.strategy, grid, args.cash, whole_units,
+               _to_ms(args.start), _to_ms(args.end), args.workers)
+    if df.empty:
+        print("결과가 없습니다. (저장된 데이터가 없으면 backfill.py 로 먼저 받으세요)")
+        return
+    if args.csv:
+        df.to_csv(args.csv, index=False)
+    with pd.option_context("display.width", 200, "display.max_columns", None):
+        print(df.head(args.top).to_string(index=False))
+    print(f"완료: {len(symbols)}개 심볼 x {len(grid)}개 조합 = {len(df)}건")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+네이버 금융 종목 페이지 파서 벤치마크
+
+저장해 둔 종목 페이지(bench/fixtures/naver/item_*.html)로 세 가지 경로를 비교합니다.
+- fast  : naver_parser.fast_extract (전체 문자열에서 마커 검색)
+- stream: naver_parser.ItemPageScanner (16KB 조각 단위로 받다가 현재가를 찾으면 중단)
+- soup  : naver_parser.soup_extract (기존 BeautifulSoup 전체 파싱)
+
+사용법:
+    python bench/naver_parse.py                 # 표 형태로 출력
+    python bench/naver_parse.py --json          # JSON 으로 출력
+    python bench/naver_parse.py --record 005930 # 실제 페이지를 받아 fixture 로 저장
+"""
+import os
+import sys
+import json
+import time
+import codecs
+import argparse
+import statistics
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import naver_parser  # noqa: E402
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "naver")
+CHUNK_SIZE = 16 * 1024
+
+def load_fixtures():
+    fixtures = []
+    for fn in sorted(os.listdir(FIXTURE_DIR)):
+        if fn.startswith("item_") and fn.endswith(".html"):
+            with open(os.path.join(FIXTURE_DIR, fn), "rb") as f:
+                fixtures.append((fn, f.read()))
+    return fixtures
+
+def _encoding(raw):
+    m = naver_parser._CHARSET_RE.search(raw[:CHUNK_SIZE])
+    return m.group(1).decode("ascii") if m else "utf-8"
+
+def run_stream(raw):
+    """응답을 조각 단위로 받는 상황을 흉내내고, (결과, 읽은 바이트 수)를 반환합니다."""
+    decoder = codecs.getincrementaldecoder(_encoding(raw))(errors="replace")
+    scanner = naver_parser.ItemPageScanner()
+    for pos in range(0, len(raw), CHUNK_SIZE):
+        if scanner.feed(decoder.decode(raw[pos:pos + CHUNK_SIZE])):
+            return (scanner.name, scanner.price), min(pos + CHUNK_SIZE, len(raw))
+    scanner.feed(decoder.decode(b"", final=True))
+    return scanner.finish(), len(raw)
+
+def time_per_call(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1e6
+
+def peak_memory(func):
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+def bench_fixture(fn, raw, repeat):
+    html = raw.decode(_encoding(raw), errors="replace")
+    paths = {
+        "fast": lambda: naver_parser.parse_item_page(html),
+        "stream": lambda: run_stream(raw),
+        "soup": lambda: naver_parser.soup_extract(html),
+    }
+    result = {"fixture": fn, "bytes": len(raw)}
+    for label, func in paths.items():
+        result[f"{label}_us"] = round(time_per_call(func, repeat), 1)
+        result[f"{label}_peak_kb"] = round(peak_memory(func), 1)
+    (name, price), read = run_stream(raw)
+    result["stream_bytes_read"] = read
+    result["name"] = name
+    result["price"] = price
+    result["fast_path_hit"] = None not in naver_parser.fast_extract(html)
+    return result
+
+def record(codes):
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    for code in codes:
+        response = naver_parser.naver_get(naver_parser.ITEM_URL.format(code=code))
+        response.raise_for_status()
+        path = os.path.join(FIXTURE_DIR, f"item_{code}.html")
+        with open(path, "wb") as f:
+            f.write(response.content)
+        print(f"saved {path} ({len(response.content):,} bytes)")
+
+def main():
+    parser = argparse.ArgumentParser(description="네이버 종목 페이지 파서 벤치마크")
+    parser.add_argument("--repeat", type=int, default=50, help="경로별 반복 횟수 (중앙값 사용)")
+    parser.add_argument("--json", action="store_true", help="결과를 JSON 으로 출력")
+    parser.add_argument("--record", nargs="+", metavar="CODE", help="실제 페이지를 받아 fixture 로 저장")
+    args = parser.parse_args()
+
+    if args.record:
+        record(args.record)
+        return
+
+    results = [bench_fixture(fn, raw, args.repeat) for fn, raw in load_fixtures()]
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return
+
+    header = f"{'fixture':<28}{'fast us':>10}{'stream us':>11}{'soup us':>10}{'fast KB':>9}{'stream KB':>11}{'soup KB':>9}{'read/total':>18}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        read = f"{r['stream_bytes_read']:,}/{r['bytes']:,}"
+        print(
+            f"{r['fixture']:<28}{r['fast_us']:>10}{r['stream_us']:>11}{r['soup_us']:>10}"
+            f"{r['fast_peak_kb']:>9}{r['stream_peak_kb']:>11}{r['soup_peak_kb']:>9}{read:>18}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+"""
+오프라인 벤치마크 모음 (저장해 둔 거래소/네이버 응답 + 로컬 재생 서버)
+
+bench/stub_server.py 의 재생 서버를 띄우고 외부 요청을 모두 그쪽으로 돌린 뒤,
+리런 한 번에 거치는 단계를 하나씩 잽니다. 네트워크 없이 돌기 때문에 결과를 커밋 사이에 비교할 수 있습니다.
+
+- resolve : 심볼 검색 (KRX 이름/코드, 업비트, 바이낸스 선물) 과 KRX 인덱스 생성
+- quote   : 단일 시세 / 관심종목 일괄 시세 (공유 캐시가 빈 상태 cold, 채워진 상태 warm)
+- parse   : 네이버 종목 페이지 파싱 (전체 문자열 / 조각 단위 스캔)
+- prep    : 1분봉 버퍼 채우기, 보조지표 붙인 차트용 DataFrame 만들기
+- chart   : 캔들 차트 스펙 생성 (캐시 없음 / 캐시 적중)
+- e2e     : app_2.py 리런 한 번 (streamlit AppTest, 코인/선물/관심종목이 조회된 상태)
+
+사용법:
+    python bench/run.py                                   # 표 형태로 출력
+    python bench/run.py --only quote,chart --repeat 50    # 일부만 실행
+    python bench/run.py --json --out bench/result.json    # JSON 으로 저장
+    python bench/run.py --compare bench/base.json         # 기준 결과보다 threshold 이상 느려지면 종료 코드 1
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+# 저장소 모듈을 불러오기 전에 설정: 스트리밍/로컬 저장 끄기, 임시 디렉터리 사용, 호출 제한은 사실상 해제
+_TMP_DIR = tempfile.mkdtemp(prefix="webcostock-bench-")
+os.environ.update({
+    "WEBCOSTOCK_STREAMING": "0",
+    "WEBCOSTOCK_PERSIST_CANDLES": "0",
+    "WEBCOSTOCK_CACHE_DIR": os.path.join(_TMP_DIR, "cache"),
+    "WEBCOSTOCK_DATA_DIR": os.path.join(_TMP_DIR, "data"),
+    "WEBCOSTOCK_ACCOUNT_DB": os.path.join(_TMP_DIR, "accounts.db"),
+})
+for _host in ("UPBIT", "BINANCE", "NAVER", "KRX"):
+    os.environ[f"WEBCOSTOCK_{_host}_RATE"] = "1e9"
+    os.environ[f"WEBCOSTOCK_{_host}_BURST"] = "1e9"
+
+from stub_server import FIXTURE_DIR, StubServer, redirect  # noqa: E402
+
+# 각 단계에서 쓰는 입력
+KRX_QUERIES = ("삼성전자", "005930", "SK하이닉스", "NAVER", "카카오")
+CRYPTO_QUERIES = ("BTC", "비트코인", "ethereum", "XRP")
+FUTURES_QUERIES = ("BTC", "ETHUSDT", "sol")
+WATCHLIST = "005930, 000660, 035420, upbit:BTC, upbit:ETH, binance:BTC, binance:ETH"
+CHART_SYMBOL = ("upbit", "KRW-BTC")
+CHART_SPECS = ("sma:20", "bb:20,2", "rsi:14", "macd:12,26,9")
+
+# ----------------------
+# 측정
+# ----------------------
+def measure(func, repeat, setup=None):
+    """func() 를 repeat 번 실행한 시간(ms) 목록. setup 은 매번 측정 밖에서 먼저 실행합니다."""
+    samples = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+def summarize(samples):
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+    return {
+        "n": len(samples),
+        "median_ms": round(statistics.median(samples), 4),
+        "p95_ms": round(p95, 4),
+        "min_ms": round(ordered[0], 4),
+        "mean_ms": round(statistics.fmean(samples), 4),
+    }
+
+def _seed_krx_listing():
+    # KRX 목록은 fdr 가 여러 곳을 거쳐 받아오므로, 디스크 캐시 형식으로 미리 넣어 두고 인덱스를 그걸로 만듦
+    with open(os.path.join(FIXTURE_DIR, "krx", "listing.json"), encoding="utf-8") as f:
+        rows = json.load(f)
+    path = os.path.join(os.environ["WEBCOSTOCK_CACHE_DIR"], "krx_listing.json")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"saved_at": time.time(), "rows": rows}, f, ensure_ascii=False)
+    return rows
+
+# ----------------------
+# 단계별 벤치마크 (이름 -> (함수, setup))
+# ----------------------
+def resolve_benchmarks(listing):
+    from symbols import krx_index, upbit_index, binance_futures_index, KrxSymbolIndex
+
+    # 인덱스를 미리 만들어 두고 검색만 잼
+    krx_index.index(), upbit_index.index(), binance_futures_index.index()
+    return {
+        "resolve.krx_index_build": (lambda: KrxSymbolIndex().build(listing), None),
+        "resolve.krx": (lambda: [krx_index.find(q) if not q.isdigit() else krx_index.name_of(q) for q in KRX_QUERIES], None),
+        "resolve.upbit": (lambda: [upbit_index.find(q) for q in CRYPTO_QUERIES], None),
+        "resolve.binance": (lambda: [binance_futures_index.find(q) for q in FUTURES_QUERIES], None),
+    }
+
+def quote_benchmarks():
+    from cache import market_cache
+    from quotes import stock_quote, crypto_quote, futures_quote, get_watchlist_quotes, parse_watchlist
+
+    items = parse_watchlist(WATCHLIST)
+    cases = {
+        "stock": lambda: stock_quote("삼성전자"),
+        "crypto": lambda: crypto_quote("BTC"),
+        "futures": lambda: futures_quote("BTC"),
+        "watchlist": lambda: get_watchlist_quotes(items),
+    }
+    benchmarks = {}
+    for name, func in cases.items():
+        benchmarks[f"quote.{name}.cold"] = (func, market_cache.clear)
+        benchmarks[f"quote.{name}.warm"] = (func, None)
+    return benchmarks
+
+def parse_benchmarks():
+    import naver_parser
+    from naver_parse import load_fixtures, run_stream, _encoding
+
+    pages = [(raw, raw.decode(_encoding(raw), errors="replace")) for fn, raw in load_fixtures() if fn.startswith("item_0")]
+    return {
+        "parse.fast": (lambda: [naver_parser.parse_item_page(html) for _, html in pages], None),
+        "parse.stream": (lambda: [run_stream(raw) for raw, _ in pages], None),
+    }
+
+def prep_benchmarks():
+    from cache import market_cache
+    from candles import candle_buffers, sync_upbit_minutes
+    from indicators import indicator_chart_frame
+
+    venue, symbol = CHART_SYMBOL
+
+    def fresh_buffer():
+        # 빈 버퍼에서 처음 채우는 경우 (새 심볼을 처음 조회한 세션)
+        market_cache.clear()
+        candle_buffers._buffers.pop((venue, symbol, "1m"), None)
+
+    def warm():
+        sync_upbit_minutes(symbol)
+        return indicator_chart_frame(venue, symbol, "1m", CHART_SPECS)
+
+    return {
+        "prep.sync_upbit_minutes.cold": (lambda: sync_upbit_minutes(symbol), fresh_buffer),
+        "prep.indicator_chart_frame": (warm, None),
+    }
+
+def chart_benchmarks():
+    import charts
+    from candles import sync_upbit_minutes
+    from indicators import indicator_chart_frame
+
+    venue, symbol = CHART_SYMBOL
+    sync_upbit_minutes(symbol)
+    df, overlays, panels = indicator_chart_frame(venue, symbol, "1m", CHART_SPECS)
+    build = lambda: charts.candlestick_spec(df, overlays=overlays, panels=panels)
+    return {
+        "chart.candlestick_spec.cold": (build, charts._spec_cache._specs.clear),
+        "chart.candlestick_spec.cached": (build, None),
+    }
+
+def e2e_benchmarks():
+    from streamlit.testing.v1 import AppTest
+
+    app_path = os.path.join(REPO_DIR, "app_2.py")
+
+    def rerun():
+        at = AppTest.from_file(app_path, default_timeout=60)
+        at.session_state.crypto_info = {"symbol": "KRW-BTC", "price": 0}
+        at.session_state.futures_info = {"symbol": "BTCUSDT", "price": 0}
+        at.session_state.watchlist = WATCHLIST
+        at.run()
+        if at.exception:
+            raise RuntimeError(at.exception[0].value)
+
+    return {"e2e.rerun_app_2": (rerun, None)}
+
+GROUPS = {
+    "resolve": resolve_benchmarks,
+    "quote": quote_benchmarks,
+    "parse": parse_benchmarks,
+    "prep": prep_benchmarks,
+    "chart": chart_benchmarks,
+    "e2e": e2e_benchmarks,
+}
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR,
+                              capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def run(groups, repeat, latency_ms=0):
+    listing = _seed_krx_listing()
+    results = {}
+    with StubServer(latency_ms=latency_ms) as server, redirect(server.url):
+        for group in groups:
+            factory = GROUPS[group]
+            benchmarks = factory(listing) if group == "resolve" else factory()
+            # e2e 는 한 번이 수백 ms 라 반복 횟수를 줄임
+            n = max(3, repeat // 10) if group == "e2e" else repeat
+            for name, (func, setup) in benchmarks.items():
+                # 첫 실행은 지연 import / 클라이언트 생성 비용이 섞이므로 버림
+                measure(func, 1, setup)
+                server.reset_counts()
+                results[name] = summarize(measure(func, n, setup))
+                results[name]["requests"] = server.counts
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "commit": _git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "repeat": repeat,
+            "latency_ms": latency_ms,
+        },
+        "results": results,
+    }
+
+def compare(report, base, threshold, min_delta_ms):
+    """
+    기준 결과 대비 중앙값이 threshold 비율 이상, min_delta_ms 이상 늘어난 벤치마크 목록 [(이름, 기준 ms, 현재 ms)]
+    (수 us 짜리 캐시 적중 경로가 잡음으로 회귀 판정되지 않도록 절대 차이도 봄)
+    """
+    regressions = []
+    for name, result in report["results"].items():
+        old = base.get("results", {}).get(name)
+        if not old:
+            continue
+        delta = result["median_ms"] - old["median_ms"]
+        if delta > old["median_ms"] * threshold and delta > min_delta_ms:
+            regressions.append((name, old["median_ms"], result["median_ms"]))
+    return regressions
+
+def print_table(report, base=None):
+    header = f"{'benchmark':<34}{'n':>5}{'median ms':>12}{'p95 ms':>11}{'min ms':>11}{'requests':>10}"
+    if base:
+        header += f"{'base ms':>11}{'change':>9}"
+    print(header)
+    print("-" * len(header))
+    for name, r in report["results"].items():
+        line = (f"{name:<34}{r['n']:>5}{r['median_ms']:>12.3f}{r['p95_ms']:>11.3f}"
+                f"{r['min_ms']:>11.3f}{sum(r['requests'].values()):>10}")
+        old = (base or {}).get("results", {}).get(name)
+        if old:
+            change = (r["median_ms"] / old["median_ms"] - 1) * 100 if old["median_ms"] else 0.0
+            line += f"{old['median_ms']:>11.3f}{change:>+8.1f}%"
+        print(line)
+
+def main():
+    parser = argparse.ArgumentParser(description="오프라인 벤치마크 모음")
+    parser.add_argument("--repeat", type=int, default=30, help="벤치마크별 반복 횟수 (e2e 는 1/10)")
+    parser.add_argument("--only", help="실행할 그룹 (쉼표 구분): " + ",".join(GROUPS))
+    parser.add_argument("--latency-ms", type=float, default=0, help="재생 서버 응답 지연 (ms)")
+    parser.add_argument("--json", action="store_true", help="결과를 JSON 으로 출력")
+    parser.add_argument("--out", help="결과 JSON 을 저장할 경로")
+    parser.add_argument("--compare", metavar="BASE", help="비교할 기준 결과 JSON")
+    parser.add_argument("--threshold", type=float, default=0.2, help="회귀로 볼 중앙값 증가 비율 (기본 0.2 = 20%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=0.5, help="회귀로 볼 최소 중앙값 증가량 (ms)")
+    args = parser.parse_args()
+
+    groups = [g.strip() for g in args.only.split(",")] if args.only else list(GROUPS)
+    unknown = [g for g in groups if g not in GROUPS]
+    if unknown:
+        parser.error(f"알 수 없는 그룹: {', '.join(unknown)}")
+
+    try:
+        report = run(groups, args.repeat, args.latency_ms)
+    finally:
+        shutil.rmtree(_TMP_DIR, ignore_errors=True)
+
+    base = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            base = json.load(f)
+        report["regressions"] = [
+            {"name": name, "base_ms": old, "median_ms": new} for name, old, new in compare(report, base, args.threshold, args.min_delta_ms)
+        ]
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print_table(report, base)
+        for r in report.get("regressions", []):
+            print(f"regression: {r['name']} {r['base_ms']:.3f} -> {r['median_ms']:.3f} ms")
+    return 1 if report.get("regressions") else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
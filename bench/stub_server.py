@@ -0,0 +1,263 @@
+"""
+거래소/네이버 응답 재생 서버 (오프라인 벤치마크용)
+
+bench/fixtures 에 저장해 둔 응답을 로컬 HTTP 서버로 돌려주고, redirect() 안에서는
+requests 로 나가는 업비트/바이낸스/네이버 요청이 모두 이 서버로 향합니다.
+pyupbit / python-binance / 네이버 파서 코드는 그대로 실행되므로 실제 요청 경로(HTTP, JSON 파싱, DataFrame 변환)를 잴 수 있습니다.
+
+- 캔들(업비트 분봉, 바이낸스 klines)은 가장 최근 봉이 현재 분이 되도록 시각을 옮겨서 돌려줍니다.
+  (증분 조회가 실제 운영처럼 빠진 봉 몇 개만 요청하도록)
+- --latency-ms 로 응답마다 지연을 넣어 네트워크 왕복 시간을 흉내낼 수 있습니다.
+
+사용법:
+    python bench/stub_server.py --port 8765            # 서버만 실행 (앱을 직접 띄워 볼 때)
+    python bench/stub_server.py --record               # 실제 API 응답을 받아 fixture 갱신 (네트워크 필요)
+"""
+import os
+import sys
+import json
+import time
+import calendar
+import argparse
+import threading
+from urllib.parse import urlsplit, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from contextlib import contextmanager
+
+import requests
+from requests.adapters import HTTPAdapter
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# 로컬 서버로 돌릴 호스트 (경로 앞에 /호스트 를 붙여서 구분)
+HOSTS = ("finance.naver.com", "api.upbit.com", "fapi.binance.com", "api.binance.com")
+
+# 기록할 대상 (--record)
+RECORD_MARKETS = ("KRW-BTC", "KRW-ETH")
+RECORD_FUTURES = ("BTCUSDT", "ETHUSDT")
+RECORD_ITEMS = ("005930", "000660", "035420")
+RECORD_SEARCH = "삼성전자"
+
+def _read(*parts):
+    path = os.path.join(FIXTURE_DIR, *parts)
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        return f.read()
+
+def _json(*parts):
+    raw = _read(*parts)
+    return None if raw is None else json.loads(raw)
+
+def _utc_ms(text):
+    return calendar.timegm(time.strptime(text, "%Y-%m-%dT%H:%M:%S")) * 1000
+
+def _minute_shift(latest_ms):
+    """가장 최근 봉을 현재 분으로 옮기는 데 필요한 시간(ms, 분 단위)"""
+    now = int(time.time() // 60 * 60 * 1000)
+    return now - latest_ms
+
+def _upbit_candles(market, count):
+    candles = _json("upbit", f"candles_minutes_1_{market}.json")
+    if candles is None:
+        return None
+    # 업비트 응답은 최신 봉이 앞에 옴
+    fmt = "%Y-%m-%dT%H:%M:%S"
+    shift = _minute_shift(_utc_ms(candles[0]["candle_date_time_utc"]))
+    out = []
+    for c in candles[:count]:
+        ts = _utc_ms(c["candle_date_time_utc"]) + shift
+        c = dict(c)
+        c["candle_date_time_utc"] = time.strftime(fmt, time.gmtime(ts / 1000))
+        c["candle_date_time_kst"] = time.strftime(fmt, time.gmtime(ts / 1000 + 9 * 3600))
+        c["timestamp"] = ts
+        out.append(c)
+    return out
+
+def _binance_klines(symbol, limit):
+    klines = _json("binance", f"klines_{symbol}_1m.json")
+    if klines is None:
+        return None
+    shift = _minute_shift(klines[-1][0])
+    return [[k[0] + shift, *k[1:6], k[6] + shift, *k[7:]] for k in klines[-limit:]]
+
+def route(host, path, query):
+    """(상태 코드, content-type, 본문 bytes) 를 반환합니다."""
+    q = {k: v[0] for k, v in query.items()}
+    body = None
+    ctype = "application/json"
+    if host == "finance.naver.com":
+        ctype = "text/html;charset=euc-kr"
+        if path == "/item/main.naver":
+            body = _read("naver", f"item_{q.get('code', '')}.html")
+        elif path == "/search/search.naver":
+            body = _read("naver", "search.html")
+    elif host == "api.upbit.com":
+        if path == "/v1/market/all":
+            body = _read("upbit", "market_all.json")
+        elif path == "/v1/ticker":
+            wanted = set(q.get("markets", "").split(","))
+            tickers = [t for t in _json("upbit", "ticker.json") if t["market"] in wanted]
+            body = json.dumps(tickers).encode() if tickers else None
+        elif path == "/v1/candles/minutes/1":
+            candles = _upbit_candles(q.get("market"), int(q.get("count", 200)))
+            body = None if candles is None else json.dumps(candles).encode()
+    elif host == "fapi.binance.com":
+        if path == "/fapi/v1/exchangeInfo":
+            body = _read("binance", "exchange_info.json")
+        elif path in ("/fapi/v1/ticker/price", "/fapi/v2/ticker/price"):
+            prices = _json("binance", "ticker_price.json")
+            if "symbol" in q:
+                prices = next((p for p in prices if p["symbol"] == q["symbol"]), None)
+            body = None if prices is None else json.dumps(prices).encode()
+        elif path == "/fapi/v1/klines":
+            klines = _binance_klines(q.get("symbol"), int(q.get("limit", 500)))
+            body = None if klines is None else json.dumps(klines).encode()
+    elif host == "api.binance.com" and path == "/api/v3/ping":
+        body = b"{}"
+    if body is None:
+        return 404, "application/json", b'{"error": "fixture not found"}'
+    return 200, ctype, body
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # 헤더와 본문을 따로 쓰므로 Nagle 을 끄지 않으면 keep-alive 요청마다 지연 ACK(~40ms)가 끼어듦
+    disable_nagle_algorithm = True
+    latency = 0.0
+    counts = {}
+    counts_lock = threading.Lock()
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        host, _, path = parts.path.lstrip("/").partition("/")
+        status, ctype, body = route(host, "/" + path, parse_qs(parts.query))
+        with self.counts_lock:
+            self.counts[host] = self.counts.get(host, 0) + 1
+        if self.latency:
+            time.sleep(self.latency)
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        if host == "api.upbit.com":
+            self.send_header("Remaining-Req", "group=market; min=1800; sec=29")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class StubServer:
+    """백그라운드 스레드에서 도는 재생 서버. with 문으로 시작/종료합니다."""
+    def __init__(self, port=0, latency_ms=0):
+        handler = type("Handler", (StubHandler,), {"latency": latency_ms / 1000, "counts": {}})
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), handler)
+        self.httpd.daemon_threads = True
+        self.handler = handler
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    @property
+    def counts(self):
+        """호스트별로 받은 요청 수"""
+        with self.handler.counts_lock:
+            return dict(self.handler.counts)
+
+    def reset_counts(self):
+        with self.handler.counts_lock:
+            self.handler.counts.clear()
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+class RedirectAdapter(HTTPAdapter):
+    """https://호스트/경로 요청을 http://로컬서버/호스트/경로 로 바꿔 보냅니다."""
+    def __init__(self, base_url, **kwargs):
+        super().__init__(pool_connections=4, pool_maxsize=32, **kwargs)
+        self.base_url = base_url
+
+    def send(self, request, **kwargs):
+        parts = urlsplit(request.url)
+        request.url = f"{self.base_url}/{parts.netloc}{parts.path}" + (f"?{parts.query}" if parts.query else "")
+        return super().send(request, **kwargs)
+
+@contextmanager
+def redirect(base_url):
+    """이 안에서 requests 로 HOSTS 에 보내는 요청을 모두 base_url 로 보냅니다. (세션별 adapter 와 무관하게)"""
+    adapter = RedirectAdapter(base_url)
+    prefixes = tuple(f"https://{host}" for host in HOSTS)
+    original = requests.Session.get_adapter
+
+    def get_adapter(session, url):
+        if url.startswith(prefixes):
+            return adapter
+        return original(session, url)
+
+    requests.Session.get_adapter = get_adapter
+    try:
+        yield adapter
+    finally:
+        requests.Session.get_adapter = original
+        adapter.close()
+
+# ----------------------
+# fixture 기록 (실제 API)
+# ----------------------
+def _save(data, *parts):
+    path = os.path.join(FIXTURE_DIR, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    mode = "wb" if isinstance(data, bytes) else "w"
+    with open(path, mode, **({} if mode == "wb" else {"encoding": "utf-8"})) as f:
+        if isinstance(data, bytes):
+            f.write(data)
+        else:
+            json.dump(data, f, ensure_ascii=False)
+    print(f"saved {path}")
+
+def record():
+    get = lambda url, **params: requests.get(url, params=params, timeout=10)
+    markets = get("https://api.upbit.com/v1/market/all", isDetails="false").json()
+    _save(markets, "upbit", "market_all.json")
+    krw = [m["market"] for m in markets if m["market"].startswith("KRW-")]
+    _save(get("https://api.upbit.com/v1/ticker", markets=",".join(krw)).json(), "upbit", "ticker.json")
+    for market in RECORD_MARKETS:
+        _save(get("https://api.upbit.com/v1/candles/minutes/1", market=market, count=200).json(),
+              "upbit", f"candles_minutes_1_{market}.json")
+    _save(get("https://fapi.binance.com/fapi/v1/exchangeInfo").json(), "binance", "exchange_info.json")
+    _save(get("https://fapi.binance.com/fapi/v1/ticker/price").json(), "binance", "ticker_price.json")
+    for symbol in RECORD_FUTURES:
+        _save(get("https://fapi.binance.com/fapi/v1/klines", symbol=symbol, interval="1m", limit=500).json(),
+              "binance", f"klines_{symbol}_1m.json")
+    headers = {"User-Agent": "Mozilla/5.0"}
+    for code in RECORD_ITEMS:
+        _save(requests.get(f"https://finance.naver.com/item/main.naver?code={code}", headers=headers, timeout=10).content,
+              "naver", f"item_{code}.html")
+    _save(requests.get("https://finance.naver.com/search/search.naver", params={"query": RECORD_SEARCH},
+                       headers=headers, timeout=10).content, "naver", "search.html")
+
+def main():
+    parser = argparse.ArgumentParser(description="거래소/네이버 응답 재생 서버")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0, help="응답마다 넣을 지연 (ms)")
+    parser.add_argument("--record", action="store_true", help="실제 API 응답을 받아 fixture 를 갱신")
+    args = parser.parse_args()
+    if args.record:
+        record()
+        return
+    with StubServer(args.port, args.latency_ms) as server:
+        print(f"serving {FIXTURE_DIR} at {server.url} (Ctrl+C 로 종료)")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+import sys
+import time
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+import settings
+from governor import upstream
+from metrics import metrics
+
+# ----------------------
+# 프로세스 전체 공유 시세 캐시 (모든 Streamlit 세션이 함께 사용)
+# ----------------------
+# 종류(kind)별로 신선도(TTL)를 따로 두고, 전체 크기가 MARKET_CACHE_BYTES 를 넘으면 가장 오래 안 쓴 항목부터 버립니다.
+#   quote  : 현재가 (업비트/바이낸스/네이버)
+#   candle : 분봉 증분 조회 응답 (심볼별 공유 캔들 버퍼를 채우는 요청)
+#   chart  : 세션별로 그리는 차트 원본 (네이버 분봉 등)
+# 같은 데이터를 보는 사용자가 늘어도 외부 요청 수는 심볼 수에만 비례합니다.
+_MISSING = object()
+
+def _sizeof(value):
+    """캐시 항목의 대략적인 메모리 크기(바이트)"""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return int(np.sum(value.memory_usage(deep=True)))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_sizeof(k) + _sizeof(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(_sizeof(v) for v in value)
+    return sys.getsizeof(value)
+
+class MarketDataCache:
+    """
+    (kind, key) -> 값 LRU 캐시. 만료된 항목은 조회할 때 버리고 다시 불러옵니다.
+    fetch() 는 같은 항목을 동시에 요청한 세션들이 불러오기 한 번의 결과를 함께 받도록 합니다.
+    캐시된 값은 여러 세션이 함께 읽으므로 호출자가 수정하면 안 됩니다.
+    """
+    def __init__(self, max_bytes=None, ttls=None):
+        self.max_bytes = max_bytes or settings.MARKET_CACHE_BYTES
+        self.ttls = dict(ttls or settings.MARKET_CACHE_TTLS)
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # (kind, key) -> (value, 만료 시각, 크기)
+        self.bytes = 0
+        self._stats = {kind: {"hits": 0, "misses": 0, "evictions": 0} for kind in self.ttls}
+
+    def _lookup(self, kind, key):
+        # 잠금 안에서 호출. 만료된 항목은 지우고 _MISSING 반환
+        entry = self._entries.get((kind, key))
+        if entry is not None and entry[1] > time.monotonic():
+            self._entries.move_to_end((kind, key))
+            return entry[0]
+        if entry is not None:
+            self._remove((kind, key))
+        return _MISSING
+
+    def _count(self, kind, hit):
+        with self._lock:
+            self._stats[kind]["hits" if hit else "misses"] += 1
+
+    def get(self, kind, key, default=None):
+        with self._lock:
+            value = self._lookup(kind, key)
+            self._stats[kind]["hits" if value is not _MISSING else "misses"] += 1
+        return default if value is _MISSING else value
+
+    def put(self, kind, key, value):
+        """값을 저장합니다. None 은 실패한 조회로 보고 저장하지 않습니다."""
+        if value is None:
+            return
+        size = _sizeof(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if (kind, key) in self._entries:
+                self._remove((kind, key))
+            self._entries[(kind, key)] = (value, time.monotonic() + self.ttls[kind], size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                old_key = next(iter(self._entries))
+                self._remove(old_key)
+                self._stats[old_key[0]]["evictions"] += 1
+
+    def _remove(self, entry_key):
+        self.bytes -= self._entries.pop(entry_key)[2]
+
+    def fetch(self, kind, key, loader, *args, **kwargs):
+        """캐시에 있으면 그 값을, 없거나 만료됐으면 loader(*args, **kwargs) 로 불러와 저장한 값을 반환합니다."""
+        with self._lock:
+            value = self._lookup(kind, key)
+        if value is not _MISSING:
+            self._count(kind, True)
+            return value
+        # 실제로 불러온 세션만 miss, 그 결과를 함께 받은 세션은 hit 으로 셈
+        loaded = []
+        value = upstream.coalesce(("cache", kind, key), self._load, kind, key, loader, args, kwargs, loaded)
+        self._count(kind, not loaded)
+        return value
+
+    def _load(self, kind, key, loader, args, kwargs, loaded):
+        loaded.append(True)
+        value = loader(*args, **kwargs)
+        self.put(kind, key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        """종류별 적중/실패/축출 횟수와 적중률, 전체 항목 수와 크기"""
+        with self._lock:
+            kinds = {
+                kind: dict(s, hit_rate=s["hits"] / (s["hits"] + s["misses"]) if s["hits"] + s["misses"] else None)
+                for kind, s in self._stats.items()
+            }
+            return {"kinds": kinds, "entries": len(self._entries), "bytes": self.bytes, "max_bytes": self.max_bytes}
+
+
+market_cache = MarketDataCache()
+metrics.register_source("market_cache", market_cache.stats)
@@ -0,0 +1,217 @@
+import time
+import threading
+
+import numpy as np
+import pandas as pd
+
+import settings
+from cache import market_cache
+from clients import get_futures_klines, upbit_ohlcv_weight
+from governor import upstream
+from lazy import lazy_import
+from store import column_store
+
+pyupbit = lazy_import("pyupbit")
+
+# ----------------------
+# 심볼별 캔들 링버퍼
+# ----------------------
+FIELDS = ("open", "high", "low", "close", "volume")
+
+class CandleBuffer:
+    """
+    고정 크기 numpy 배열에 캔들을 시간순으로 보관합니다. (timestamp 는 봉 시작 시각, epoch ms UTC)
+    저장 공간을 capacity 의 2배로 잡아 두고 뒤로 계속 쓰다가 끝에 닿으면 최근 capacity 개만 새 배열로 옮기므로,
+    항상 연속된 구간이 유지되어 view() 가 복사 없이 슬라이스를 돌려줄 수 있습니다.
+    fields 를 바꾸면 캔들이 아닌 시계열(예: 지표 값)도 같은 방식으로 보관할 수 있습니다.
+    """
+    def __init__(self, capacity=None, fields=FIELDS):
+        self.capacity = capacity or settings.CANDLE_CAPACITY
+        self.fields = tuple(fields)
+        self.lock = threading.Lock()
+        self._alloc(2 * self.capacity)
+        self._start = 0
+        self._end = 0
+        self.persisted_ts = None  # 저장소에 기록한 마지막 봉 시각
+
+    def _alloc(self, size):
+        self._ts = np.zeros(size, dtype=np.int64)
+        self._cols = {f: np.zeros(size, dtype=np.float64) for f in self.fields}
+
+    def __len__(self):
+        return self._end - self._start
+
+    def last_timestamp(self):
+        return int(self._ts[self._end - 1]) if self._end > self._start else None
+
+    def _make_room(self, n):
+        if self._end + n <= len(self._ts):
+            return
+        # 최근 capacity 개만 새 배열로 옮김 (이미 넘겨준 view 는 기존 배열을 그대로 참조)
+        keep = min(len(self), self.capacity - n) if n < self.capacity else 0
+        old_ts, old_cols, old_end = self._ts, self._cols, self._end
+        self._alloc(2 * self.capacity)
+        self._ts[:keep] = old_ts[old_end - keep:old_end]
+        for f in self.fields:
+            self._cols[f][:keep] = old_cols[f][old_end - keep:old_end]
+        self._start, self._end = 0, keep
+
+    def upsert(self, timestamp, open, high, low, close, volume):
+        """봉 하나를 반영합니다. 마지막 봉과 시각이 같으면 제자리 갱신, 더 최신이면 추가, 더 과거면 무시합니다."""
+        self.extend(np.array([timestamp], dtype=np.int64), open=[open], high=[high], low=[low], close=[close], volume=[volume])
+
+    def extend(self, timestamps, **columns):
+        """
+        시간순으로 정렬된 여러 봉을 한 번에 반영합니다.
+        마지막 봉(진행 중인 봉)과 같은 시각은 덮어쓰고, 그 이후 봉만 뒤에 추가합니다.
+        """
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        values = {f: np.asarray(columns[f], dtype=np.float64) for f in self.fields}
+        with self.lock:
+            last = self.last_timestamp()
+            if last is not None:
+                same = np.flatnonzero(timestamps == last)
+                if same.size:
+                    i = same[-1]
+                    for f in self.fields:
+                        self._cols[f][self._end - 1] = values[f][i]
+                newer = timestamps > last
+                timestamps = timestamps[newer]
+                values = {f: v[newer] for f, v in values.items()}
+            n = len(timestamps)
+            if n == 0:
+                return
+            if n > self.capacity:
+                timestamps = timestamps[-self.capacity:]
+                values = {f: v[-self.capacity:] for f, v in values.items()}
+                n = self.capacity
+            self._make_room(n)
+            self._ts[self._end:self._end + n] = timestamps
+            for f in self.fields:
+                self._cols[f][self._end:self._end + n] = values[f]
+            self._end += n
+            if len(self) > self.capacity:
+                self._start = self._end - self.capacity
+
+    def view(self, last=None):
+        """최근 last 개(기본: 전체) 봉의 컬럼별 배열 view 를 반환합니다. (복사 없음)"""
+        with self.lock:
+            start = self._start if last is None else max(self._start, self._end - last)
+            end = self._end
+            view = {"timestamp": self._ts[start:end]}
+            for f in self.fields:
+                view[f] = self._cols[f][start:end]
+            return view
+
+    def to_frame(self, last=None, tz=None):
+        """
+        차트용 DataFrame 을 만듭니다. 가격/거래량 컬럼은 버퍼 배열을 복사 없이 참조합니다.
+        tz 를 지정하면 timestamp 를 해당 시간대의 (타임존 없는) 시각으로 바꿉니다. 예: 'Asia/Seoul'
+        """
+        return view_to_frame(self.view(last), tz)
+
+def view_to_frame(view, tz=None):
+    """view() 형식의 컬럼 배열 dict 를 DataFrame 으로 바꿉니다. (timestamp 외 컬럼은 복사 없이 참조)"""
+    timestamp = pd.to_datetime(view["timestamp"], unit="ms")
+    if tz is not None:
+        timestamp = timestamp.tz_localize("UTC").tz_convert(tz).tz_localize(None)
+    data = {"timestamp": timestamp}
+    data.update({f: v for f, v in view.items() if f != "timestamp"})
+    return pd.DataFrame(data, copy=False)
+
+class CandleBufferRegistry:
+    """(거래소, 심볼, 주기)별 CandleBuffer 를 프로세스 전체에서 공유합니다."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buffers = {}
+
+    def get(self, venue, symbol, interval="1m"):
+        key = (venue, symbol, interval)
+        with self._lock:
+            buffer = self._buffers.get(key)
+            if buffer is None:
+                buffer = self._buffers[key] = CandleBuffer()
+            return buffer
+
+
+candle_buffers = CandleBufferRegistry()
+
+# ----------------------
+# 거래소별 증분 조회 (마지막 봉 이후만 요청)
+# ----------------------
+def _missing_minutes(buffer):
+    last = buffer.last_timestamp()
+    if last is None:
+        return settings.CANDLE_INITIAL_BARS
+    # 마지막(진행 중이던) 봉부터 현재 봉까지
+    return min(buffer.capacity, int((time.time() * 1000 - last) // 60000) + 1)
+
+def _seed_from_store(buffer, venue, symbol):
+    # 버퍼가 비어 있으면 로컬 저장소의 최근 봉으로 먼저 채워서, 이후 요청은 그 뒤 빈 구간만 받음
+    if not settings.PERSIST_CANDLES or len(buffer):
+        return
+    since = int(time.time() * 1000) - buffer.capacity * 60000
+    data = column_store.read(venue, symbol, "1m", start=since)
+    if len(data["timestamp"]):
+        buffer.extend(data["timestamp"], **{f: data[f] for f in FIELDS})
+
+def persist_closed_bars(buffer, venue, symbol):
+    """버퍼에서 마감된 봉(진행 중인 마지막 봉 제외) 중 아직 저장하지 않은 봉만 로컬 저장소에 기록합니다."""
+    if not settings.PERSIST_CANDLES:
+        return
+    if buffer.persisted_ts is None:
+        buffer.persisted_ts = column_store.last_timestamp(venue, symbol, "1m") or 0
+    view = buffer.view()
+    ts = view["timestamp"]
+    if len(ts) < 2:
+        return
+    mask = (ts > buffer.persisted_ts) & (ts < ts[-1])
+    if mask.any():
+        column_store.write(venue, symbol, "1m", ts[mask], **{f: view[f][mask] for f in FIELDS})
+        buffer.persisted_ts = int(ts[mask][-1])
+
+def sync_upbit_minutes(ticker):
+    """
+    업비트 1분봉을 버퍼에 채웁니다. 버퍼가 비어 있으면 CANDLE_INITIAL_BARS 개, 아니면 빠진 봉만 요청합니다.
+    버퍼는 모든 세션이 공유하므로, 최근 candle TTL 안에 다른 세션이 이미 채웠으면 요청하지 않습니다.
+    """
+    buffer = candle_buffers.get("upbit", ticker)
+    market_cache.fetch("candle", ("upbit", ticker, "1m"), _fetch_upbit_minutes, buffer, ticker)
+    return buffer
+
+def _fetch_upbit_minutes(buffer, ticker):
+    _seed_from_store(buffer, "upbit", ticker)
+    count = max(1, _missing_minutes(buffer))
+    df = upstream.call("upbit", ("ohlcv", ticker, "minute1", count), pyupbit.get_ohlcv, ticker,
+                       weight=upbit_ohlcv_weight(count), interval="minute1", count=count)
+    if df is not None and not df.empty:
+        # pyupbit 분봉 시각은 KST 기준 (타임존 없음)
+        timestamps = df.index.tz_localize("Asia/Seoul").tz_convert("UTC").asi8 // 1_000_000
+        buffer.extend(timestamps, **{f: df[f].to_numpy() for f in FIELDS})
+    persist_closed_bars(buffer, "upbit", ticker)
+    return df
+
+def sync_binance_minutes(symbol):
+    """바이낸스 선물 1분봉을 버퍼에 채웁니다. 마지막 봉 시작 시각(startTime) 이후만 요청합니다. (공유 방식은 업비트와 같음)"""
+    buffer = candle_buffers.get("binance", symbol)
+    market_cache.fetch("candle", ("binance", symbol, "1m"), _fetch_binance_minutes, buffer, symbol)
+    return buffer
+
+def _fetch_binance_minutes(buffer, symbol):
+    _seed_from_store(buffer, "binance", symbol)
+    last = buffer.last_timestamp()
+    if last is None:
+        klines = get_futures_klines(symbol, "1m", settings.CANDLE_INITIAL_BARS)
+    else:
+        klines = get_futures_klines(symbol, "1m", min(1500, _missing_minutes(buffer)), start_time=last)
+    if klines:
+        # klines: [ open time, open, high, low, close, volume, close time, ... ]
+        rows = np.array([k[:6] for k in klines], dtype=np.float64)
+        buffer.extend(rows[:, 0].astype(np.int64), **{f: rows[:, i + 1] for i, f in enumerate(FIELDS)})
+    persist_closed_bars(buffer, "binance", symbol)
+    return klines
+
+def apply_live_candle(buffer, candle):
+    """WebSocket 으로 받은 진행 중 캔들(streaming.TickStore.candle)을 버퍼에 반영합니다."""
+    if candle is not None:
+        buffer.upsert(candle["timestamp"], *(candle[f] for f in FIELDS))
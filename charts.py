@@ -0,0 +1,201 @@
+import math
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+import settings
+from lazy import lazy_import
+from metrics import metrics
+
+# 차트 라이브러리는 차트 스펙을 처음 만들 때 불러옴 (헤드리스 실행에는 필요 없음)
+alt = lazy_import("altair")
+pa = lazy_import("pyarrow")
+
+# ----------------------
+# 캔들 차트 공용 빌더 (데이터 해시 기준 캐시 + OHLC 다운샘플링)
+# ----------------------
+OHLCV = ("open", "high", "low", "close", "volume")
+DATASET_NAME = "candles"
+UP_COLOR = '#FF0000'
+DOWN_COLOR = '#0066FF'
+CHART_WIDTH = 900
+
+def downsample_ohlc(df, max_points):
+    """
+    봉 개수가 max_points 를 넘으면 연속된 봉을 묶어 하나의 봉으로 합칩니다.
+    시가=첫 봉 시가, 고가=최고, 저가=최저, 종가=마지막 봉 종가, 거래량=합계 로 고가/저가가 보존됩니다.
+    그 밖의 컬럼(보조지표)은 묶음의 마지막 봉 값을 씁니다.
+    """
+    n = len(df)
+    if max_points is None or n <= max_points:
+        return df
+    bucket = math.ceil(n / max_points)
+    starts = np.arange(0, n, bucket)
+    ends = np.append(starts[1:], n) - 1
+    out = pd.DataFrame({
+        'timestamp': df['timestamp'].to_numpy()[starts],
+        'open': df['open'].to_numpy()[starts],
+        'high': np.maximum.reduceat(df['high'].to_numpy(), starts),
+        'low': np.minimum.reduceat(df['low'].to_numpy(), starts),
+        'close': df['close'].to_numpy()[ends],
+        'volume': np.add.reduceat(df['volume'].to_numpy(), starts),
+    })
+    for col in df.columns:
+        if col not in out.columns:
+            out[col] = df[col].to_numpy()[ends]
+    return out
+
+def _data_key(df, max_points, overlays, panels):
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr((max_points, overlays, panels)).encode())
+    h.update(df['timestamp'].to_numpy(dtype='datetime64[ns]').view(np.int64).tobytes())
+    for col in (*OHLCV, *overlays, *(c for panel in panels for c in panel)):
+        h.update(np.ascontiguousarray(df[col].to_numpy(dtype=np.float64)).tobytes())
+    return h.hexdigest()
+
+def _to_arrow_bytes(df):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+def _build_spec(df, overlays=(), panels=()):
+    indicator_cols = [*overlays, *(c for panel in panels for c in panel)]
+    df = df[['timestamp', *OHLCV, *dict.fromkeys(indicator_cols)]].copy()
+    df['color'] = np.where(df['close'].to_numpy() > df['open'].to_numpy(), 'up', 'down')
+
+    # 가격 위 보조지표(이동평균, 밴드 등)도 보이도록 y 범위에 포함
+    min_price = np.nanmin([df['low'].min(), *(df[c].min() for c in overlays)])
+    max_price = np.nanmax([df['high'].max(), *(df[c].max() for c in overlays)])
+    margin = (max_price - min_price) * 0.05
+    # 봉이 많아지면 막대 폭을 줄여 겹치지 않게 함
+    bar_size = max(1, min(20, int(CHART_WIDTH / max(len(df), 1) * 0.7)))
+
+    data = alt.NamedData(name=DATASET_NAME)
+    color = alt.condition(
+        "datum.color == 'up'",
+        alt.value(UP_COLOR),
+        alt.value(DOWN_COLOR)
+    )
+
+    stems = alt.Chart(data).mark_rule().encode(
+        x=alt.X('timestamp:T', title='시간', axis=alt.Axis(labelAngle=-45)),
+        y=alt.Y('low:Q', title='가격',
+                scale=alt.Scale(domain=[min_price - margin, max_price + margin])),
+        y2='high:Q',
+        color=color
+    )
+
+    candles = alt.Chart(data).mark_bar(size=bar_size).encode(
+        x='timestamp:T',
+        y=alt.Y('open:Q', scale=alt.Scale(domain=[min_price - margin, max_price + margin])),
+        y2='close:Q',
+        color=color
+    )
+
+    volume = alt.Chart(data).mark_bar(size=bar_size).encode(
+        x='timestamp:T',
+        y=alt.Y('volume:Q', title='거래량'),
+        color=color
+    ).properties(
+        width=CHART_WIDTH,
+        height=120
+    )
+
+    price_layers = [stems, candles]
+    if overlays:
+        price_layers.append(alt.Chart(data).transform_fold(list(overlays), as_=['지표', '값']).mark_line(strokeWidth=1.5).encode(
+            x='timestamp:T',
+            y=alt.Y('값:Q', scale=alt.Scale(domain=[min_price - margin, max_price + margin])),
+            color=alt.Color('지표:N', legend=alt.Legend(orient='top', title=None))
+        ))
+
+    # RSI / MACD / ATR 처럼 가격과 단위가 다른 지표는 거래량 아래 별도 패널로
+    panel_charts = [
+        alt.Chart(data).transform_fold(list(panel), as_=['지표', '값']).mark_line(strokeWidth=1.5).encode(
+            x='timestamp:T',
+            y=alt.Y('값:Q', title=panel[0].upper()),
+            color=alt.Color('지표:N', legend=alt.Legend(orient='right', title=None))
+        ).properties(width=CHART_WIDTH, height=100)
+        for panel in panels
+    ]
+
+    zoom = alt.selection_interval(bind='scales')
+
+    chart = alt.vconcat(
+        alt.layer(*price_layers).properties(width=CHART_WIDTH, height=420).add_params(zoom),
+        volume,
+        *panel_charts
+    ).resolve_scale(
+        color='independent'
+    ).configure_axis(
+        labelFontSize=13,
+        titleFontSize=15
+    ).configure_view(
+        strokeWidth=0
+    )
+
+    spec = chart.to_dict()
+    # 데이터는 Arrow 바이트로 한 번만 직렬화해 두고, 렌더링할 때 그대로 전달
+    spec['datasets'] = {DATASET_NAME: _to_arrow_bytes(df)}
+    return spec
+
+class ChartSpecCache:
+    """데이터 해시 -> Vega-Lite 스펙 LRU 캐시. 모든 세션이 함께 사용합니다."""
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._specs = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            spec = self._specs.get(key)
+            if spec is not None:
+                self._specs.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+            return spec
+
+    def put(self, key, spec):
+        with self._lock:
+            self._specs[key] = spec
+            self._specs.move_to_end(key)
+            while len(self._specs) > self.max_entries:
+                self._specs.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else None,
+                    "entries": len(self._specs), "max_entries": self.max_entries}
+
+
+_spec_cache = ChartSpecCache(settings.CHART_CACHE_SIZE)
+metrics.register_source("chart_cache", _spec_cache.stats)
+
+def candlestick_spec(df, max_points=None, overlays=(), panels=()):
+    """
+    timestamp/open/high/low/close/volume 컬럼을 가진 DataFrame 으로 캔들+거래량 차트 스펙을 만듭니다.
+    overlays: 가격 차트 위에 선으로 그릴 컬럼 이름, panels: 별도 패널로 그릴 컬럼 이름 묶음 목록
+    (indicators.indicator_chart_frame 이 DataFrame 과 함께 만들어 줍니다)
+    같은 데이터면 캐시된 스펙을 재사용하여 Altair 스펙 생성과 데이터 직렬화를 건너뜁니다.
+    st.vega_lite_chart(candlestick_spec(df), use_container_width=True) 로 표시합니다.
+    """
+    max_points = max_points or settings.CHART_MAX_POINTS
+    overlays, panels = tuple(overlays), tuple(tuple(p) for p in panels)
+    key = _data_key(df, max_points, overlays, panels)
+    spec = _spec_cache.get(key)
+    if spec is None:
+        # 캐시에 없을 때만 Altair 스펙 생성 + Arrow 직렬화 (차트 그리기에서 가장 무거운 단계)
+        with metrics.span("render", "altair_spec"):
+            spec = _build_spec(downsample_ohlc(df, max_points), overlays, panels)
+        _spec_cache.put(key, spec)
+    # Streamlit 이 렌더링하면서 최상위 'datasets' 키를 지우므로 얕은 복사본을 넘김
+    return dict(spec)
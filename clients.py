@@ -0,0 +1,97 @@
+import math
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+import settings
+from governor import upstream
+from lazy import lazy_import
+
+# python-binance 는 import 가 무거우므로 클라이언트를 처음 만들 때 불러옴
+binance_client = lazy_import("binance.client")
+
+# ----------------------
+# 바이낸스 공용 클라이언트 (프로세스 전체에서 1개만 생성)
+# ----------------------
+_binance_client = None
+_binance_lock = threading.Lock()
+
+def get_binance_client():
+    """
+    공용 API용 바이낸스 클라이언트를 반환합니다. (API Key 없이 시세 조회 가능)
+    Client() 생성 시 ping 으로 DNS/TLS 연결을 맺으므로 한 번만 만들어 재사용하고,
+    내부 requests 세션에 커넥션 풀을 붙여 여러 스레드가 keep-alive 연결을 함께 씁니다.
+    """
+    global _binance_client
+    if _binance_client is None:
+        with _binance_lock:
+            if _binance_client is None:
+                client = binance_client.Client()
+                adapter = HTTPAdapter(
+                    pool_connections=settings.HTTP_POOL_CONNECTIONS,
+                    pool_maxsize=settings.HTTP_POOL_MAXSIZE,
+                )
+                client.session.mount("https://", adapter)
+                _binance_client = client
+    return _binance_client
+
+def kline_weight(limit):
+    """바이낸스 선물 klines 요청 weight (limit 구간별)"""
+    if limit < 100:
+        return 1
+    if limit < 500:
+        return 2
+    return 5 if limit <= 1000 else 10
+
+def upbit_ohlcv_weight(count):
+    """업비트 캔들 요청 수: pyupbit.get_ohlcv 는 count 를 200 개씩 나눠 요청하므로 ceil(count / 200) 번 호출"""
+    return max(1, math.ceil(count / 200))
+
+def get_futures_klines(symbol, interval="1m", limit=30, start_time=None):
+    """바이낸스 선물 캔들(klines) 원본 목록을 조회합니다. start_time(epoch ms)을 주면 그 시각 이후 봉만 받습니다."""
+    params = {"symbol": symbol, "interval": interval, "limit": limit}
+    if start_time is not None:
+        params["startTime"] = start_time
+    return upstream.call("binance", ("klines", symbol, interval, limit, start_time),
+                         get_binance_client().futures_klines, weight=kline_weight(limit), **params)
+
+# ----------------------
+# 네이버 금융 공용 HTTP 세션 (keep-alive, 압축)
+# ----------------------
+NAVER_HEADERS = {
+    "User-Agent": "Mozilla/5.0",
+    "Accept-Encoding": "gzip, deflate",
+    "Connection": "keep-alive",
+}
+
+_naver_session = None
+_naver_lock = threading.Lock()
+
+def get_naver_session():
+    """
+    finance.naver.com 스크래핑용 공용 세션을 반환합니다.
+    urllib3 커넥션 풀은 스레드 안전하므로 Streamlit 세션/워커 스레드가 함께 사용해도 되며,
+    한 번 맺은 TCP/TLS 연결을 재사용하여 조회마다 발생하던 핸드셰이크 비용을 없앱니다.
+    """
+    global _naver_session
+    if _naver_session is None:
+        with _naver_lock:
+            if _naver_session is None:
+                session = requests.Session()
+                session.headers.update(NAVER_HEADERS)
+                adapter = HTTPAdapter(
+                    pool_connections=settings.HTTP_POOL_CONNECTIONS,
+                    pool_maxsize=settings.HTTP_POOL_MAXSIZE,
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _naver_session = session
+    return _naver_session
+
+def naver_get(url, **kwargs):
+    """
+    공용 세션으로 네이버 금융 페이지를 GET 합니다. timeout 을 지정하지 않으면 설정값을 사용합니다.
+    응답 객체(스트리밍 포함)는 호출자마다 따로 읽어야 하므로 호출 제한만 적용하고, 요청 합치기는 상위 함수에서 합니다.
+    """
+    kwargs.setdefault("timeout", (settings.NAVER_CONNECT_TIMEOUT, settings.NAVER_READ_TIMEOUT))
+    return upstream.call("naver", None, get_naver_session().get, url, **kwargs)
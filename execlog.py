@@ -0,0 +1,77 @@
+import json
+import math
+import time
+import logging
+import threading
+from collections import deque
+from itertools import islice
+from logging.handlers import RotatingFileHandler
+
+import pandas as pd
+
+import settings
+
+# ----------------------
+# 실행 로그 (세션별 고정 크기 링 버퍼 + 선택적 회전 파일 기록)
+# ----------------------
+# 기록 하나: {"time", "event", "symbol", "qty", "price", "message"}
+# event 예: deposit / quote / chart / buy / sell / rejected / order / cancel / strategy / futures
+# 화면에는 한 페이지 분량만 표 하나로 그리므로, 세션이 오래 열려 있어도 리런 비용이 늘지 않습니다.
+COLUMNS = ("time", "event", "symbol", "qty", "price", "message")
+COLUMN_LABELS = {"time": "시각", "event": "이벤트", "symbol": "종목", "qty": "수량", "price": "가격", "message": "내용"}
+
+_sink = None
+_sink_lock = threading.Lock()
+
+def _file_sink():
+    """WEBCOSTOCK_EXEC_LOG_FILE 이 설정되어 있으면 모든 세션이 함께 쓰는 회전 파일 로거를 반환합니다. (JSON lines)"""
+    global _sink
+    if not settings.EXEC_LOG_FILE:
+        return None
+    with _sink_lock:
+        if _sink is None:
+            handler = RotatingFileHandler(settings.EXEC_LOG_FILE, maxBytes=settings.EXEC_LOG_FILE_BYTES,
+                                          backupCount=settings.EXEC_LOG_FILE_BACKUPS, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            _sink = logging.getLogger("webcostock.execlog")
+            _sink.setLevel(logging.INFO)
+            _sink.propagate = False
+            _sink.addHandler(handler)
+        return _sink
+
+class ExecutionLog:
+    """최근 capacity 건만 보관하는 실행 로그. 넘치면 가장 오래된 기록부터 버립니다."""
+    def __init__(self, capacity=None, session=None):
+        self.records = deque(maxlen=capacity or settings.EXEC_LOG_SIZE)
+        self.session = session
+        self.total = 0
+        self._lock = threading.Lock()
+
+    def add(self, event, message, symbol=None, qty=None, price=None):
+        record = {
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "event": event,
+            "symbol": symbol,
+            "qty": qty,
+            "price": price,
+            "message": message,
+        }
+        with self._lock:
+            self.records.append(record)
+            self.total += 1
+        sink = _file_sink()
+        if sink is not None:
+            sink.info(json.dumps(dict(record, session=self.session), ensure_ascii=False, default=str))
+        return record
+
+    def __len__(self):
+        return len(self.records)
+
+    def pages(self, page_size):
+        return max(1, math.ceil(len(self.records) / page_size))
+
+    def page(self, number, page_size):
+        """number 번째 페이지(1부터, 최신 기록이 1페이지)를 DataFrame 으로 반환합니다."""
+        with self._lock:
+            rows = list(islice(reversed(self.records), (number - 1) * page_size, number * page_size))
+        return pd.DataFrame(rows, columns=COLUMNS).rename(columns=COLUMN_LABELS)
@@ -0,0 +1,134 @@
+import time
+import threading
+
+import settings
+from metrics import metrics
+
+# ----------------------
+# 외부 API 호출 관리 (호스트별 토큰 버킷 + 동일 요청 합치기)
+# ----------------------
+# 업비트/바이낸스/네이버/KRX 로 나가는 모든 요청은 upstream.call() 을 거칩니다.
+#   1) 같은 key 의 요청이 이미 진행 중이면 새로 보내지 않고 그 응답을 함께 받습니다. (single-flight)
+#   2) 실제로 보내는 요청만 호스트별 토큰 버킷에서 weight 만큼 토큰을 받은 뒤 보냅니다.
+# 여러 세션이 같은 심볼을 동시에 조회하거나 리런이 몰려도 거래소 제한(429, IP 차단)을 넘지 않습니다.
+# 실제로 보낸 요청은 ("upstream", "호스트.함수") 구간으로 시간을 기록합니다. (토큰 대기 시간 제외)
+
+class TokenBucket:
+    """초당 rate 개씩 채워지고 최대 burst 개까지 쌓이는 토큰 버킷. 토큰이 모자라면 채워질 때까지 기다립니다."""
+    def __init__(self, rate, burst):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.waited = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, weight=1):
+        """
+        weight 만큼 토큰을 예약하고, 모자란 만큼 기다린 시간(초)을 반환합니다.
+        weight 가 burst 보다 커도 줄이지 않고 전부 빌려 쓰므로, 여러 번 요청하는 호출도 실제 요청 수만큼 기다립니다.
+        """
+        weight = float(weight)
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            # 먼저 예약한 순서대로 기다리도록 잔고를 음수까지 빌려 쓰고, 빌린 만큼 잠듦
+            self.tokens -= weight
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            self.waited += wait
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+class _Flight:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+class SingleFlight:
+    """같은 key 로 동시에 들어온 호출은 먼저 온 하나만 실행하고 나머지는 그 결과(또는 예외)를 함께 받습니다."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+        self.shared = 0
+
+    def do(self, key, func, *args, **kwargs):
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                flight.waiters += 1
+                self.shared += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+        try:
+            flight.result = func(*args, **kwargs)
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            # 끝난 요청은 바로 지움 (결과를 캐시하지 않음 - 이후 호출은 새로 요청)
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+class UpstreamGovernor:
+    """호스트별 토큰 버킷과 single-flight 를 묶은 호출 관리자"""
+    def __init__(self, limits):
+        self._buckets = {host: TokenBucket(rate, burst) for host, (rate, burst) in limits.items()}
+        self._flight = SingleFlight()
+        self._lock = threading.Lock()
+        self.calls = {}
+
+    def bucket(self, host):
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            raise ValueError(f"등록되지 않은 호스트입니다: {host}")
+        return bucket
+
+    def call(self, host, key, func, *args, weight=1, **kwargs):
+        """
+        func(*args, **kwargs) 를 host 의 호출 제한 안에서 실행합니다.
+        key 가 같은 호출이 진행 중이면 그 결과를 함께 받고, key=None 이면 합치지 않습니다. (스트리밍 응답 등)
+        """
+        bucket = self.bucket(host)
+        span_name = f"{host}.{getattr(func, '__name__', type(func).__name__)}"
+
+        def send():
+            bucket.acquire(weight)
+            with self._lock:
+                self.calls[host] = self.calls.get(host, 0) + 1
+            with metrics.span("upstream", span_name):
+                return func(*args, **kwargs)
+
+        if key is None:
+            return send()
+        return self._flight.do((host, key), send)
+
+    def coalesce(self, key, func, *args, **kwargs):
+        """호출 제한 없이 동일 요청 합치기만 적용합니다. (내부에서 이미 call() 을 거치는 상위 함수용)"""
+        return self._flight.do(key, func, *args, **kwargs)
+
+    def stats(self):
+        """호스트별 실제 요청 수 / 토큰 대기 누적 시간(초)과 합쳐진 요청 수"""
+        with self._lock:
+            calls = dict(self.calls)
+        return {
+            "hosts": {host: {"calls": calls.get(host, 0), "waited": b.waited} for host, b in self._buckets.items()},
+            "coalesced": self._flight.shared,
+        }
+
+
+upstream = UpstreamGovernor(settings.UPSTREAM_LIMITS)
+metrics.register_source("upstream", upstream.stats)
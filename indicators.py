@@ -0,0 +1,461 @@
+import math
+import threading
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from candles import FIELDS, CandleBuffer, candle_buffers, view_to_frame
+from resample import aggregators, timeframe_buffer
+
+# ----------------------
+# 벡터 연산 (전체 구간 한 번에 계산)
+# ----------------------
+DAY_MS = 24 * 60 * 60_000
+
+def sma(values, period):
+    """단순 이동평균. 앞쪽 period-1 개는 nan 입니다."""
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(len(values), np.nan)
+    if period <= len(values):
+        csum = np.cumsum(np.insert(values, 0, 0.0))
+        out[period - 1:] = (csum[period:] - csum[:-period]) / period
+    return out
+
+def ema(values, alpha):
+    """지수 이동평균 (첫 값에서 시작하는 재귀식 e = e + alpha * (x - e)). 앞쪽을 가리지 않은 원본 값입니다."""
+    if len(values) == 0:
+        return np.empty(0)
+    return pd.Series(values, dtype=np.float64).ewm(alpha=alpha, adjust=False).mean().to_numpy()
+
+def _mask(values, count):
+    # 앞쪽 count 개를 nan 으로 (계산에 필요한 봉 수가 모자란 구간)
+    values = np.array(values, dtype=np.float64)
+    values[:count] = np.nan
+    return values
+
+def _rsi(avg_gain, avg_loss):
+    if avg_loss == 0:
+        return 100.0
+    return 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+
+# ----------------------
+# 지표 클래스: compute() 는 벡터 연산, update()/peek() 는 봉 하나당 O(1) 증분 계산
+# ----------------------
+class Indicator:
+    """
+    compute(data): 컬럼 배열 dict(timestamp/open/high/low/close/volume)로 전체 구간 값을 계산합니다. (상태 변경 없음)
+    seed(data): 마감된 봉 전체로 증분 계산 상태를 맞춥니다.
+    update(bar): 마감된 봉 하나를 반영하고 값을 반환합니다.
+    peek(bar): 진행 중인 봉의 값을 상태를 바꾸지 않고 계산합니다.
+    overlay 가 True 면 가격 차트 위에, 아니면 별도 패널에 그립니다.
+    """
+    overlay = False
+    outputs = ()
+
+    def update(self, bar):
+        state, values = self._step(bar)
+        self._state = state
+        return values
+
+    def peek(self, bar):
+        return self._step(bar)[1]
+
+class SMA(Indicator):
+    overlay = True
+
+    def __init__(self, period=20):
+        self.period = period
+        self.outputs = (f"sma{period}",)
+        self.seed({"close": np.empty(0)})
+
+    def compute(self, data):
+        return {self.outputs[0]: sma(data["close"], self.period)}
+
+    def seed(self, data):
+        window = deque(np.asarray(data["close"][-self.period:], dtype=np.float64), maxlen=self.period)
+        self._window = window
+        self._state = (float(sum(window)), None)
+
+    def _step(self, bar):
+        x = bar["close"]
+        full = len(self._window) == self.period
+        total = self._state[0] + x - (self._window[0] if full else 0.0)
+        n = self.period if full else len(self._window) + 1
+        return (total, x), {self.outputs[0]: total / self.period if n == self.period else np.nan}
+
+    def update(self, bar):
+        values = super().update(bar)
+        self._window.append(self._state[1])
+        return values
+
+class EMA(Indicator):
+    overlay = True
+
+    def __init__(self, period=20):
+        self.period = period
+        self.alpha = 2.0 / (period + 1)
+        self.outputs = (f"ema{period}",)
+        self._state = (None, 0)
+
+    def compute(self, data):
+        return {self.outputs[0]: _mask(ema(data["close"], self.alpha), self.period - 1)}
+
+    def seed(self, data):
+        close = data["close"]
+        self._state = (float(ema(close, self.alpha)[-1]), len(close)) if len(close) else (None, 0)
+
+    def _step(self, bar):
+        value, count = self._state
+        x = bar["close"]
+        value = x if value is None else value + self.alpha * (x - value)
+        count += 1
+        return (value, count), {self.outputs[0]: value if count >= self.period else np.nan}
+
+class RSI(Indicator):
+    """와일더 방식 RSI (평균 상승/하락폭을 alpha=1/period 지수 평균으로)"""
+    def __init__(self, period=14):
+        self.period = period
+        self.outputs = (f"rsi{period}",)
+        self._state = (None, None, None, 0)
+
+    def _averages(self, close):
+        diff = np.diff(np.asarray(close, dtype=np.float64))
+        alpha = 1.0 / self.period
+        return ema(np.maximum(diff, 0.0), alpha), ema(np.maximum(-diff, 0.0), alpha)
+
+    def compute(self, data):
+        gain, loss = self._averages(data["close"])
+        safe = np.where(loss == 0, 1.0, loss)
+        rsi = np.where(loss == 0, 100.0, 100.0 - 100.0 / (1.0 + gain / safe))
+        return {self.outputs[0]: np.r_[np.nan, _mask(rsi, self.period - 1)][:len(data["close"])]}
+
+    def seed(self, data):
+        close = data["close"]
+        if len(close) < 2:
+            self._state = (float(close[-1]) if len(close) else None, None, None, 0)
+            return
+        gain, loss = self._averages(close)
+        self._state = (float(close[-1]), float(gain[-1]), float(loss[-1]), len(close) - 1)
+
+    def _step(self, bar):
+        prev, gain, loss, count = self._state
+        x = bar["close"]
+        if prev is None:
+            return (x, None, None, 0), {self.outputs[0]: np.nan}
+        diff = x - prev
+        up, down = max(diff, 0.0), max(-diff, 0.0)
+        gain = up if gain is None else gain + (up - gain) / self.period
+        loss = down if loss is None else loss + (down - loss) / self.period
+        count += 1
+        return (x, gain, loss, count), {self.outputs[0]: _rsi(gain, loss) if count >= self.period else np.nan}
+
+class MACD(Indicator):
+    def __init__(self, fast=12, slow=26, signal=9):
+        self.fast, self.slow, self.signal = fast, slow, signal
+        self.alphas = (2.0 / (fast + 1), 2.0 / (slow + 1), 2.0 / (signal + 1))
+        self.outputs = ("macd", "macd_signal", "macd_hist")
+        self._state = (None, None, None, 0)
+
+    def _lines(self, close):
+        macd = ema(close, self.alphas[0]) - ema(close, self.alphas[1])
+        return macd, ema(macd, self.alphas[2])
+
+    def compute(self, data):
+        macd, signal = self._lines(data["close"])
+        ready = self.slow + self.signal - 2
+        return {
+            "macd": _mask(macd, self.slow - 1),
+            "macd_signal": _mask(signal, ready),
+            "macd_hist": _mask(macd - signal, ready),
+        }
+
+    def seed(self, data):
+        close = data["close"]
+        if not len(close):
+            self._state = (None, None, None, 0)
+            return
+        fast, slow = ema(close, self.alphas[0])[-1], ema(close, self.alphas[1])[-1]
+        self._state = (float(fast), float(slow), float(self._lines(close)[1][-1]), len(close))
+
+    def _step(self, bar):
+        fast, slow, signal, count = self._state
+        x = bar["close"]
+        a_fast, a_slow, a_signal = self.alphas
+        fast = x if fast is None else fast + a_fast * (x - fast)
+        slow = x if slow is None else slow + a_slow * (x - slow)
+        macd = fast - slow
+        signal = macd if signal is None else signal + a_signal * (macd - signal)
+        count += 1
+        ready = count >= self.slow + self.signal - 1
+        return (fast, slow, signal, count), {
+            "macd": macd if count >= self.slow else np.nan,
+            "macd_signal": signal if ready else np.nan,
+            "macd_hist": macd - signal if ready else np.nan,
+        }
+
+class Bollinger(Indicator):
+    """볼린저 밴드 (중심선 = period 이동평균, 밴드 = 중심선 ± k * 표준편차)"""
+    overlay = True
+
+    def __init__(self, period=20, k=2.0):
+        self.period = period
+        self.k = k
+        self.outputs = ("bb_mid", "bb_upper", "bb_lower")
+        self.seed({"close": np.empty(0)})
+
+    def compute(self, data):
+        close = np.asarray(data["close"], dtype=np.float64)
+        mid, std = np.full(len(close), np.nan), np.full(len(close), np.nan)
+        if self.period <= len(close):
+            windows = np.lib.stride_tricks.sliding_window_view(close, self.period)
+            mid[self.period - 1:] = windows.mean(axis=1)
+            std[self.period - 1:] = windows.std(axis=1)
+        return {"bb_mid": mid, "bb_upper": mid + self.k * std, "bb_lower": mid - self.k * std}
+
+    def seed(self, data):
+        window = np.asarray(data["close"][-self.period:], dtype=np.float64)
+        self._window = deque(window, maxlen=self.period)
+        mean = float(window.mean()) if len(window) else 0.0
+        self._state = (mean, float(((window - mean) ** 2).sum()), None)
+
+    def _step(self, bar):
+        # 창 안의 평균과 편차 제곱합(M2)을 웰포드 방식으로 갱신 (큰 가격에서도 제곱합 상쇄 오차가 없음)
+        mean, m2, _ = self._state
+        x = bar["close"]
+        if len(self._window) == self.period:
+            y = self._window[0]
+            new_mean = mean + (x - y) / self.period
+            m2 += (x - y) * (x - new_mean + y - mean)
+            n = self.period
+        else:
+            n = len(self._window) + 1
+            new_mean = mean + (x - mean) / n
+            m2 += (x - mean) * (x - new_mean)
+        if n < self.period:
+            values = dict.fromkeys(self.outputs, np.nan)
+        else:
+            std = math.sqrt(max(m2, 0.0) / n)
+            values = {"bb_mid": new_mean, "bb_upper": new_mean + self.k * std, "bb_lower": new_mean - self.k * std}
+        return (new_mean, m2, x), values
+
+    def update(self, bar):
+        values = super().update(bar)
+        self._window.append(self._state[2])
+        return values
+
+class VWAP(Indicator):
+    """거래량 가중 평균가. session_ms 단위(기본: UTC 하루 = 업비트 일봉 기준)로 누적을 새로 시작합니다."""
+    overlay = True
+
+    def __init__(self, session_ms=DAY_MS):
+        self.session_ms = session_ms
+        self.outputs = ("vwap",)
+        self._state = (None, 0.0, 0.0)
+
+    @staticmethod
+    def _typical(data):
+        return (np.asarray(data["high"]) + np.asarray(data["low"]) + np.asarray(data["close"])) / 3.0
+
+    def compute(self, data):
+        ts = np.asarray(data["timestamp"])
+        if not len(ts):
+            return {"vwap": np.empty(0)}
+        volume = np.asarray(data["volume"], dtype=np.float64)
+        pv = self._typical(data) * volume
+        session = ts // self.session_ms
+        first = np.maximum.accumulate(np.where(np.r_[True, session[1:] != session[:-1]], np.arange(len(ts)), 0))
+        cum_pv, cum_v = np.cumsum(pv), np.cumsum(volume)
+        # 세션 시작 직전까지의 누적값을 빼서 세션별 누적으로 만듦
+        session_pv = cum_pv - (cum_pv - pv)[first]
+        session_v = cum_v - (cum_v - volume)[first]
+        return {"vwap": np.where(session_v > 0, session_pv / np.where(session_v > 0, session_v, 1.0), np.nan)}
+
+    def seed(self, data):
+        ts = np.asarray(data["timestamp"])
+        if not len(ts):
+            self._state = (None, 0.0, 0.0)
+            return
+        session = int(ts[-1] // self.session_ms)
+        mask = ts // self.session_ms == session
+        volume = np.asarray(data["volume"], dtype=np.float64)[mask]
+        pv = self._typical({k: np.asarray(data[k])[mask] for k in ("high", "low", "close")}) * volume
+        self._state = (session, float(pv.sum()), float(volume.sum()))
+
+    def _step(self, bar):
+        session, pv, volume = self._state
+        current = int(bar["timestamp"] // self.session_ms)
+        if current != session:
+            session, pv, volume = current, 0.0, 0.0
+        pv += (bar["high"] + bar["low"] + bar["close"]) / 3.0 * bar["volume"]
+        volume += bar["volume"]
+        return (session, pv, volume), {"vwap": pv / volume if volume > 0 else np.nan}
+
+class ATR(Indicator):
+    """와일더 방식 ATR (실제 변동폭 TR 의 alpha=1/period 지수 평균)"""
+    def __init__(self, period=14):
+        self.period = period
+        self.outputs = (f"atr{period}",)
+        self._state = (None, None, 0)
+
+    def _true_range(self, data):
+        high, low = np.asarray(data["high"], dtype=np.float64), np.asarray(data["low"], dtype=np.float64)
+        prev = np.r_[np.nan, np.asarray(data["close"], dtype=np.float64)[:-1]]
+        return np.fmax(high - low, np.fmax(np.abs(high - prev), np.abs(low - prev)))
+
+    def compute(self, data):
+        tr = self._true_range(data)
+        return {self.outputs[0]: _mask(ema(tr, 1.0 / self.period), self.period - 1)}
+
+    def seed(self, data):
+        close = data["close"]
+        if not len(close):
+            self._state = (None, None, 0)
+            return
+        atr = ema(self._true_range(data), 1.0 / self.period)[-1]
+        self._state = (float(close[-1]), float(atr), len(close))
+
+    def _step(self, bar):
+        prev, atr, count = self._state
+        high, low = bar["high"], bar["low"]
+        tr = high - low if prev is None else max(high - low, abs(high - prev), abs(low - prev))
+        atr = tr if atr is None else atr + (tr - atr) / self.period
+        count += 1
+        return (bar["close"], atr, count), {self.outputs[0]: atr if count >= self.period else np.nan}
+
+INDICATORS = {
+    "sma": SMA,
+    "ema": EMA,
+    "rsi": RSI,
+    "macd": MACD,
+    "bb": Bollinger,
+    "vwap": VWAP,
+    "atr": ATR,
+}
+
+def _param(text):
+    text = text.strip()
+    return int(text) if text.lstrip("-").isdigit() else float(text)
+
+def make_indicator(spec):
+    """'sma:20', 'macd:12,26,9', 'bb:20,2', 'vwap' 형식의 문자열로 지표 객체를 만듭니다."""
+    name, _, params = spec.partition(":")
+    args = [_param(p) for p in params.split(",") if p.strip()]
+    return INDICATORS[name.strip().lower()](*args)
+
+# ----------------------
+# 캔들 버퍼를 따라가는 증분 계산
+# ----------------------
+def _bar(view, i):
+    return {"timestamp": int(view["timestamp"][i]), **{f: float(view[f][i]) for f in FIELDS}}
+
+class IndicatorTracker:
+    """
+    캔들 버퍼 하나에 대한 지표 값을 같은 시각 축의 버퍼(outputs)로 유지합니다.
+    처음에는 전체 구간을 벡터 연산으로 계산하고, 이후에는 새로 마감된 봉만 update() 하며
+    진행 중인 마지막 봉은 peek() 로 계산해 덮어씁니다. 리런마다 드는 비용은 새 봉 수에 비례합니다.
+    """
+    def __init__(self, buffer, indicator):
+        self.buffer = buffer
+        self.indicator = indicator
+        self.outputs = CandleBuffer(buffer.capacity, fields=indicator.outputs)
+        self._lock = threading.Lock()
+        self._committed_ts = None
+
+    def sync(self):
+        """새 봉을 반영하고 지표 값 버퍼를 반환합니다."""
+        with self._lock:
+            view = self.buffer.view()
+            ts = view["timestamp"]
+            if not len(ts):
+                return self.outputs
+            if self._committed_ts is None:
+                self.indicator.seed({k: v[:-1] for k, v in view.items()})
+                self.outputs.extend(ts, **self.indicator.compute(view))
+                self._committed_ts = int(ts[-2]) if len(ts) > 1 else -1
+                return self.outputs
+            start = int(np.searchsorted(ts, self._committed_ts, side="right"))
+            rows = [self.indicator.update(_bar(view, i)) for i in range(start, len(ts) - 1)]
+            rows.append(self.indicator.peek(_bar(view, len(ts) - 1)))
+            self.outputs.extend(ts[start:], **{o: [row[o] for row in rows] for o in self.indicator.outputs})
+            if len(ts) - 1 > start:
+                self._committed_ts = int(ts[-2])
+            return self.outputs
+
+class IndicatorRegistry:
+    """(거래소, 심볼, 주기, 지표)별 IndicatorTracker 를 프로세스 전체에서 공유합니다."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._trackers = {}
+
+    def get(self, venue, symbol, timeframe, spec):
+        key = (venue, symbol, timeframe, spec)
+        with self._lock:
+            tracker = self._trackers.get(key)
+            if tracker is None:
+                if timeframe == "1m":
+                    buffer = candle_buffers.get(venue, symbol, "1m")
+                else:
+                    buffer = aggregators.get(venue, symbol, timeframe).target
+                tracker = self._trackers[key] = IndicatorTracker(buffer, make_indicator(spec))
+            return tracker
+
+
+indicator_trackers = IndicatorRegistry()
+
+def indicator_values(venue, symbol, timeframe, spec, last=None):
+    """지표 값 컬럼 배열 dict(timestamp 포함)를 반환합니다. 전략 입력으로 쓸 때는 last=1 로 최신 값만 읽으면 됩니다."""
+    timeframe_buffer(venue, symbol, timeframe)
+    return indicator_trackers.get(venue, symbol, timeframe, spec).sync().view(last)
+
+# 차트에서 고를 수 있는 보조지표 (표시 이름 -> 지표 문자열)
+CHART_INDICATORS = {
+    "SMA 20": "sma:20",
+    "EMA 50": "ema:50",
+    "볼린저밴드 (20, 2)": "bb:20,2",
+    "VWAP": "vwap",
+    "RSI 14": "rsi:14",
+    "MACD (12, 26, 9)": "macd:12,26,9",
+    "ATR 14": "atr:14",
+}
+
+def _chart_layout(indicators):
+    overlays, panels = [], []
+    for indicator in indicators:
+        if indicator.overlay:
+            overlays.extend(indicator.outputs)
+        else:
+            panels.append(tuple(indicator.outputs))
+    return overlays, panels
+
+def add_indicators(df, specs):
+    """
+    timestamp/open/high/low/close/volume DataFrame 에 지표 컬럼을 벡터 연산으로 붙입니다. (버퍼가 없는 KRX 분봉/일봉 차트용)
+    (DataFrame, overlays, panels) 를 반환합니다.
+    """
+    df = df.copy()
+    data = {f: df[f].to_numpy(dtype=np.float64) for f in FIELDS}
+    data["timestamp"] = df["timestamp"].to_numpy(dtype="datetime64[ms]").astype(np.int64)
+    indicators = [make_indicator(spec) for spec in specs]
+    for indicator in indicators:
+        for name, values in indicator.compute(data).items():
+            df[name] = values
+    return (df, *_chart_layout(indicators))
+
+def indicator_chart_frame(venue, symbol, timeframe, specs, last=None, tz=None):
+    """
+    캔들 + 지표 컬럼 DataFrame 과 charts.candlestick_spec 에 넘길 overlays(가격 차트 위), panels(별도 패널) 를 반환합니다.
+    지표는 버퍼를 따라가며 증분 계산한 값을 캔들과 같은 시각끼리 맞춰 붙입니다.
+    """
+    buffer = timeframe_buffer(venue, symbol, timeframe)
+    view = buffer.view(last)
+    df = view_to_frame(view, tz)
+    trackers = [indicator_trackers.get(venue, symbol, timeframe, spec) for spec in specs]
+    for tracker in trackers:
+        out = tracker.sync().view()
+        out_ts = out["timestamp"]
+        pos = np.minimum(np.searchsorted(out_ts, view["timestamp"]), max(len(out_ts) - 1, 0))
+        found = out_ts[pos] == view["timestamp"] if len(out_ts) else np.zeros(len(df), dtype=bool)
+        for name in tracker.indicator.outputs:
+            df[name] = np.where(found, out[name][pos], np.nan) if len(out_ts) else np.nan
+    return (df, *_chart_layout(t.indicator for t in trackers))
@@ -0,0 +1,225 @@
+import os
+import json
+import time
+import sqlite3
+import secrets
+import threading
+from decimal import Decimal
+
+import settings
+from account import AccountCache, VirtualAccount
+from margin import FuturesAccount, FuturesAccountRegistry
+from streaming import tick_store
+
+# ----------------------
+# 가상 계좌 영구 저장 (append-only journal + 주기적 스냅샷, SQLite WAL)
+# ----------------------
+# 입금/체결은 발생 즉시 journal 테이블에 한 행씩 추가만 하고, SNAPSHOT_EVERY 건마다 잔고/포지션 스냅샷을 남깁니다.
+# 시작할 때는 가장 최근 스냅샷을 읽고 그 이후 journal 만 다시 적용하므로, 전체 체결 수와 무관하게 복구가 빠릅니다.
+# 가격/수량/금액은 Decimal 을 잃지 않도록 문자열로 저장합니다.
+# 선물 계좌(margin.FuturesAccount)는 같은 DB 의 futures_journal / futures_snapshots 에 사건(입금/진입/종료/펀딩/청산)을 같은 방식으로 남깁니다.
+# (float 는 str() 이 원래 값으로 정확히 되돌아오는 가장 짧은 표기)
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS journal (
+    account TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    time TEXT NOT NULL,
+    side TEXT NOT NULL,
+    instrument TEXT,
+    price TEXT,
+    qty TEXT NOT NULL,
+    PRIMARY KEY (account, seq)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS snapshots (
+    account TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    created REAL NOT NULL,
+    state TEXT NOT NULL,
+    PRIMARY KEY (account, seq)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS futures_journal (
+    account TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    time TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    symbol TEXT,
+    price TEXT,
+    qty TEXT NOT NULL,
+    pnl TEXT NOT NULL,
+    leverage TEXT,
+    mode TEXT,
+    PRIMARY KEY (account, seq)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS futures_snapshots (
+    account TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    created REAL NOT NULL,
+    state TEXT NOT NULL,
+    PRIMARY KEY (account, seq)
+) WITHOUT ROWID;
+"""
+
+def _text(value):
+    return None if value is None else str(value)
+
+def _float(text):
+    return None if text is None else float(text)
+
+class AccountJournal:
+    """SQLite(WAL) 파일 하나에 여러 계좌의 journal/스냅샷을 저장합니다. 여러 스레드에서 함께 사용할 수 있습니다."""
+    def __init__(self, path=None):
+        self.path = path or settings.ACCOUNT_DB
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        # WAL + synchronous=NORMAL: 기록마다 fsync 하지 않고 체크포인트 때만 (프로세스가 죽어도 커밋된 기록은 남음)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def append(self, name, entry):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO journal VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (name, entry["seq"], entry["time"], entry["side"], entry["instrument"], _text(entry["price"]), str(entry["qty"])),
+            )
+
+    def save_snapshot(self, name, state, table="snapshots"):
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {table} VALUES (?, ?, ?, ?)",
+                (name, state["seq"], time.time(), json.dumps(state)),
+            )
+            # 최근 2개만 남김 (journal 은 지우지 않음)
+            self._conn.execute(
+                f"DELETE FROM {table} WHERE account = ? AND seq NOT IN "
+                f"(SELECT seq FROM {table} WHERE account = ? ORDER BY seq DESC LIMIT 2)",
+                (name, name),
+            )
+
+    def latest_snapshot(self, name, table="snapshots"):
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT state FROM {table} WHERE account = ? ORDER BY seq DESC LIMIT 1", (name,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def entries(self, name, after=0):
+        """seq 가 after 보다 큰 기록을 순서대로 반환합니다."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, time, side, instrument, price, qty FROM journal WHERE account = ? AND seq > ? ORDER BY seq",
+                (name, after),
+            ).fetchall()
+        return [
+            {"seq": seq, "time": t, "side": side, "instrument": inst,
+             "price": Decimal(price) if price is not None else None, "qty": Decimal(qty)}
+            for seq, t, side, inst, price, qty in rows
+        ]
+
+    def load(self, name):
+        """최근 스냅샷 + 이후 journal 로 계좌를 복구합니다. 저장된 기록이 없으면 빈 계좌를 반환합니다."""
+        state = self.latest_snapshot(name)
+        account = VirtualAccount.from_snapshot(state) if state else VirtualAccount()
+        for entry in self.entries(name, account.seq):
+            account.apply(entry)
+        return account
+
+    def attach(self, name, account, snapshot_every=None):
+        """계좌의 이후 입금/체결을 journal 에 기록하고 snapshot_every 건마다 스냅샷을 남깁니다."""
+        snapshot_every = snapshot_every or settings.SNAPSHOT_EVERY
+
+        def on_record(entry):
+            self.append(name, entry)
+            if entry["seq"] % snapshot_every == 0:
+                self.save_snapshot(name, account.snapshot())
+
+        account.add_listener(on_record)
+        return account
+
+    # ----------------------
+    # 선물 계좌
+    # ----------------------
+    def append_futures(self, name, entry):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO futures_journal VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (name, entry["seq"], entry["time"], entry["kind"], entry["symbol"], _text(entry["price"]),
+                 str(entry["qty"]), str(entry["pnl"]), _text(entry["leverage"]), entry["mode"]),
+            )
+
+    def futures_entries(self, name, after=0):
+        """seq 가 after 보다 큰 선물 사건을 순서대로 반환합니다."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, time, kind, symbol, price, qty, pnl, leverage, mode FROM futures_journal "
+                "WHERE account = ? AND seq > ? ORDER BY seq",
+                (name, after),
+            ).fetchall()
+        return [
+            {"seq": seq, "time": t, "kind": kind, "symbol": symbol, "price": _float(price), "qty": float(qty),
+             "pnl": float(pnl), "leverage": _float(leverage), "mode": mode}
+            for seq, t, kind, symbol, price, qty, pnl, leverage, mode in rows
+        ]
+
+    def load_futures(self, name):
+        """최근 스냅샷 + 이후 사건으로 선물 계좌를 복구합니다. (마크 가격/펀딩 일정은 다음 마크 가격 수신 때 다시 채워짐)"""
+        state = self.latest_snapshot(name, "futures_snapshots")
+        account = FuturesAccount.from_snapshot(state) if state else FuturesAccount()
+        for entry in self.futures_entries(name, account.seq):
+            account.apply(entry)
+        return account
+
+    def attach_futures(self, name, account, snapshot_every=None):
+        """선물 계좌의 이후 사건을 journal 에 기록하고 snapshot_every 건마다 스냅샷을 남깁니다."""
+        snapshot_every = snapshot_every or settings.SNAPSHOT_EVERY
+
+        def on_event(entry):
+            self.append_futures(name, entry)
+            if entry["seq"] % snapshot_every == 0:
+                self.save_snapshot(name, account.snapshot(), "futures_snapshots")
+
+        account.add_listener(on_event)
+        return account
+
+_shared = None
+_shared_lock = threading.Lock()
+
+def shared_journal():
+    """프로세스 전체가 함께 쓰는 AccountJournal (처음 부를 때 settings.ACCOUNT_DB 를 엶)"""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = AccountJournal()
+        return _shared
+
+class AccountRegistry:
+    """
+    이름별 계좌를 프로세스 전체에서 하나씩만 유지합니다. (같은 계좌를 여러 세션이 열어도 같은 객체를 공유)
+    처음 열 때 journal 에서 복구하고, 이후 기록을 journal 에 이어서 씁니다.
+    최근 max_size 개 / idle 초 안에 연 계좌만 붙잡아 두고, 아무도 쓰지 않는 계좌는 메모리에서 내려놓습니다. (account.AccountCache)
+    """
+    def __init__(self, max_size=settings.ACCOUNT_CACHE, idle=settings.ACCOUNT_IDLE):
+        self._lock = threading.Lock()
+        self._accounts = AccountCache(max_size, idle)
+
+    def get(self, name="default"):
+        with self._lock:
+            account = self._accounts.get(name)
+            if account is None:
+                journal = shared_journal()
+                account = journal.attach(name, journal.load(name))
+                self._accounts.put(name, account)
+            return account
+
+
+accounts = AccountRegistry()
+# 선물 계좌도 같은 journal 에 저장 (마크 가격 스트림 반영은 margin.FuturesAccountRegistry)
+futures_accounts = FuturesAccountRegistry(tick_store, shared_journal)
+
+def new_account_name():
+    """
+    주소에 계좌 이름이 없는 방문자용 새 계좌 이름. 추측할 수 없는 임의 문자열이라
+    이 이름이 들어간 주소(?account=...)를 아는 사람만 같은 계좌를 열 수 있습니다.
+    """
+    return "s-" + secrets.token_urlsafe(12)
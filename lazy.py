@@ -0,0 +1,35 @@
+import importlib
+
+# ----------------------
+# 지연 import (거래소 SDK 등 무거운 패키지는 처음 사용할 때 불러옴)
+# ----------------------
+# pykrx / FinanceDataReader / pyupbit / python-binance 는 import 만 각각 0.7 ~ 1.5초가 걸리므로
+# 모듈 맨 위에서는 대리 객체만 만들어 두고, 속성에 처음 접근할 때 실제 모듈을 불러옵니다.
+#   pyupbit = lazy_import("pyupbit")
+#   pyupbit.get_ohlcv(...)   # 여기서 import
+
+class LazyModule:
+    """처음 속성에 접근할 때 실제 모듈을 import 하는 대리 객체 (import 잠금으로 여러 스레드에서 안전)"""
+    def __init__(self, name):
+        object.__setattr__(self, "_name", name)
+        object.__setattr__(self, "_module", None)
+
+    def _load(self):
+        module = self._module
+        if module is None:
+            module = importlib.import_module(self._name)
+            object.__setattr__(self, "_module", module)
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
+
+def lazy_import(name):
+    return LazyModule(name)
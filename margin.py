@@ -0,0 +1,399 @@
+import time
+import threading
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+import settings
+from account import AccountCache
+
+# ----------------------
+# 선물 증거금 / 레버리지 / 청산 엔진 (USDT 마진, 단방향 포지션)
+# ----------------------
+# 포지션 수량은 부호로 방향을 나타냅니다. (롱 > 0, 숏 < 0)
+# 지갑 잔고(balance)는 실현 손익/수수료/펀딩을 반영한 금액이며 격리 증거금도 여기에 포함됩니다.
+# 격리(isolated): 포지션별 증거금만큼만 손실을 볼 수 있고, 증거금 + 미실현 손익 <= 유지 증거금이면 그 포지션만 청산
+# 교차(cross): 격리 증거금을 뺀 지갑 잔고 + 교차 포지션 미실현 손익 합계 <= 교차 유지 증거금 합계이면 교차 포지션 전체 청산
+# 입금/진입/종료/펀딩/청산은 사건(event) 하나씩 seq 순서로 기록되고, listener 로 붙인 journal.AccountJournal 이 영구 저장합니다.
+MODES = ("isolated", "cross")
+
+class FuturesAccount:
+    """
+    심볼별 포지션을 numpy 배열(수량, 진입가, 레버리지, 격리 증거금, 마크 가격 ...)로 보관합니다.
+    마크 가격이 바뀔 때마다 risk() 가 전체 포지션의 미실현 손익, 증거금 비율, 청산 가격을 벡터 연산 한 번으로 다시 계산하고
+    청산 조건을 만족한 포지션을 정리합니다.
+    잔고/포지션을 바꾸는 일은 모두 _book_* 에서만 하고 사건으로 기록하므로, 기록을 apply() 로 다시 적용하면 같은 상태가 됩니다.
+    """
+    def __init__(self, balance=0.0, mmr=None, fee_rate=None):
+        self.balance = float(balance)
+        self.mmr = settings.FUTURES_MMR if mmr is None else mmr
+        self.fee_rate = settings.FUTURES_FEE_RATE if fee_rate is None else fee_rate
+        self.lock = threading.RLock()
+        self.events = deque(maxlen=settings.LEDGER_MEMORY)
+        self.seq = 0
+        self._listeners = []
+        self._symbols = []
+        self._index = {}
+        size = 8
+        self._qty = np.zeros(size)
+        self._entry = np.zeros(size)
+        self._leverage = np.ones(size)
+        self._margin = np.zeros(size)      # 격리 증거금 (교차는 0)
+        self._mark = np.full(size, np.nan)
+        self._isolated = np.zeros(size, dtype=bool)
+        self._next_funding = np.zeros(size, dtype=np.int64)
+        self._funding_rate = np.zeros(size)
+
+    # ----------------------
+    # 슬롯 / 설정
+    # ----------------------
+    def _slot(self, symbol):
+        i = self._index.get(symbol)
+        if i is None:
+            i = self._index[symbol] = len(self._symbols)
+            self._symbols.append(symbol)
+            if i == len(self._qty):
+                grow = lambda a, fill: np.concatenate([a, np.full(i, fill, dtype=a.dtype)])
+                self._qty, self._entry, self._margin = grow(self._qty, 0), grow(self._entry, 0), grow(self._margin, 0)
+                self._leverage, self._mark = grow(self._leverage, 1), grow(self._mark, np.nan)
+                self._isolated, self._next_funding = grow(self._isolated, False), grow(self._next_funding, 0)
+                self._funding_rate = grow(self._funding_rate, 0)
+        return i
+
+    def configure(self, symbol, leverage, mode="cross"):
+        """심볼의 레버리지와 마진 모드를 정합니다. 포지션이 있는 동안에는 바꿀 수 없습니다."""
+        if mode not in MODES:
+            raise ValueError(f"지원하지 않는 마진 모드입니다: {mode}")
+        if not 1 <= leverage <= settings.FUTURES_MAX_LEVERAGE:
+            raise ValueError(f"레버리지는 1 ~ {settings.FUTURES_MAX_LEVERAGE} 배 사이여야 합니다.")
+        with self.lock:
+            i = self._slot(symbol)
+            if self._qty[i] != 0 and (self._leverage[i] != leverage or self._isolated[i] != (mode == "isolated")):
+                raise ValueError("포지션이 있는 동안에는 레버리지/마진 모드를 바꿀 수 없습니다.")
+            self._leverage[i] = leverage
+            self._isolated[i] = mode == "isolated"
+
+    def add_listener(self, listener):
+        """사건이 기록될 때마다 listener(entry) 를 호출합니다. (계좌 잠금 안에서 seq 순서대로)"""
+        with self.lock:
+            self._listeners.append(listener)
+
+    def deposit(self, amount):
+        with self.lock:
+            amount = float(amount)
+            self.balance += amount
+            self._event("deposit", None, None, amount, 0.0)
+
+    def _event(self, kind, symbol, price, qty, pnl):
+        # 진입 당시의 레버리지/마진 모드도 함께 남겨 복구 때 증거금을 같은 규칙으로 다시 계산
+        i = self._index.get(symbol)
+        self.seq += 1
+        entry = {
+            "seq": self.seq, "time": time.strftime("%Y-%m-%d %H:%M:%S"), "kind": kind, "symbol": symbol,
+            "price": None if price is None else float(price), "qty": float(qty), "pnl": float(pnl),
+            "leverage": None if i is None else float(self._leverage[i]),
+            "mode": None if i is None else ("isolated" if self._isolated[i] else "cross"),
+            "balance": self.balance,
+        }
+        self.events.append(entry)
+        for listener in self._listeners:
+            listener(entry)
+
+    # ----------------------
+    # 복구 (journal 재적용 / 스냅샷)
+    # ----------------------
+    def apply(self, entry):
+        """
+        journal 에 기록된 사건 하나를 다시 적용합니다. (복구용)
+        증거금 검사나 청산 판단은 다시 하지 않고 기록된 가격/수량/손익을 그대로 반영합니다.
+        """
+        with self.lock:
+            kind = entry["kind"]
+            if kind == "deposit":
+                self.deposit(entry["qty"])
+                return
+            i = self._slot(entry["symbol"])
+            self._leverage[i] = entry["leverage"]
+            self._isolated[i] = entry["mode"] == "isolated"
+            if kind == "open":
+                self._book_open(i, entry["qty"], entry["price"], -entry["pnl"])
+            elif kind == "close":
+                self._book_close(i, abs(entry["qty"]), entry["price"], entry["pnl"])
+            elif kind == "funding":
+                self._book_funding(i, entry["price"], -entry["pnl"])
+            elif kind == "liquidation":
+                self._book_liquidation(i, entry["price"], -entry["pnl"])
+
+    def snapshot(self):
+        """현재 잔고/포지션 상태를 JSON 으로 저장할 수 있는 dict 로 반환합니다."""
+        with self.lock:
+            return {
+                "seq": self.seq,
+                "balance": float(self.balance),
+                "positions": {
+                    symbol: [float(self._qty[i]), float(self._entry[i]), float(self._leverage[i]),
+                             float(self._margin[i]), bool(self._isolated[i])]
+                    for symbol, i in self._index.items()
+                },
+            }
+
+    @classmethod
+    def from_snapshot(cls, state):
+        account = cls(state["balance"])
+        account.seq = state["seq"]
+        for symbol, (qty, entry, leverage, margin, isolated) in state["positions"].items():
+            i = account._slot(symbol)
+            account._qty[i], account._entry[i], account._leverage[i] = qty, entry, leverage
+            account._margin[i], account._isolated[i] = margin, isolated
+        return account
+
+    # ----------------------
+    # 주문
+    # ----------------------
+    def available(self):
+        """신규 주문에 쓸 수 있는 금액 = 지갑 - 격리 증거금 - 교차 포지션 개시 증거금 + 교차 미실현 손익"""
+        with self.lock:
+            n = len(self._symbols)
+            qty, entry, lev, iso = self._qty[:n], self._entry[:n], self._leverage[:n], self._isolated[:n]
+            mark = np.where(np.isnan(self._mark[:n]), entry, self._mark[:n])
+            cross = ~iso
+            cross_im = (np.abs(qty[cross]) * entry[cross] / lev[cross]).sum()
+            cross_upnl = (qty[cross] * (mark[cross] - entry[cross])).sum()
+            return float(self.balance - self._margin[:n].sum() - cross_im + cross_upnl)
+
+    def order(self, symbol, side, qty, price):
+        """
+        시장가 주문. side: "buy"(롱 진입/숏 축소) / "sell"(숏 진입/롱 축소)
+        반대 방향 주문은 먼저 기존 포지션을 줄이고, 남는 수량이 있으면 반대 포지션을 엽니다.
+        개시 증거금(명목가 / 레버리지) + 수수료가 부족하면 False 를 반환합니다.
+        """
+        direction = 1.0 if side == "buy" else -1.0
+        qty, price = float(qty), float(price)
+        if qty <= 0 or price <= 0:
+            raise ValueError("가격과 수량은 0보다 커야 합니다.")
+        with self.lock:
+            i = self._slot(symbol)
+            current = self._qty[i]
+            if current != 0 and np.sign(current) != direction:
+                closed = min(qty, abs(current))
+                self._reduce(i, closed, price)
+                qty -= closed
+                if qty <= 0:
+                    self._refresh(i, price)
+                    return True
+            ok = self._open(i, direction, qty, price)
+            self._refresh(i, price)
+            return ok
+
+    def close(self, symbol, price):
+        """포지션 전체를 시장가로 정리합니다."""
+        with self.lock:
+            i = self._index.get(symbol)
+            if i is None or self._qty[i] == 0:
+                return False
+            self._reduce(i, abs(self._qty[i]), float(price))
+            self._refresh(i, price)
+            return True
+
+    def _open(self, i, direction, qty, price):
+        initial = qty * price / self._leverage[i]
+        fee = qty * price * self.fee_rate
+        if self.available() < initial + fee:
+            return False
+        self._book_open(i, direction * qty, price, fee)
+        return True
+
+    def _reduce(self, i, qty, price):
+        pnl = qty * (price - self._entry[i]) * np.sign(self._qty[i])
+        fee = qty * price * self.fee_rate
+        self._book_close(i, qty, price, pnl - fee)
+
+    def _book_open(self, i, qty, price, fee):
+        # qty 는 부호 있는 진입 수량
+        current = self._qty[i]
+        size = abs(qty)
+        new_qty = current + qty
+        self._entry[i] = (abs(current) * self._entry[i] + size * price) / abs(new_qty)
+        self._qty[i] = new_qty
+        if self._isolated[i]:
+            self._margin[i] += size * price / self._leverage[i]
+        self.balance -= fee
+        self._event("open", self._symbols[i], price, qty, -fee)
+
+    def _book_close(self, i, qty, price, net):
+        # qty 는 줄일 수량(양수), net 은 실현 손익 - 수수료
+        current = self._qty[i]
+        if self._isolated[i]:
+            self._margin[i] -= self._margin[i] * qty / abs(current)
+        self.balance += net
+        self._qty[i] = current - np.sign(current) * qty
+        if self._qty[i] == 0:
+            self._entry[i] = 0.0
+            self._margin[i] = 0.0
+        self._event("close", self._symbols[i], price, -np.sign(current) * qty, net)
+
+    def _refresh(self, i, price):
+        if np.isnan(self._mark[i]):
+            self._mark[i] = price
+        self.risk(liquidate=True)
+
+    # ----------------------
+    # 마크 가격 / 펀딩 / 청산
+    # ----------------------
+    def holds(self, symbol):
+        """symbol 포지션이 열려 있는지 여부"""
+        i = self._index.get(symbol)
+        return i is not None and self._qty[i] != 0
+
+    def update_mark(self, symbol, price, funding_rate=None, next_funding=None):
+        """마크 가격을 반영하고 전체 포지션의 위험도를 다시 계산합니다. 펀딩 시각이 지났으면 펀딩비를 정산합니다."""
+        with self.lock:
+            i = self._index.get(symbol)
+            if i is None:
+                return None
+            self._mark[i] = price
+            if next_funding:
+                # 다음 펀딩 시각이 바뀌었으면 직전 펀딩 시각이 지난 것이므로 직전 펀딩비율로 정산
+                if self._next_funding[i] and next_funding > self._next_funding[i] and self._qty[i] != 0:
+                    self._settle_funding(i, self._funding_rate[i], price)
+                self._next_funding[i] = next_funding
+            if funding_rate is not None:
+                self._funding_rate[i] = funding_rate
+            return self.risk(liquidate=True)
+
+    def _settle_funding(self, i, rate, mark):
+        # 펀딩비율이 양수면 롱이 숏에게 지불
+        self._book_funding(i, mark, self._qty[i] * mark * rate)
+
+    def _book_funding(self, i, mark, payment):
+        self.balance -= payment
+        if self._isolated[i]:
+            self._margin[i] -= payment
+        self._event("funding", self._symbols[i], mark, self._qty[i], -payment)
+
+    def risk(self, liquidate=False):
+        """
+        전체 포지션의 위험 지표를 한 번의 벡터 연산으로 계산합니다.
+        반환 dict 의 배열은 symbols 순서이며, liquidate=True 면 청산 조건을 만족한 포지션을 마크 가격으로 정리합니다.
+        청산 가격: 증거금 M + q(P - E) = |q| * P * mmr 을 P 에 대해 푼 값 (교차는 M 에 다른 교차 포지션의 손익/유지 증거금 포함)
+        """
+        with self.lock:
+            n = len(self._symbols)
+            qty, entry, margin = self._qty[:n], self._entry[:n], self._margin[:n]
+            iso = self._isolated[:n]
+            mark = np.where(np.isnan(self._mark[:n]), entry, self._mark[:n])
+            size = np.abs(qty)
+            is_open = qty != 0
+            upnl = qty * (mark - entry)
+            maint = size * mark * self.mmr
+            cross = is_open & ~iso
+            cross_wallet = self.balance - margin.sum()
+            cross_upnl, cross_maint = upnl[cross].sum(), maint[cross].sum()
+            cross_equity = cross_wallet + cross_upnl
+
+            # 포지션별 "버틸 수 있는 증거금": 격리는 자기 증거금, 교차는 교차 지갑 + 다른 교차 포지션 손익 - 그 유지 증거금
+            cushion = np.where(iso, margin, cross_wallet + (cross_upnl - upnl) - (cross_maint - maint))
+            denom = qty - size * self.mmr
+            with np.errstate(divide="ignore", invalid="ignore"):
+                liq_price = np.where(is_open, (qty * entry - cushion) / np.where(denom == 0, np.nan, denom), np.nan)
+                equity = np.where(iso, margin + upnl, cross_equity)
+                ratio = np.where(is_open, np.where(iso, maint, cross_maint) / equity, np.nan)
+            liq_price = np.where(liq_price > 0, liq_price, np.nan)
+            ratio = np.where(is_open & (equity <= 0), np.inf, ratio)
+
+            liquidated = is_open & ((iso & (margin + upnl <= maint)) | (cross & (cross_equity <= cross_maint)))
+            if liquidate and liquidated.any():
+                self._liquidate(np.flatnonzero(liquidated), upnl, mark)
+            return {
+                "symbols": list(self._symbols), "qty": qty.copy(), "entry": entry.copy(), "mark": mark,
+                "leverage": self._leverage[:n].copy(), "isolated": iso.copy(), "margin": margin.copy(),
+                "unrealized": upnl, "maintenance": maint, "margin_ratio": ratio, "liquidation_price": liq_price,
+                "liquidated": liquidated,
+            }
+
+    def _liquidate(self, indices, upnl, mark):
+        for i in indices:
+            # 격리는 증거금 전액, 교차는 미실현 손실만큼 지갑에서 차감 (지갑이 음수가 되지는 않음)
+            loss = self._margin[i] if self._isolated[i] else -upnl[i]
+            self._book_liquidation(i, float(mark[i]), float(loss))
+
+    def _book_liquidation(self, i, mark, loss):
+        self.balance = max(0.0, self.balance - loss)
+        self._event("liquidation", self._symbols[i], mark, -self._qty[i], -loss)
+        self._qty[i] = 0.0
+        self._entry[i] = 0.0
+        self._margin[i] = 0.0
+
+    def positions_frame(self):
+        """열린 포지션 표 (심볼, 방향, 수량, 진입가, 마크 가격, 레버리지, 모드, 미실현 손익, 증거금 비율, 청산 가격)"""
+        r = self.risk()
+        df = pd.DataFrame({
+            "심볼": r["symbols"], "방향": np.where(r["qty"] > 0, "롱", "숏"), "수량": np.abs(r["qty"]),
+            "진입가": r["entry"], "마크 가격": r["mark"], "레버리지": r["leverage"],
+            "모드": np.where(r["isolated"], "격리", "교차"), "미실현 손익": r["unrealized"],
+            "증거금 비율(%)": r["margin_ratio"] * 100, "청산 가격": r["liquidation_price"],
+        })
+        return df[r["qty"] != 0].reset_index(drop=True)
+
+class FuturesAccountRegistry:
+    """
+    이름별 선물 계좌를 프로세스 전체에서 공유하고, 바이낸스 마크 가격 스트림이 들어오면 해당 심볼을 가진 계좌에 반영합니다.
+    journal 은 AccountJournal 을 돌려주는 함수로, 주면 처음 열 때 journal 에서 복구하고 이후 사건을 이어서 씁니다.
+    (프로세스 공유 인스턴스는 journal.futures_accounts)
+
+    스트리밍 스레드의 listener 는 심볼별 최신 마크 가격만 남겨 두고, 위험도 계산/청산/펀딩 정산(journal 기록 포함)은
+    mark 스레드에서 그 심볼 포지션이 있는 계좌에만 합니다.
+    journal 이 있으면 AccountRegistry 처럼 최근 max_size 개 / idle 초 안에 연 계좌만 붙잡아 두고 나머지는 내려놓습니다.
+    (메모리에서 해제된 계좌는 마크 가격을 받지 않고, 다음에 열 때 journal 에서 복구된 뒤 다음 마크 가격부터 반영)
+    """
+    def __init__(self, store, journal=None, max_size=settings.ACCOUNT_CACHE, idle=settings.ACCOUNT_IDLE):
+        self.store = store
+        self.journal = journal
+        self._lock = threading.Lock()
+        # journal 이 없으면 내려놓은 계좌를 복구할 수 없으므로 모두 유지
+        self._accounts = AccountCache(max_size, idle) if journal is not None else AccountCache()
+        self._marks = {}    # symbol -> 아직 반영하지 않은 최신 마크 가격 data
+        self._wakeup = threading.Condition()
+        self._thread = None
+
+    def get(self, name="default"):
+        with self._lock:
+            account = self._accounts.get(name)
+            if account is None:
+                if self.journal is None:
+                    account = FuturesAccount()
+                else:
+                    journal = self.journal()
+                    account = journal.attach_futures(name, journal.load_futures(name))
+                self._accounts.put(name, account)
+            if self._thread is None:
+                self.store.add_listener(self._on_event)
+                self._thread = threading.Thread(target=self._run, daemon=True, name="futures-mark")
+                self._thread.start()
+            return account
+
+    def _on_event(self, kind, venue, symbol, data):
+        # 스트리밍 스레드에서 호출됨. 밀린 마크 가격은 최신 값으로 덮어씀 (다음 펀딩 시각이 바뀌면 그 값으로 정산)
+        if kind != "mark" or venue != "binance":
+            return
+        with self._wakeup:
+            self._marks[symbol] = data
+            self._wakeup.notify()
+
+    def _run(self):
+        while True:
+            with self._wakeup:
+                while not self._marks:
+                    self._wakeup.wait()
+                marks, self._marks = self._marks, {}
+            with self._lock:
+                accounts = self._accounts.values()
+            for symbol, data in marks.items():
+                for account in accounts:
+                    if not account.holds(symbol):
+                        continue
+                    try:
+                        account.update_mark(symbol, data["price"], data.get("funding_rate"), data.get("next_funding"))
+                    except Exception:
+                        pass
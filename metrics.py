@@ -0,0 +1,285 @@
+import json
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pandas as pd
+
+import settings
+
+# ----------------------
+# 핫패스 계측 (구간 시간 측정 + 지연 히스토그램 + 내보내기)
+# ----------------------
+# 외부 API 호출(governor.upstream.call)과 화면 단계(차트 생성 등)를 span 으로 감싸 시간을 잽니다.
+#   with metrics.span("render", "crypto_chart"):
+#       ...
+# - (종류, 이름)별로 누적 지연 히스토그램 / 호출 수 / 오류 수를 프로세스 전체에서 모읍니다.
+# - 리런 하나의 구간 목록(RerunTrace)은 진단 패널에서 "이번 리런에서 어디에 시간이 들었는지" 보여줄 때 씁니다.
+# - 캐시 적중률 / 호스트별 요청 수 등은 각 모듈이 register_source() 로 등록한 stats() 를 내보낼 때 함께 읽습니다.
+# - snapshot() / to_prometheus() 결과를 METRICS_PORT 의 /metrics.json, /metrics 로 내보냅니다.
+
+# 지연 히스토그램 구간 상한 (초)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class LatencyHistogram:
+    """고정 구간 지연 히스토그램. 분위수는 구간 안에서 선형 보간한 추정값입니다."""
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)   # 마지막 칸은 +Inf
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds, error=False):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        if error:
+            self.errors += 1
+
+    def quantile(self, q):
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lower = self.buckets[i - 1] if i else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                return min(lower + (upper - lower) * (rank - seen) / n, self.max)
+            seen += n
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "sum": self.total,
+            "mean": self.total / self.count if self.count else None,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "max": self.max,
+            "buckets": dict(zip((*map(str, self.buckets), "+Inf"), self.counts)),
+        }
+
+class RerunTrace:
+    """리런 한 번 동안 기록된 구간 목록 (다른 스레드에서 끝난 구간도 bind() 로 연결하면 함께 모임)"""
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans = []
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def frame(self):
+        """기록 순서대로 구간별 소요 시간 DataFrame (진단 패널용)"""
+        return pd.DataFrame(
+            [{"종류": kind, "구간": name, "시작(ms)": round(start * 1000, 1), "소요(ms)": round(seconds * 1000, 2),
+              "오류": "O" if error else ""} for kind, name, start, seconds, error in self.spans],
+            columns=["종류", "구간", "시작(ms)", "소요(ms)", "오류"],
+        )
+
+class Metrics:
+    """(종류, 이름)별 지연 히스토그램 모음. 모든 세션/스레드가 함께 기록합니다."""
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._sources = {}
+        self._local = threading.local()
+
+    # --- 기록 ---
+    def observe(self, kind, name, seconds, error=False):
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._histograms.get((kind, name))
+            if histogram is None:
+                histogram = self._histograms[(kind, name)] = LatencyHistogram()
+            histogram.observe(seconds, error)
+
+    @contextmanager
+    def span(self, kind, name):
+        """with 블록 실행 시간을 기록합니다. 예외가 나면 오류로 세고 그대로 다시 발생시킵니다."""
+        if not self.enabled:
+            yield
+            return
+        trace = getattr(self._local, "trace", None)
+        start = time.perf_counter()
+        error = False
+        try:
+            yield
+        except BaseException:
+            error = True
+            raise
+        finally:
+            seconds = time.perf_counter() - start
+            self.observe(kind, name, seconds, error)
+            if trace is not None:
+                trace.spans.append((kind, name, start - trace.started, seconds, error))
+
+    # --- 리런 단위 기록 ---
+    def start_rerun(self):
+        """이 스레드(스크립트 스레드)에서 리런 기록을 시작하고 RerunTrace 를 반환합니다."""
+        trace = self._local.trace = RerunTrace()
+        return trace
+
+    def finish_rerun(self, trace):
+        """리런 전체 시간을 ("rerun", "script") 로 기록하고 이 스레드의 리런 기록을 끝냅니다."""
+        self.observe("rerun", "script", trace.elapsed())
+        if getattr(self._local, "trace", None) is trace:
+            self._local.trace = None
+
+    def bind(self, func):
+        """
+        현재 리런 기록을 다른 스레드에서도 이어 쓰도록 func 를 감쌉니다.
+        (prefetch 스레드 풀에서 실행되는 조회의 구간도 이 리런에 표시되도록)
+        """
+        trace = getattr(self._local, "trace", None)
+        if trace is None:
+            return func
+
+        def bound(*args, **kwargs):
+            previous = getattr(self._local, "trace", None)
+            self._local.trace = trace
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._local.trace = previous
+        return bound
+
+    # --- 다른 모듈 통계 ---
+    def register_source(self, name, stats):
+        """내보낼 때 함께 읽을 통계 함수를 등록합니다. (캐시 적중률, 호스트별 요청 수 등)"""
+        with self._lock:
+            self._sources[name] = stats
+
+    # --- 내보내기 ---
+    def snapshot(self):
+        """구간별 히스토그램 요약과 등록된 통계를 dict 로 반환합니다. (JSON 직렬화 가능)"""
+        with self._lock:
+            spans = {f"{kind}:{name}": dict(h.summary(), kind=kind, name=name) for (kind, name), h in self._histograms.items()}
+            sources = dict(self._sources)
+        out = {"time": time.time(), "spans": spans}
+        for name, stats in sources.items():
+            try:
+                out[name] = stats()
+            except Exception as e:
+                out[name] = {"error": str(e)}
+        return out
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), ensure_ascii=False, default=str)
+
+    def to_prometheus(self):
+        """Prometheus 텍스트 형식 (span 히스토그램 + 캐시 적중/실패 + 호스트별 요청 수)"""
+        snap = self.snapshot()
+        lines = [
+            "# HELP webcostock_span_seconds 구간 실행 시간",
+            "# TYPE webcostock_span_seconds histogram",
+        ]
+        errors = []
+        for s in snap["spans"].values():
+            labels = f'kind="{_escape(s["kind"])}",name="{_escape(s["name"])}"'
+            cumulative = 0
+            for le, n in s["buckets"].items():
+                cumulative += n
+                lines.append(f'webcostock_span_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f"webcostock_span_seconds_sum{{{labels}}} {s['sum']:.6f}")
+            lines.append(f"webcostock_span_seconds_count{{{labels}}} {s['count']}")
+            errors.append(f"webcostock_span_errors_total{{{labels}}} {s['errors']}")
+        lines += ["# HELP webcostock_span_errors_total 예외로 끝난 구간 수", "# TYPE webcostock_span_errors_total counter", *errors]
+
+        # 같은 이름의 표본은 한데 모여 있어야 하므로 캐시 크기(gauge)는 조회 수 뒤에 씀
+        cache = snap.get("market_cache")
+        charts = snap.get("chart_cache")
+        lines += ["# HELP webcostock_cache_requests_total 캐시 조회 수 (적중/실패)", "# TYPE webcostock_cache_requests_total counter"]
+        if isinstance(cache, dict) and "kinds" in cache:
+            for kind, s in cache["kinds"].items():
+                lines.append(f'webcostock_cache_requests_total{{cache="market",kind="{kind}",result="hit"}} {s["hits"]}')
+                lines.append(f'webcostock_cache_requests_total{{cache="market",kind="{kind}",result="miss"}} {s["misses"]}')
+        if isinstance(charts, dict) and "hits" in charts:
+            lines.append(f'webcostock_cache_requests_total{{cache="chart",kind="spec",result="hit"}} {charts["hits"]}')
+            lines.append(f'webcostock_cache_requests_total{{cache="chart",kind="spec",result="miss"}} {charts["misses"]}')
+        if isinstance(cache, dict) and "bytes" in cache:
+            lines += ["# TYPE webcostock_cache_bytes gauge", f'webcostock_cache_bytes{{cache="market"}} {cache["bytes"]}']
+
+        upstream = snap.get("upstream")
+        if isinstance(upstream, dict) and "hosts" in upstream:
+            lines += ["# HELP webcostock_upstream_calls_total 호스트별 실제 외부 요청 수", "# TYPE webcostock_upstream_calls_total counter"]
+            lines += [f'webcostock_upstream_calls_total{{host="{host}"}} {s["calls"]}' for host, s in upstream["hosts"].items()]
+            lines += ["# HELP webcostock_upstream_wait_seconds_total 호출 제한으로 기다린 누적 시간", "# TYPE webcostock_upstream_wait_seconds_total counter"]
+            lines += [f'webcostock_upstream_wait_seconds_total{{host="{host}"}} {s["waited"]:.6f}' for host, s in upstream["hosts"].items()]
+            lines += ["# TYPE webcostock_upstream_coalesced_total counter", f"webcostock_upstream_coalesced_total {upstream['coalesced']}"]
+        return "\n".join(lines) + "\n"
+
+    def span_frame(self):
+        """누적 구간 통계 DataFrame (진단 패널용, 총 소요 시간이 큰 순)"""
+        rows = []
+        with self._lock:
+            items = [(kind, name, h.summary()) for (kind, name), h in self._histograms.items()]
+        for kind, name, s in sorted(items, key=lambda item: -item[2]["sum"]):
+            ms = lambda v: None if v is None else round(v * 1000, 2)
+            rows.append({"종류": kind, "구간": name, "호출": s["count"], "오류": s["errors"],
+                         "평균(ms)": ms(s["mean"]), "p50(ms)": ms(s["p50"]), "p95(ms)": ms(s["p95"]),
+                         "p99(ms)": ms(s["p99"]), "최대(ms)": ms(s["max"]), "합계(s)": round(s["sum"], 3)})
+        return pd.DataFrame(rows, columns=["종류", "구간", "호출", "오류", "평균(ms)", "p50(ms)", "p95(ms)", "p99(ms)", "최대(ms)", "합계(s)"])
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+metrics = Metrics(settings.METRICS_ENABLED)
+
+# ----------------------
+# 수집용 HTTP 엔드포인트 (/metrics: Prometheus 텍스트, /metrics.json: JSON)
+# ----------------------
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path == "/metrics":
+            body, ctype = metrics.to_prometheus().encode(), "text/plain; version=0.0.4; charset=utf-8"
+        elif path == "/metrics.json":
+            body, ctype = metrics.to_json().encode(), "application/json"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+_server = None
+_server_lock = threading.Lock()
+
+def serve_metrics(port=None, host=None):
+    """
+    수집용 엔드포인트를 백그라운드 스레드에서 엽니다. 프로세스당 한 번만 열리며 이후 호출은 무시합니다.
+    port 가 0 이면 열지 않습니다. 포트가 이미 사용 중이면 (다른 프로세스가 열어 둔 경우) None 을 반환합니다.
+    """
+    global _server
+    port = settings.METRICS_PORT if port is None else port
+    if not port:
+        return None
+    with _server_lock:
+        if _server is None:
+            try:
+                _server = ThreadingHTTPServer((host or settings.METRICS_HOST, port), _MetricsHandler)
+            except OSError:
+                return None
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
+        return _server
@@ -0,0 +1,154 @@
+import re
+import codecs
+from html import unescape
+
+from bs4 import BeautifulSoup
+
+from cache import market_cache
+from clients import naver_get
+from metrics import metrics
+
+# ----------------------
+# 네이버 금융 종목 페이지 빠른 파서
+# ----------------------
+ITEM_URL = "https://finance.naver.com/item/main.naver?code={code}"
+
+# 종목 페이지에서 필요한 값은 회사명(div.wrap_company h2 a)과 현재가(p.no_today span.blind) 두 개뿐이라
+# 전체 DOM을 만들지 않고 마커 문자열 뒤 일정 범위만 정규식으로 확인합니다.
+_NAME_MARKER = 'class="wrap_company"'
+_PRICE_MARKER = 'class="no_today"'
+_NAME_RE = re.compile(r'<h2[^>]*>\s*<a[^>]*>([^<]+)</a>')
+_PRICE_RE = re.compile(r'<span class="blind">\s*([\d,]+(?:\.\d+)?)\s*</span>')
+_CHARSET_RE = re.compile(rb'charset=["\']?([\w-]+)', re.IGNORECASE)
+_WINDOW = 1024      # 마커 뒤에서 값을 찾는 범위 (글자 수)
+_CHUNK_SIZE = 16 * 1024
+
+def _to_number(text):
+    text = text.replace(',', '').strip()
+    return float(text) if '.' in text else int(text)
+
+def fast_extract(html):
+    """
+    DOM 없이 종목 페이지 문자열에서 (회사명, 현재가)를 찾습니다.
+    찾지 못한 값은 None 으로 반환합니다. (페이지 구조가 바뀐 경우 등)
+    """
+    name = price = None
+    i = html.find(_NAME_MARKER)
+    if i >= 0:
+        m = _NAME_RE.search(html, i, i + _WINDOW)
+        if m:
+            name = unescape(m.group(1)).strip()
+    j = html.find(_PRICE_MARKER)
+    if j >= 0:
+        m = _PRICE_RE.search(html, j, j + _WINDOW)
+        if m:
+            price = _to_number(m.group(1))
+    return name, price
+
+def soup_extract(html):
+    """BeautifulSoup 으로 전체 페이지를 파싱하여 (회사명, 현재가)를 찾습니다. (기존 방식)"""
+    soup = BeautifulSoup(html, 'html.parser')
+    price_tag = soup.select_one('p.no_today span.blind')
+    name_tag = soup.select_one('div.wrap_company h2 a')
+    name = name_tag.text.strip() if name_tag else None
+    price = _to_number(price_tag.text) if price_tag else None
+    return name, price
+
+def parse_item_page(html):
+    """빠른 경로로 먼저 찾고, 하나라도 실패하면 BeautifulSoup 으로 다시 파싱합니다."""
+    name, price = fast_extract(html)
+    if name is None or price is None:
+        name, price = soup_extract(html)
+    return name, price
+
+class ItemPageScanner:
+    """
+    응답을 조각(chunk) 단위로 받으면서 현재가 영역이 도착하는 즉시 파싱을 끝내는 스캐너입니다.
+    회사명은 현재가보다 앞에 나오므로 현재가 마커 뒤 _WINDOW 까지만 받으면 충분합니다.
+    받은 조각은 목록에 모아 두고 필요할 때 한 번만 이어 붙입니다. (조각마다 문자열을 이어 붙이면 큰 페이지에서 O(n^2))
+    """
+    def __init__(self):
+        self._chunks = []
+        self._length = 0
+        self._tail = ""          # 직전 조각의 끝부분 (조각 경계에 걸친 마커를 찾기 위함)
+        self._price_at = None    # 현재가 마커 위치 (전체 본문 기준)
+        self.name = None
+        self.price = None
+        self.done = False
+        self._fallback = False
+
+    @property
+    def text(self):
+        """지금까지 받은 본문"""
+        if len(self._chunks) > 1:
+            self._chunks = ["".join(self._chunks)]
+        return self._chunks[0] if self._chunks else ""
+
+    def feed(self, chunk):
+        """조각을 추가하고, 값을 모두 찾았으면 True 를 반환합니다."""
+        self._chunks.append(chunk)
+        tail_start = self._length - len(self._tail)
+        self._length += len(chunk)
+        if self._fallback:
+            return False
+        if self._price_at is None:
+            # 새 조각과 직전 끝부분만 검색하므로 조각마다 드는 비용이 조각 크기에 비례
+            window = self._tail + chunk
+            j = window.find(_PRICE_MARKER)
+            if j < 0:
+                self._tail = window[-(len(_PRICE_MARKER) - 1):]
+                return False
+            self._price_at = tail_start + j
+        if self._length < self._price_at + _WINDOW:
+            return False
+        self.name, self.price = fast_extract(self.text[:self._price_at + _WINDOW])
+        self.done = self.name is not None and self.price is not None
+        # 구조가 바뀌어 빠른 경로가 실패하면 끝까지 받은 뒤 finish() 에서 전체 파싱
+        self._fallback = not self.done
+        return self.done
+
+    def finish(self):
+        """응답을 끝까지 받았을 때 호출합니다. 빠른 경로가 실패했으면 전체 파싱으로 대체합니다."""
+        if not self.done:
+            self.name, self.price = parse_item_page(self.text)
+            self.done = True
+        return self.name, self.price
+
+def _guess_encoding(response, head):
+    # 헤더에 charset 이 없으면 requests 가 ISO-8859-1 로 가정하므로, 첫 조각의 meta 태그로 보정
+    if response.encoding and response.encoding.lower() != 'iso-8859-1':
+        return response.encoding
+    m = _CHARSET_RE.search(head)
+    return m.group(1).decode('ascii') if m else 'utf-8'
+
+def fetch_item_quote(code):
+    """
+    네이버 금융 종목 페이지에서 (회사명, 현재가)를 조회합니다.
+    여러 세션이 같은 종목을 조회하면 공유 캐시(quote TTL)의 결과를 함께 씁니다.
+    """
+    return market_cache.fetch("quote", ("naver", code), _fetch_item_quote, code)
+
+def _fetch_item_quote(code):
+    # 호출 제한 구간(upstream naver.get)은 응답 헤더까지만 재므로, 본문 수신/파싱까지 포함한 전체 시간을 따로 기록
+    with metrics.span("upstream", "naver.item_page"):
+        return _scan_item_page(code)
+
+def _scan_item_page(code):
+    # 현재가를 찾으면 나머지 본문은 파싱하지 않고, 압축 해제 없이 버려서 연결만 풀에 돌려줌
+    response = naver_get(ITEM_URL.format(code=code), stream=True)
+    try:
+        response.raise_for_status()
+        scanner = ItemPageScanner()
+        decoder = None
+        for chunk in response.iter_content(chunk_size=_CHUNK_SIZE):
+            if decoder is None:
+                decoder = codecs.getincrementaldecoder(_guess_encoding(response, chunk))(errors='replace')
+            if scanner.feed(decoder.decode(chunk)):
+                return scanner.name, scanner.price
+        if decoder is not None:
+            scanner.feed(decoder.decode(b'', final=True))
+        return scanner.finish()
+    finally:
+        # 남은 본문을 비워야 keep-alive 연결을 재사용할 수 있음
+        response.raw.drain_conn()
+        response.raw.release_conn()
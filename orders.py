@@ -0,0 +1,213 @@
+import time
+import heapq
+import weakref
+import itertools
+import threading
+from collections import deque
+
+import settings
+from account import instrument
+from streaming import market_stream, tick_store
+
+# ----------------------
+# 예약 주문 (지정가 / 스탑 / 익절)
+# ----------------------
+# 주문마다 "가격이 level 이하로 내려오면" 또는 "level 이상으로 올라가면" 발동합니다.
+#   지정가 매수, 스탑 매도(손절), 익절 매수  -> 이하(le)
+#   지정가 매도, 스탑 매수, 익절 매도       -> 이상(ge)
+# 심볼마다 le 는 level 이 높은 순, ge 는 level 이 낮은 순 힙에 넣어 두므로
+# 틱 하나를 처리할 때 힙 맨 위만 보면 되고(발동할 주문이 없으면 O(1)), 발동한 주문 수 k 에 대해 O(k log n) 입니다.
+KINDS = ("limit", "stop", "take_profit")
+SIDES = ("buy", "sell")
+_TRIGGER_BELOW = {("limit", "buy"), ("stop", "sell"), ("take_profit", "buy")}
+
+class Order:
+    __slots__ = ("id", "account", "venue", "symbol", "side", "kind", "level", "qty", "group",
+                 "status", "created", "filled_price", "filled_at")
+
+    def __init__(self, id, account, venue, symbol, side, kind, level, qty, group=None):
+        self.id = id
+        self.account = account
+        self.venue = venue
+        self.symbol = symbol
+        self.side = side
+        self.kind = kind
+        self.level = level
+        self.qty = qty
+        self.group = group
+        self.status = "open"
+        self.created = time.strftime("%Y-%m-%d %H:%M:%S")
+        self.filled_price = None
+        self.filled_at = None
+
+    @property
+    def below(self):
+        return (self.kind, self.side) in _TRIGGER_BELOW
+
+    def to_dict(self):
+        return {
+            "id": self.id, "venue": self.venue, "symbol": self.symbol, "side": self.side, "kind": self.kind,
+            "level": self.level, "qty": self.qty, "group": self.group, "status": self.status,
+            "created": self.created, "filled_price": self.filled_price, "filled_at": self.filled_at,
+        }
+
+class OrderBook:
+    """
+    심볼별 예약 주문 힙. 새 체결가가 들어오면(on_price) 발동 조건을 만족한 주문을 계좌에 체결합니다.
+    지정가는 지정한 가격(체결가가 더 유리하면 체결가)으로, 스탑/익절은 발동 시점의 체결가(시장가)로 체결합니다.
+    같은 group 의 주문은 하나가 체결되면 나머지가 취소됩니다. (익절 + 손절 OCO)
+    대기 중인 주문만 _orders 에 두고, 체결/취소/거부된 주문은 계좌별로 최근 history_size 건만 history 에 남깁니다.
+    (history 는 계좌를 약한 참조로 들고 있어 메모리에서 해제된 계좌의 기록은 함께 사라집니다)
+    예약 주문은 메모리에만 있으므로 서버를 다시 시작하면 대기 중인 주문과 history 가 모두 사라집니다.
+
+    스트리밍 스레드의 listener 는 (venue, symbol, 체결가) 를 큐에 넣기만 하고, 체결(계좌 반영, journal 기록)은
+    matcher 스레드에서 받은 순서대로 합니다. (체결이 느려도 시세 수신이 밀리지 않도록)
+    """
+    def __init__(self, store, stream, history_size=settings.ORDER_HISTORY):
+        self.store = store
+        self.stream = stream
+        self._lock = threading.RLock()
+        self._books = {}    # (venue, symbol) -> {"le": 힙, "ge": 힙, "stale": 취소된 항목 수}
+        self._orders = {}   # 대기 중인 주문만. id -> Order
+        self.history_size = history_size
+        self._history = weakref.WeakKeyDictionary()   # 계좌 -> 끝난 주문 dict deque (오래된 것부터 밀려남)
+        self._groups = {}   # (계좌, group) -> [Order]
+        self._ids = itertools.count(1)
+        self._seq = itertools.count()
+        self._pending = deque()   # 스트림에서 받은 (venue, symbol, price)
+        self._wakeup = threading.Condition()
+        self._thread = None
+
+    def place(self, account, venue, symbol, side, kind, level, qty, group=None):
+        """예약 주문을 넣고 Order 를 반환합니다. 가격이 이미 조건을 만족하면 다음 체결가에서 바로 체결됩니다."""
+        if side not in SIDES or kind not in KINDS:
+            raise ValueError(f"지원하지 않는 주문입니다: {side} / {kind}")
+        if level <= 0 or qty <= 0:
+            raise ValueError("가격과 수량은 0보다 커야 합니다.")
+        with self._lock:
+            order = Order(next(self._ids), account, venue, symbol, side, kind, float(level), qty, group)
+            self._orders[order.id] = order
+            if group is not None:
+                self._groups.setdefault((id(account), group), []).append(order)
+            book = self._books.setdefault((venue, symbol), {"le": [], "ge": [], "stale": 0})
+            if order.below:
+                heapq.heappush(book["le"], (-order.level, next(self._seq), order))
+            else:
+                heapq.heappush(book["ge"], (order.level, next(self._seq), order))
+            if self._thread is None:
+                self.store.add_listener(self._on_event)
+                self._thread = threading.Thread(target=self._run, daemon=True, name="order-matcher")
+                self._thread.start()
+        if venue in ("upbit", "binance") and settings.STREAMING_ENABLED:
+            self.stream.subscribe(venue, symbol)
+        return order
+
+    def cancel(self, order_id):
+        with self._lock:
+            order = self._orders.get(order_id)
+            if order is None or order.status != "open":
+                return False
+            self._drop(order, "cancelled")
+            return True
+
+    def _retire(self, order):
+        # 끝난 주문을 대기 목록에서 계좌별 history 로 옮기고, 그룹에 대기 주문이 남지 않으면 그룹도 지움
+        # (history 에는 dict 로 남겨 Order 가 계좌를 붙잡지 않도록 함)
+        self._orders.pop(order.id, None)
+        history = self._history.get(order.account)
+        if history is None:
+            history = self._history[order.account] = deque(maxlen=self.history_size)
+        history.append(order.to_dict())
+        if order.group is not None:
+            key = (id(order.account), order.group)
+            members = self._groups.get(key)
+            if members is not None and not any(o.status == "open" for o in members):
+                del self._groups[key]
+
+    def _drop(self, order, status):
+        # 힙에서는 바로 빼지 않고(지연 삭제) 꺼낼 때 건너뜀. 취소된 항목이 절반을 넘으면 힙을 다시 만듦
+        order.status = status
+        self._retire(order)
+        book = self._books[(order.venue, order.symbol)]
+        book["stale"] += 1
+        if book["stale"] * 2 > len(book["le"]) + len(book["ge"]):
+            for side in ("le", "ge"):
+                book[side] = [item for item in book[side] if item[2].status == "open"]
+                heapq.heapify(book[side])
+            book["stale"] = 0
+
+    def orders(self, account=None, status=None):
+        """주문 목록(dict)을 최근 순으로 반환합니다. (끝난 주문은 계좌별 history 에 남은 것만)"""
+        with self._lock:
+            if account is None:
+                finished = [o for history in self._history.values() for o in history]
+            else:
+                finished = list(self._history.get(account, ()))
+            pending = [o.to_dict() for o in self._orders.values() if account is None or o.account is account]
+        orders = [o for o in itertools.chain(finished, pending) if status is None or o["status"] == status]
+        orders.sort(key=lambda o: o["id"], reverse=True)
+        return orders
+
+    def _on_event(self, kind, venue, symbol, data):
+        # 스트리밍 스레드에서 호출됨. 예약 주문이 있는 심볼의 체결가만 큐에 넣음
+        if kind == "tick" and (venue, symbol) in self._books:
+            with self._wakeup:
+                self._pending.append((venue, symbol, data["price"]))
+                self._wakeup.notify()
+
+    def _run(self):
+        while True:
+            with self._wakeup:
+                while not self._pending:
+                    self._wakeup.wait()
+                pending, self._pending = self._pending, deque()
+            for venue, symbol, price in pending:
+                try:
+                    self.on_price(venue, symbol, price)
+                except Exception:
+                    pass
+
+    def on_price(self, venue, symbol, price):
+        """새 체결가로 발동한 주문을 체결하고 체결된 Order 목록을 반환합니다. (스트림이 없는 KRX 는 시세 조회 시 호출)"""
+        with self._lock:
+            book = self._books.get((venue, symbol))
+            if book is None:
+                return []
+            triggered = []
+            le, ge = book["le"], book["ge"]
+            while le and -le[0][0] >= price:
+                triggered.append(heapq.heappop(le)[2])
+            while ge and ge[0][0] <= price:
+                triggered.append(heapq.heappop(ge)[2])
+            filled = []
+            for order in sorted(triggered, key=lambda o: o.id):
+                if order.status != "open":
+                    book["stale"] = max(0, book["stale"] - 1)
+                    continue
+                if self._fill(order, price):
+                    filled.append(order)
+            return filled
+
+    def _fill(self, order, price):
+        if order.kind == "limit":
+            fill_price = min(order.level, price) if order.side == "buy" else max(order.level, price)
+        else:
+            fill_price = price
+        key = instrument(order.venue, order.symbol)
+        if order.side == "buy":
+            ok = order.account.buy(key, fill_price, order.qty)
+        else:
+            ok = order.account.sell(key, fill_price, order.qty)
+        order.status = "filled" if ok else "rejected"
+        order.filled_price = fill_price if ok else None
+        order.filled_at = time.strftime("%Y-%m-%d %H:%M:%S")
+        if ok and order.group is not None:
+            for other in self._groups.pop((id(order.account), order.group), []):
+                if other.status == "open":
+                    self._drop(other, "cancelled")
+        self._retire(order)
+        return ok
+
+
+# 프로세스 전체에서 공유하는 예약 주문 장부
+order_book = OrderBook(tick_store, market_stream)
@@ -0,0 +1,37 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import settings
+from metrics import metrics
+
+# ----------------------
+# 리런 단위 동시 조회
+# ----------------------
+# 모든 Streamlit 세션이 함께 쓰는 조회용 스레드 풀
+_pool = ThreadPoolExecutor(max_workers=settings.PREFETCH_MAX_WORKERS, thread_name_prefix="rerun-fetch")
+
+class RerunPrefetch:
+    """
+    한 번의 리런에 필요한 서로 독립적인 조회(OHLCV, 선물 캔들, 관심종목 시세 등)를
+    스크립트 맨 위에서 한꺼번에 시작해 두고, 각 화면 영역에서 get() 으로 결과를 꺼내 씁니다.
+    리런 지연 시간이 조회 시간의 합이 아니라 가장 느린 조회 하나의 시간으로 줄어듭니다.
+
+    조회 함수 안에서는 st.* 를 호출하지 않아야 합니다. (스크립트 스레드가 아니므로)
+    """
+    def __init__(self, pool=None):
+        self._pool = pool or _pool
+        self._calls = {}
+
+    def submit(self, key, func, *args, **kwargs):
+        """조회를 백그라운드로 시작합니다. (조회 중 기록된 구간은 이 리런의 진단 기록에 함께 남음)"""
+        future = self._pool.submit(metrics.bind(func), *args, **kwargs)
+        self._calls[key] = ((func, args, kwargs), future)
+
+    def get(self, key, func, *args, **kwargs):
+        """
+        같은 인자로 미리 시작한 조회가 있으면 그 결과를, 없으면 (리런 도중 입력이 바뀐 경우 등) 바로 조회한 결과를 반환합니다.
+        조회 중 발생한 예외는 그대로 다시 발생합니다.
+        """
+        call = self._calls.pop(key, None)
+        if call is not None and call[0] == (func, args, kwargs):
+            return call[1].result(timeout=settings.PREFETCH_TIMEOUT)
+        return func(*args, **kwargs)
@@ -0,0 +1,181 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import settings
+from cache import market_cache
+from clients import get_binance_client
+from governor import upstream
+from lazy import lazy_import
+from metrics import metrics
+from naver_parser import fetch_item_quote
+from symbols import krx_index, upbit_index, binance_futures_index
+
+pyupbit = lazy_import("pyupbit")
+
+# ----------------------
+# 관심종목 일괄 시세 조회
+# ----------------------
+VENUES = ("krx", "upbit", "binance")
+
+# 네이버 종목 페이지 동시 조회용 스레드 풀 (프로세스 공용)
+_naver_pool = ThreadPoolExecutor(max_workers=settings.NAVER_MAX_WORKERS, thread_name_prefix="naver-quote")
+
+def parse_watch_item(text):
+    """
+    "upbit:BTC", "binance:ETH", "krx:삼성전자", "005930" 형태의 문자열을 (거래소, 검색어)로 바꿉니다.
+    거래소를 생략하면 krx 로 간주합니다.
+    """
+    text = text.strip()
+    venue, sep, query = text.partition(":")
+    if sep and venue.strip().lower() in VENUES:
+        return venue.strip().lower(), query.strip()
+    return "krx", text
+
+def parse_watchlist(text):
+    """쉼표로 구분된 관심종목 입력을 항목 목록으로 나눕니다."""
+    return [item.strip() for item in text.split(",") if item.strip()]
+
+def _resolve(venue, query):
+    """검색어를 거래소별 심볼로 바꿉니다. 반환: (심볼, 이름) / 못 찾으면 (None, None)"""
+    if venue == "krx":
+        if query.isdigit() and len(query) == 6:
+            name = krx_index.name_of(query)
+            return (query, name) if name else (None, None)
+        found = krx_index.find(query)
+        return found if found else (None, None)
+    if venue == "upbit":
+        market = upbit_index.find(query)
+        if market is None:
+            return None, None
+        info = upbit_index.info(market) or {}
+        return market, info.get("korean_name", market)
+    symbol = binance_futures_index.find(query)
+    return (symbol, symbol) if symbol else (None, None)
+
+def _upbit_prices(markets):
+    # 캐시에 없는(만료된) 마켓만 모아서 한 번에 조회
+    prices = {}
+    missing = []
+    for market in markets:
+        price = market_cache.get("quote", ("upbit", market))
+        if price is None:
+            missing.append(market)
+        else:
+            prices[market] = price
+    if not missing:
+        return prices
+    fetched = upstream.call("upbit", ("price", tuple(missing)), pyupbit.get_current_price, missing)
+    # 티커가 1개면 숫자 하나, 여러 개면 {마켓: 가격} 으로 반환됨
+    if not isinstance(fetched, dict):
+        fetched = {missing[0]: fetched}
+    for market, price in fetched.items():
+        market_cache.put("quote", ("upbit", market), price)
+    prices.update(fetched)
+    return prices
+
+def upbit_price(market):
+    """업비트 마켓 하나의 현재가 (공유 캐시 사용). 조회 실패 시 None"""
+    return _upbit_prices([market]).get(market)
+
+def _binance_prices(symbols):
+    if not symbols:
+        return {}
+    # 심볼 없이 호출하면 전체 선물 현재가를 한 번에 반환
+    tickers = market_cache.fetch("quote", ("binance", "ticker_price"), upstream.call,
+                                 "binance", ("ticker_price",), get_binance_client().futures_symbol_ticker, weight=2)
+    wanted = set(symbols)
+    return {t["symbol"]: float(t["price"]) for t in tickers if t["symbol"] in wanted}
+
+def _naver_prices(codes):
+    prices = {}
+    for code, result in zip(codes, _naver_pool.map(metrics.bind(_safe_naver_quote), codes)):
+        prices[code] = result
+    return prices
+
+def _safe_naver_quote(code):
+    try:
+        _, price = fetch_item_quote(code)
+        return price
+    except Exception:
+        return None
+
+def get_watchlist_quotes(items):
+    """
+    여러 거래소의 관심종목 시세를 한 번에 조회합니다.
+    items: [(거래소, 검색어), ...] 또는 parse_watch_item 형식의 문자열 목록
+    반환: 입력 순서대로 {"venue", "query", "symbol", "name", "price"} 목록 (조회 실패 시 price=-1)
+
+    거래소별로 묶어서 업비트는 현재가 일괄 조회, 바이낸스는 전체 선물 현재가 1회 조회를 사용하고,
+    일괄 API가 없는 네이버는 스레드 풀로 동시에 조회합니다. 세 거래소 조회도 서로 병렬로 진행합니다.
+    """
+    rows = []
+    for item in items:
+        venue, query = parse_watch_item(item) if isinstance(item, str) else item
+        try:
+            symbol, name = _resolve(venue, query)
+        except Exception:
+            symbol, name = None, None
+        rows.append({"venue": venue, "query": query, "symbol": symbol, "name": name, "price": -1})
+
+    by_venue = {venue: [] for venue in VENUES}
+    for row in rows:
+        if row["symbol"] and row["symbol"] not in by_venue[row["venue"]]:
+            by_venue[row["venue"]].append(row["symbol"])
+
+    fetchers = {"krx": _naver_prices, "upbit": _upbit_prices, "binance": _binance_prices}
+    with ThreadPoolExecutor(max_workers=len(VENUES)) as pool:
+        futures = {venue: pool.submit(metrics.bind(fetchers[venue]), by_venue[venue]) for venue in VENUES}
+    prices = {}
+    for venue, future in futures.items():
+        try:
+            prices[venue] = future.result()
+        except Exception:
+            prices[venue] = {}
+
+    for row in rows:
+        price = prices[row["venue"]].get(row["symbol"])
+        if price is not None:
+            row["price"] = price
+    return rows
+
+# ----------------------
+# 단일 종목 시세 조회 (화면/전략/워커 공용, Streamlit 없이 사용)
+# ----------------------
+# 찾지 못하거나 가격을 받지 못하면 ValueError (메시지는 화면에 그대로 표시할 수 있는 문장)
+def stock_quote(query):
+    """종목명 또는 6자리 종목코드로 (종목명, 현재가, 종목코드)를 조회합니다."""
+    query = query.strip()
+    if query.isdigit() and len(query) == 6:
+        code = query
+        name = krx_index.name_of(code)
+        if name is None:
+            raise ValueError("해당 종목 코드를 찾을 수 없습니다.")
+    else:
+        # 한글 종목명 검색 (대소문자 구분 없이, 정확히 일치 -> 접두어 -> 부분 일치 순)
+        found = krx_index.find(query)
+        if found is None:
+            raise ValueError("해당 종목을 찾을 수 없습니다.")
+        code, name = found
+    _, price = fetch_item_quote(code)
+    if price is None:
+        raise ValueError("주식 현재가를 가져오지 못했습니다.")
+    return name, price, code
+
+def crypto_quote(query):
+    """업비트 KRW 마켓을 한글명/영문명/심볼로 찾아 (마켓, 현재가)를 조회합니다."""
+    market = upbit_index.find(query)
+    if market is None:
+        raise ValueError("해당 코인을 찾을 수 없습니다. 예: BTC, ETH 또는 비트코인, 이더리움 등")
+    price = upbit_price(market)
+    if price is None:
+        raise ValueError("코인 현재가를 가져오지 못했습니다.")
+    return market, price
+
+def futures_quote(query):
+    """바이낸스 USDT 선물 심볼을 찾아 (심볼, 현재가)를 조회합니다. (전체 현재가 1회 조회를 세션들이 공유)"""
+    symbol = binance_futures_index.find(query)
+    if symbol is None:
+        raise ValueError("해당 선물 심볼을 찾을 수 없습니다.")
+    price = _binance_prices([symbol]).get(symbol)
+    if price is None:
+        raise ValueError("선물 현재가를 가져오지 못했습니다.")
+    return symbol, price
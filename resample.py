@@ -0,0 +1,108 @@
+import threading
+
+import numpy as np
+
+from candles import FIELDS, CandleBuffer, candle_buffers
+
+# ----------------------
+# 1분봉 -> 상위 주기 캔들 변환
+# ----------------------
+# 주기 이름 -> 길이 (ms). 일봉은 UTC 00:00 (= KST 09:00, 업비트 일봉 기준) 으로 자릅니다.
+TIMEFRAMES = {
+    "1m": 60_000,
+    "5m": 5 * 60_000,
+    "15m": 15 * 60_000,
+    "1h": 60 * 60_000,
+    "1d": 24 * 60 * 60_000,
+}
+
+def resample_ohlcv(view, timeframe):
+    """
+    1분봉 컬럼 배열(CandleBuffer.view() 형식)을 상위 주기 캔들로 묶습니다. (전부 numpy 벡터 연산)
+    반환도 같은 형식의 dict 입니다.
+    """
+    ts = view["timestamp"]
+    if len(ts) == 0:
+        return {"timestamp": ts, **{f: view[f][:0] for f in FIELDS}}
+    size = TIMEFRAMES[timeframe]
+    bucket = ts - ts % size
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(bucket)) + 1))
+    ends = np.append(starts[1:], len(ts)) - 1
+    return {
+        "timestamp": bucket[starts],
+        "open": view["open"][starts],
+        "high": np.maximum.reduceat(view["high"], starts),
+        "low": np.minimum.reduceat(view["low"], starts),
+        "close": view["close"][ends],
+        "volume": np.add.reduceat(view["volume"], starts),
+    }
+
+class TimeframeAggregator:
+    """
+    1분봉 버퍼를 따라가며 상위 주기 버퍼를 유지합니다.
+    처음에는 전체를 한 번에 변환하고, 이후에는 마지막으로 반영한 1분봉이 속한 상위 봉부터만 다시 계산하므로
+    새 1분봉이 들어올 때 드는 비용이 전체 기간이 아니라 현재 상위 봉 안의 1분봉 개수에 비례합니다.
+
+    1분봉 기록이 상위 봉 중간부터 시작하면 첫 상위 봉은 일부 구간만 담고 있으므로 만들지 않습니다.
+    (예: 1분봉 200개로 일봉을 만들면 3시간짜리 봉이 일봉처럼 보임) 완성된 상위 봉은 그다음 구간부터 쌓입니다.
+    """
+    def __init__(self, source, timeframe, capacity=None):
+        self.source = source
+        self.timeframe = timeframe
+        self.target = CandleBuffer(capacity or source.capacity)
+        self._lock = threading.Lock()
+        self._synced_ts = None
+        self.complete_from = None   # 1분봉 기록이 처음부터 끝까지 덮는 첫 상위 봉의 시작 시각
+
+    def sync(self):
+        """새로 들어오거나 갱신된 1분봉을 상위 주기 버퍼에 반영하고, 상위 주기 버퍼를 반환합니다."""
+        with self._lock:
+            view = self.source.view()
+            ts = view["timestamp"]
+            if len(ts) == 0:
+                return self.target
+            size = TIMEFRAMES[self.timeframe]
+            if self.complete_from is None:
+                first = int(ts[0])
+                self.complete_from = first if first % size == 0 else first - first % size + size
+            if self._synced_ts is not None:
+                # 진행 중이던 1분봉이 제자리 갱신되었을 수 있으므로 그 봉이 속한 상위 봉 시작부터 다시 계산
+                start = np.searchsorted(ts, self._synced_ts - self._synced_ts % size)
+                view = {k: v[start:] for k, v in view.items()}
+            bars = resample_ohlcv(view, self.timeframe)
+            # 일부 구간만 담긴 첫 상위 봉은 버림 (증분 계산 때도 다시 들어오지 않도록 매번 확인)
+            complete = bars["timestamp"] >= self.complete_from
+            if not complete.all():
+                bars = {k: v[complete] for k, v in bars.items()}
+            self.target.extend(bars["timestamp"], **{f: bars[f] for f in FIELDS})
+            self._synced_ts = int(ts[-1])
+            return self.target
+
+class AggregatorRegistry:
+    """(거래소, 심볼, 주기)별 TimeframeAggregator 를 프로세스 전체에서 공유합니다."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._aggregators = {}
+
+    def get(self, venue, symbol, timeframe):
+        key = (venue, symbol, timeframe)
+        with self._lock:
+            aggregator = self._aggregators.get(key)
+            if aggregator is None:
+                source = candle_buffers.get(venue, symbol, "1m")
+                aggregator = self._aggregators[key] = TimeframeAggregator(source, timeframe)
+            return aggregator
+
+
+aggregators = AggregatorRegistry()
+
+def timeframe_buffer(venue, symbol, timeframe):
+    """
+    요청한 주기의 캔들 버퍼를 반환합니다. 1m 이면 원본 버퍼를 그대로, 그 외에는 로컬 1분봉으로 만든 버퍼를 반환합니다.
+    추가 API 요청이 없으므로 주기를 바꿔도 바로 표시할 수 있습니다.
+    상위 주기 버퍼에는 1분봉 기록이 온전히 덮는 봉만 들어가므로, 기록이 짧으면 비어 있을 수 있습니다.
+    (1분봉 버퍼는 CANDLE_CAPACITY 개까지라 일봉은 최근 며칠치만 만들어짐)
+    """
+    if timeframe == "1m":
+        return candle_buffers.get(venue, symbol, "1m")
+    return aggregators.get(venue, symbol, timeframe).sync()
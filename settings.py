@@ -0,0 +1,100 @@
+import os
+
+# ----------------------
+# 공통 설정 (환경변수로 덮어쓸 수 있음)
+# ----------------------
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 종목 목록 등 디스크 캐시를 저장할 폴더
+CACHE_DIR = os.environ.get("WEBCOSTOCK_CACHE_DIR", os.path.join(BASE_DIR, ".cache"))
+
+# KRX 종목 목록 갱신 주기 (초) - 상장/폐지는 하루 단위라 길게 잡음
+KRX_LISTING_TTL = int(os.environ.get("WEBCOSTOCK_KRX_TTL", 6 * 60 * 60))
+
+# 업비트 KRW 마켓 목록 갱신 주기 (초) - 신규 상장 반영용
+UPBIT_MARKETS_TTL = int(os.environ.get("WEBCOSTOCK_UPBIT_TTL", 10 * 60))
+
+# 바이낸스 선물 심볼(exchangeInfo) 갱신 주기 (초)
+BINANCE_FUTURES_TTL = int(os.environ.get("WEBCOSTOCK_BINANCE_TTL", 30 * 60))
+
+# 공용 HTTP 커넥션 풀 크기 (호스트 수 / 호스트당 최대 연결 수)
+HTTP_POOL_CONNECTIONS = int(os.environ.get("WEBCOSTOCK_HTTP_POOL_CONNECTIONS", 4))
+HTTP_POOL_MAXSIZE = int(os.environ.get("WEBCOSTOCK_HTTP_POOL_MAXSIZE", 16))
+
+# 네이버 금융 요청 타임아웃 (초) - 연결 / 응답 읽기
+NAVER_CONNECT_TIMEOUT = float(os.environ.get("WEBCOSTOCK_NAVER_CONNECT_TIMEOUT", 3))
+NAVER_READ_TIMEOUT = float(os.environ.get("WEBCOSTOCK_NAVER_READ_TIMEOUT", 5))
+
+# 네이버 종목 페이지 동시 조회 스레드 수 (관심종목 일괄 조회)
+NAVER_MAX_WORKERS = int(os.environ.get("WEBCOSTOCK_NAVER_MAX_WORKERS", 8))
+
+# 리런 단위 동시 조회 스레드 수 / 결과 대기 시간 (초)
+PREFETCH_MAX_WORKERS = int(os.environ.get("WEBCOSTOCK_PREFETCH_MAX_WORKERS", 16))
+PREFETCH_TIMEOUT = float(os.environ.get("WEBCOSTOCK_PREFETCH_TIMEOUT", 20))
+
+# WebSocket 실시간 시세 사용 여부 / ping 주기 (초) / 재연결 최대 대기 (초)
+STREAMING_ENABLED = os.environ.get("WEBCOSTOCK_STREAMING", "1") != "0"
+STREAM_PING_INTERVAL = float(os.environ.get("WEBCOSTOCK_STREAM_PING_INTERVAL", 20))
+STREAM_MAX_BACKOFF = float(os.environ.get("WEBCOSTOCK_STREAM_MAX_BACKOFF", 30))
+
+# 심볼별 캔들 버퍼 크기 / 최초 로드 봉 수 / 차트에 표시할 봉 수
+CANDLE_CAPACITY = int(os.environ.get("WEBCOSTOCK_CANDLE_CAPACITY", 5000))
+CANDLE_INITIAL_BARS = int(os.environ.get("WEBCOSTOCK_CANDLE_INITIAL_BARS", 200))
+CHART_WINDOW = int(os.environ.get("WEBCOSTOCK_CHART_WINDOW", 30))
+
+# 차트 한 개에 그릴 최대 봉 수 (넘으면 봉을 묶어서 표시) / 차트 스펙 캐시 개수
+CHART_MAX_POINTS = int(os.environ.get("WEBCOSTOCK_CHART_MAX_POINTS", 300))
+CHART_CACHE_SIZE = int(os.environ.get("WEBCOSTOCK_CHART_CACHE_SIZE", 64))
+
+# 로컬 시계열 저장소 폴더 / 마감된 1분봉을 저장소에 기록할지 여부
+DATA_DIR = os.environ.get("WEBCOSTOCK_DATA_DIR", os.path.join(BASE_DIR, "data"))
+PERSIST_CANDLES = os.environ.get("WEBCOSTOCK_PERSIST_CANDLES", "1") != "0"
+
+# 백그라운드 전략 실행기: 전략별로 보관할 최근 체결 기록 수
+STRATEGY_LOG_SIZE = int(os.environ.get("WEBCOSTOCK_STRATEGY_LOG_SIZE", 200))
+
+# 가상 계좌 저장 (SQLite WAL journal + 스냅샷): DB 경로 / 스냅샷 간격(기록 수) / 메모리에 둘 최근 장부 수
+ACCOUNT_DB = os.environ.get("WEBCOSTOCK_ACCOUNT_DB", os.path.join(DATA_DIR, "accounts.db"))
+SNAPSHOT_EVERY = int(os.environ.get("WEBCOSTOCK_SNAPSHOT_EVERY", 1000))
+LEDGER_MEMORY = int(os.environ.get("WEBCOSTOCK_LEDGER_MEMORY", 1000))
+# 계좌 캐시: 메모리에 붙잡아 둘 최근 계좌 수 / 이 시간(초) 동안 열지 않은 계좌는 내려놓음
+# (세션이 아직 쓰는 계좌는 그대로 공유되고, 아무도 쓰지 않는 계좌만 해제된 뒤 다음에 열 때 journal 에서 복구)
+ACCOUNT_CACHE = int(os.environ.get("WEBCOSTOCK_ACCOUNT_CACHE", 256))
+ACCOUNT_IDLE = float(os.environ.get("WEBCOSTOCK_ACCOUNT_IDLE", 1800))
+
+# 예약 주문: 계좌별로 체결/취소된 주문을 목록에 남겨 둘 건수 (대기 중인 주문은 모두 유지)
+ORDER_HISTORY = int(os.environ.get("WEBCOSTOCK_ORDER_HISTORY", 200))
+
+# 선물 증거금 엔진: 유지 증거금률 / 거래 수수료율(테이커) / 최대 레버리지
+FUTURES_MMR = float(os.environ.get("WEBCOSTOCK_FUTURES_MMR", 0.004))
+FUTURES_FEE_RATE = float(os.environ.get("WEBCOSTOCK_FUTURES_FEE_RATE", 0.0004))
+FUTURES_MAX_LEVERAGE = int(os.environ.get("WEBCOSTOCK_FUTURES_MAX_LEVERAGE", 125))
+
+# 실행 로그: 세션별 보관 건수 / 한 페이지 표시 건수 / 파일 기록 경로(비우면 기록 안 함), 파일 최대 크기(바이트), 백업 파일 수
+EXEC_LOG_SIZE = int(os.environ.get("WEBCOSTOCK_EXEC_LOG_SIZE", 500))
+EXEC_LOG_PAGE_SIZE = int(os.environ.get("WEBCOSTOCK_EXEC_LOG_PAGE_SIZE", 20))
+EXEC_LOG_FILE = os.environ.get("WEBCOSTOCK_EXEC_LOG_FILE", "")
+EXEC_LOG_FILE_BYTES = int(os.environ.get("WEBCOSTOCK_EXEC_LOG_FILE_BYTES", 5 * 1024 * 1024))
+EXEC_LOG_FILE_BACKUPS = int(os.environ.get("WEBCOSTOCK_EXEC_LOG_FILE_BACKUPS", 3))
+
+# 외부 API 호출 제한 (호스트별 초당 토큰 수 / 최대 버스트). 바이낸스는 요청 weight 기준 (분당 2400 weight 의 절반)
+UPSTREAM_LIMITS = {
+    "upbit": (float(os.environ.get("WEBCOSTOCK_UPBIT_RATE", 8)), float(os.environ.get("WEBCOSTOCK_UPBIT_BURST", 10))),
+    "binance": (float(os.environ.get("WEBCOSTOCK_BINANCE_RATE", 20)), float(os.environ.get("WEBCOSTOCK_BINANCE_BURST", 40))),
+    "naver": (float(os.environ.get("WEBCOSTOCK_NAVER_RATE", 10)), float(os.environ.get("WEBCOSTOCK_NAVER_BURST", 10))),
+    "krx": (float(os.environ.get("WEBCOSTOCK_KRX_RATE", 2)), float(os.environ.get("WEBCOSTOCK_KRX_BURST", 4))),
+}
+
+# 프로세스 공유 시세 캐시: 최대 크기(바이트) / 종류별 신선도(초) - 현재가, 분봉 증분 조회, 차트 원본
+MARKET_CACHE_BYTES = int(os.environ.get("WEBCOSTOCK_MARKET_CACHE_BYTES", 64 * 1024 * 1024))
+MARKET_CACHE_TTLS = {
+    "quote": float(os.environ.get("WEBCOSTOCK_QUOTE_TTL", 2)),
+    "candle": float(os.environ.get("WEBCOSTOCK_CANDLE_TTL", 5)),
+    "chart": float(os.environ.get("WEBCOSTOCK_CHART_TTL", 30)),
+}
+
+# 계측: 구간 시간 기록 여부 / 수집용 엔드포인트 주소와 포트 (0 이면 열지 않음) / 진단 패널 항상 표시 (끄면 주소에 ?diagnostics=1 일 때만)
+METRICS_ENABLED = os.environ.get("WEBCOSTOCK_METRICS", "1") != "0"
+METRICS_HOST = os.environ.get("WEBCOSTOCK_METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.environ.get("WEBCOSTOCK_METRICS_PORT", 0))
+DIAGNOSTICS_PANEL = os.environ.get("WEBCOSTOCK_DIAGNOSTICS", "0") != "0"
@@ -0,0 +1,187 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+import settings
+
+# ----------------------
+# 로컬 컬럼형 시계열 저장소
+# ----------------------
+# 경로: {DATA_DIR}/{거래소}/{심볼}/{주기}/{파티션}/{컬럼}.{버전}.npy
+# 분봉은 하루(2024-05-28), 일봉은 1년(2024) 단위로 파티션을 나눕니다. (일봉을 하루 단위로 나누면 파일당 1행이 되므로)
+# 각 컬럼은 .npy 파일 하나이며, 읽을 때 mmap 으로 열어 필요한 구간만 디스크에서 읽습니다.
+# 파티션을 고쳐 쓸 때는 모든 컬럼을 새 버전 파일로 다 쓴 뒤 _commit 파일 하나만 원자적으로 바꿔서 새 버전을 가리키게 하므로,
+# 쓰는 도중 중단되어도 읽는 쪽은 항상 컬럼 길이가 맞는 이전 버전이나 새 버전 중 하나를 봅니다.
+COLUMNS = ("timestamp", "open", "high", "low", "close", "volume")
+_COMMIT_FILE = "_commit"
+
+def _partition_unit(interval):
+    return "Y" if interval.endswith("d") else "D"
+
+def _partition_names(timestamps, interval):
+    unit = _partition_unit(interval)
+    return np.asarray(timestamps, dtype="datetime64[ms]").astype(f"datetime64[{unit}]").astype(str)
+
+def _safe_symbol(symbol):
+    return symbol.replace("/", "_").replace("\\", "_")
+
+def _committed_version(path):
+    """파티션의 커밋된 버전. _commit 이 없으면 None (버전 없이 {컬럼}.npy 로 저장된 이전 형식)"""
+    try:
+        with open(os.path.join(path, _COMMIT_FILE), encoding="ascii") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+def _column_path(path, col, version):
+    return os.path.join(path, f"{col}.npy" if version is None else f"{col}.{version}.npy")
+
+def _save_synced(path, array):
+    with open(path, "wb") as f:
+        np.save(f, array)
+        f.flush()
+        os.fsync(f.fileno())
+
+class ColumnStore:
+    """거래소/심볼/주기별 OHLCV 를 컬럼 단위 .npy 파일로 저장하고 읽습니다. (timestamp: epoch ms, UTC)"""
+    def __init__(self, root):
+        self.root = root
+        self._lock = threading.Lock()
+
+    def _series_dir(self, venue, symbol, interval):
+        return os.path.join(self.root, venue, _safe_symbol(symbol), interval)
+
+    def symbols(self, venue, interval):
+        """해당 거래소/주기로 저장된 심볼 목록을 반환합니다."""
+        path = os.path.join(self.root, venue)
+        if not os.path.isdir(path):
+            return []
+        return sorted(name for name in os.listdir(path) if os.path.isdir(os.path.join(path, name, interval)))
+
+    def partitions(self, venue, symbol, interval):
+        """저장된 파티션 이름 목록을 시간순으로 반환합니다."""
+        path = self._series_dir(venue, symbol, interval)
+        if not os.path.isdir(path):
+            return []
+        return sorted(name for name in os.listdir(path) if os.path.isdir(os.path.join(path, name)))
+
+    def _load_partition(self, path, mmap=True):
+        mode = "r" if mmap else None
+        version = _committed_version(path)
+        try:
+            data = {col: np.load(_column_path(path, col, version), mmap_mode=mode) for col in COLUMNS}
+        except (OSError, ValueError):
+            return None
+        # 이전 형식 파티션이 쓰는 도중 중단되어 컬럼 길이가 다르면 행이 어긋나므로 읽지 않음
+        if len({len(v) for v in data.values()}) > 1:
+            return None
+        return data
+
+    def write(self, venue, symbol, interval, timestamps, **columns):
+        """
+        봉 데이터를 저장합니다. 같은 시각의 봉이 이미 있으면 새 값으로 덮어씁니다.
+        columns: open/high/low/close/volume 배열
+        """
+        ts = np.asarray(timestamps, dtype=np.int64)
+        if len(ts) == 0:
+            return
+        values = {"timestamp": ts}
+        values.update({col: np.asarray(columns[col], dtype=np.float64) for col in COLUMNS[1:]})
+        order = np.argsort(ts, kind="stable")
+        values = {col: v[order] for col, v in values.items()}
+        names = _partition_names(values["timestamp"], interval)
+        bounds = np.flatnonzero(names[1:] != names[:-1]) + 1
+        base = self._series_dir(venue, symbol, interval)
+        with self._lock:
+            for start, end in zip(np.r_[0, bounds], np.r_[bounds, len(names)]):
+                path = os.path.join(base, names[start])
+                part = {col: v[start:end] for col, v in values.items()}
+                existing = self._load_partition(path, mmap=False) if os.path.isdir(path) else None
+                if existing is not None:
+                    part = _merge(existing, part)
+                self._write_partition(path, part)
+
+    def _write_partition(self, path, part):
+        os.makedirs(path, exist_ok=True)
+        old = _committed_version(path)
+        version = str(int(old) + 1) if old and old.isdigit() else "1"
+        for col in COLUMNS:
+            _save_synced(_column_path(path, col, version), part[col])
+        # 모든 컬럼을 다 쓴 뒤 커밋 파일을 한 번에 바꿔서 새 버전을 가리키게 함
+        tmp_path = os.path.join(path, _COMMIT_FILE + ".tmp")
+        with open(tmp_path, "w", encoding="ascii") as f:
+            f.write(version)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, os.path.join(path, _COMMIT_FILE))
+        # 이전 버전 / 중단된 쓰기의 파일 정리 (Windows 에서 mmap 으로 열린 파일은 지워지지 않으므로 다음 쓰기 때 다시 시도)
+        keep = {os.path.basename(_column_path(path, col, version)) for col in COLUMNS}
+        for name in os.listdir(path):
+            if name.endswith(".npy") and name not in keep:
+                try:
+                    os.remove(os.path.join(path, name))
+                except OSError:
+                    pass
+
+    def read(self, venue, symbol, interval, start=None, end=None):
+        """
+        [start, end] 구간(epoch ms, 생략 시 전체)의 컬럼 배열 dict 를 반환합니다.
+        파티션이 하나면 mmap 배열의 슬라이스(복사 없음), 여러 개면 이어 붙인 배열입니다.
+        """
+        parts = self.partitions(venue, symbol, interval)
+        if start is not None:
+            first = _partition_names([start], interval)[0]
+            parts = [p for p in parts if p >= first]
+        if end is not None:
+            last = _partition_names([end], interval)[0]
+            parts = [p for p in parts if p <= last]
+        base = self._series_dir(venue, symbol, interval)
+        chunks = []
+        for name in parts:
+            data = self._load_partition(os.path.join(base, name))
+            if data is None or len(data["timestamp"]) == 0:
+                continue
+            ts = data["timestamp"]
+            lo = 0 if start is None else np.searchsorted(ts, start, side="left")
+            hi = len(ts) if end is None else np.searchsorted(ts, end, side="right")
+            if hi > lo:
+                chunks.append({col: v[lo:hi] for col, v in data.items()})
+        if not chunks:
+            return {col: np.empty(0, dtype=np.int64 if col == "timestamp" else np.float64) for col in COLUMNS}
+        if len(chunks) == 1:
+            return chunks[0]
+        return {col: np.concatenate([c[col] for c in chunks]) for col in COLUMNS}
+
+    def read_frame(self, venue, symbol, interval, start=None, end=None, tz=None):
+        """read() 결과를 timestamp/open/high/low/close/volume DataFrame 으로 반환합니다."""
+        data = self.read(venue, symbol, interval, start, end)
+        timestamp = pd.to_datetime(np.asarray(data["timestamp"]), unit="ms")
+        if tz is not None:
+            timestamp = timestamp.tz_localize("UTC").tz_convert(tz).tz_localize(None)
+        frame = {"timestamp": timestamp}
+        frame.update({col: data[col] for col in COLUMNS[1:]})
+        return pd.DataFrame(frame)
+
+    def last_timestamp(self, venue, symbol, interval):
+        """저장된 마지막 봉의 시각(epoch ms)을 반환합니다. 없으면 None."""
+        parts = self.partitions(venue, symbol, interval)
+        base = self._series_dir(venue, symbol, interval)
+        for name in reversed(parts):
+            data = self._load_partition(os.path.join(base, name))
+            if data is not None and len(data["timestamp"]):
+                return int(data["timestamp"][-1])
+        return None
+
+def _merge(existing, new):
+    # 기존 + 신규를 이어 붙인 뒤 같은 시각은 신규(뒤쪽) 값을 남기고 시간순 정렬
+    combined = {col: np.concatenate([existing[col], new[col]]) for col in COLUMNS}
+    ts = combined["timestamp"]
+    _, first_in_reversed = np.unique(ts[::-1], return_index=True)
+    keep = len(ts) - 1 - first_in_reversed
+    return {col: v[keep] for col, v in combined.items()}
+
+
+# 프로세스 전체에서 공유하는 저장소
+column_store = ColumnStore(settings.DATA_DIR)
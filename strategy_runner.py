@@ -0,0 +1,213 @@
+import math
+import time
+import uuid
+import threading
+from collections import deque
+
+import settings
+from account import instrument
+from indicators import SMA
+from streaming import market_stream, tick_store
+
+# ----------------------
+# 전략 정의
+# ----------------------
+class Strategy:
+    """
+    실시간 전략의 기본 클래스. 각 메서드는 "buy" / "sell" / None 을 반환합니다.
+    on_tick: 새 체결가, on_candle: 1분봉 마감(마감된 봉 dict), on_timer: interval 초마다 호출
+    """
+    interval = None
+
+    def on_tick(self, price, ts):
+        return None
+
+    def on_candle(self, candle):
+        return None
+
+    def on_timer(self, now):
+        return None
+
+class SmaCrossStrategy(Strategy):
+    """마감된 1분봉 종가의 단기 이동평균이 장기 이동평균 위로 올라가면 매수, 아래로 내려가면 매도합니다."""
+    def __init__(self, fast=5, slow=20):
+        # 이동평균은 봉마다 O(1) 로 갱신되는 indicators.SMA 사용
+        self._fast = SMA(fast)
+        self._slow = SMA(slow)
+        self._above = None
+
+    def on_candle(self, candle):
+        fast = self._fast.update(candle)[self._fast.outputs[0]]
+        slow = self._slow.update(candle)[self._slow.outputs[0]]
+        if math.isnan(fast) or math.isnan(slow):
+            return None
+        above = fast > slow
+        previous, self._above = self._above, above
+        if previous is None or previous == above:
+            return None
+        return "buy" if above else "sell"
+
+STRATEGIES = {
+    "sma_cross": SmaCrossStrategy,
+}
+
+# ----------------------
+# 백그라운드 전략 실행기
+# ----------------------
+class StrategyJob:
+    """실행기에 등록된 전략 하나. 매수는 amount 원어치, 매도는 보유 수량 전량입니다."""
+    def __init__(self, strategy, account, venue, symbol, amount):
+        self.id = uuid.uuid4().hex[:8]
+        self.strategy = strategy
+        self.account = account
+        self.venue = venue
+        self.symbol = symbol
+        self.amount = amount
+        self.log = deque(maxlen=settings.STRATEGY_LOG_SIZE)
+        self.errors = 0
+        self.last_error = None
+        self.next_timer = time.monotonic() + strategy.interval if strategy.interval else None
+
+    def status(self):
+        return {
+            "id": self.id,
+            "strategy": type(self.strategy).__name__,
+            "venue": self.venue,
+            "symbol": self.symbol,
+            "amount": self.amount,
+            "fills": len(self.log),
+            "errors": self.errors,
+            "last_error": self.last_error,
+        }
+
+class StrategyRunner:
+    """
+    체결/캔들이 들어올 때마다 등록된 전략을 평가해 VirtualAccount 에 주문을 넣는 백그라운드 스레드.
+    Streamlit 리런이나 브라우저 탭과 무관하게 동작하며, 신호에서 체결까지의 지연은 스트림 수신 시점부터 측정합니다.
+
+    스트리밍 스레드의 listener 는 이벤트를 넣기만 하고, 평가는 이 실행기 스레드에서 합니다.
+    체결가는 심볼별 최신 값만 남기고(밀린 체결은 건너뜀), 마감된 봉은 빠짐없이 순서대로 전달합니다.
+    """
+    def __init__(self, store, stream):
+        self.store = store
+        self.stream = stream
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._jobs = {}
+        self._ticks = {}     # (venue, symbol) -> (tick, 수신 시각)
+        self._closed = []    # [(venue, symbol, 마감 봉, 수신 시각)]
+        self._open_candles = {}
+        self._thread = None
+
+    def register(self, strategy, account, venue, symbol, amount):
+        """전략을 등록하고 job id 를 반환합니다. 해당 심볼 스트림 구독과 실행기 스레드를 시작합니다."""
+        job = StrategyJob(strategy, account, venue, symbol, amount)
+        with self._lock:
+            self._jobs[job.id] = job
+            if self._thread is None:
+                self.store.add_listener(self._on_event)
+                self._thread = threading.Thread(target=self._run, daemon=True, name="strategy-runner")
+                self._thread.start()
+            self._wakeup.notify()
+        if settings.STREAMING_ENABLED:
+            self.stream.subscribe(venue, symbol)
+        return job.id
+
+    def unregister(self, job_id):
+        with self._lock:
+            return self._jobs.pop(job_id, None) is not None
+
+    def jobs(self):
+        with self._lock:
+            return [job.status() for job in self._jobs.values()]
+
+    def fills(self, job_id):
+        """job 의 최근 체결 기록(오래된 순)을 반환합니다."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return list(job.log) if job else []
+
+    def _on_event(self, kind, venue, symbol, data):
+        # 스트리밍 스레드에서 호출됨
+        received = time.monotonic()
+        key = (venue, symbol)
+        with self._lock:
+            if kind == "tick":
+                self._ticks[key] = (data, received)
+            elif kind == "candle":
+                # 업비트 캔들에는 마감 표시가 없으므로 시작 시각이 바뀌면 직전 봉이 마감된 것으로 봄
+                previous = self._open_candles.get(key)
+                if data.get("closed"):
+                    self._closed.append((venue, symbol, data, received))
+                    self._open_candles.pop(key, None)
+                else:
+                    if previous is not None and data["timestamp"] > previous["timestamp"]:
+                        self._closed.append((venue, symbol, dict(previous, closed=True), received))
+                    self._open_candles[key] = data
+            self._wakeup.notify()
+
+    def _next_timeout(self):
+        timers = [job.next_timer for job in self._jobs.values() if job.next_timer is not None]
+        return max(0.0, min(timers) - time.monotonic()) if timers else None
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self._ticks and not self._closed:
+                    timeout = self._next_timeout()
+                    if timeout == 0.0 or not self._wakeup.wait(timeout):
+                        break
+                ticks, self._ticks = self._ticks, {}
+                closed, self._closed = self._closed, []
+                jobs = list(self._jobs.values())
+            for venue, symbol, candle, received in closed:
+                for job in jobs:
+                    if (job.venue, job.symbol) == (venue, symbol):
+                        self._evaluate(job, job.strategy.on_candle, (candle,), candle["close"], received)
+            for (venue, symbol), (tick, received) in ticks.items():
+                for job in jobs:
+                    if (job.venue, job.symbol) == (venue, symbol):
+                        # 계좌 평가용 최신가 갱신 (O(1))
+                        job.account.update_price(instrument(venue, symbol), tick["price"])
+                        self._evaluate(job, job.strategy.on_tick, (tick["price"], tick["ts"]), tick["price"], received)
+            now = time.monotonic()
+            for job in jobs:
+                if job.next_timer is not None and job.next_timer <= now:
+                    job.next_timer = now + job.strategy.interval
+                    price = self.store.latest_price(job.venue, job.symbol)
+                    if price is not None:
+                        self._evaluate(job, job.strategy.on_timer, (time.time(),), price, now)
+
+    def _evaluate(self, job, handler, args, price, received):
+        try:
+            side = handler(*args)
+            if side:
+                self._execute(job, side, price, received)
+        except Exception as e:
+            job.errors += 1
+            job.last_error = str(e)
+
+    def _execute(self, job, side, price, received):
+        # 체결가는 가장 최근 실시간 체결가 (없으면 신호를 만든 가격)
+        price = self.store.latest_price(job.venue, job.symbol) or price
+        key = instrument(job.venue, job.symbol)
+        with job.account.lock:
+            if side == "buy":
+                qty = job.amount / price
+                ok = job.account.buy(key, price, qty)
+            else:
+                position = job.account.positions.get(key)
+                qty = position.qty if position else 0
+                ok = qty > 0 and job.account.sell(key, price, qty)
+        job.log.append({
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "side": side,
+            "price": price,
+            "qty": float(qty),
+            "ok": ok,
+            "latency_ms": (time.monotonic() - received) * 1000,
+        })
+
+
+# 프로세스 전체에서 공유하는 실행기 (첫 등록 시 스레드 시작)
+strategy_runner = StrategyRunner(tick_store, market_stream)
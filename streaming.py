@@ -0,0 +1,238 @@
+import json
+import uuid
+import asyncio
+import threading
+from datetime import datetime, timezone
+
+import websockets
+
+import settings
+
+# ----------------------
+# 실시간 시세 저장소 (WebSocket 으로 받은 최신 체결가 / 진행 중 캔들)
+# ----------------------
+UPBIT_WS_URL = "wss://api.upbit.com/websocket/v1"
+BINANCE_FUTURES_WS_URL = "wss://fstream.binance.com/stream"
+VENUES = ("upbit", "binance")
+
+class TickStore:
+    """
+    거래소/심볼별 최신 체결가와 진행 중인 1분 캔들을 보관합니다.
+    스트리밍 스레드가 쓰고, Streamlit 세션 스레드와 매매 로직이 읽습니다.
+    캔들: {"timestamp": 시작 시각(epoch ms, UTC), "open", "high", "low", "close", "volume", "closed"}
+    마크 가격(바이낸스 선물): {"price", "funding_rate", "next_funding"(epoch ms), "ts"}
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ticks = {}
+        self._candles = {}
+        self._marks = {}
+        self._listeners = []
+
+    def add_listener(self, listener):
+        """
+        새 체결/캔들이 들어올 때마다 listener(kind, venue, symbol, data) 를 호출합니다. (kind: "tick" / "candle" / "mark")
+        스트리밍 스레드에서 바로 호출되므로 listener 는 큐에 넣는 정도로 짧게 끝나야 합니다.
+        """
+        with self._lock:
+            self._listeners = self._listeners + [listener]
+
+    def remove_listener(self, listener):
+        with self._lock:
+            self._listeners = [l for l in self._listeners if l is not listener]
+
+    def _notify(self, kind, venue, symbol, data):
+        for listener in self._listeners:
+            try:
+                listener(kind, venue, symbol, data)
+            except Exception:
+                pass
+
+    def update_tick(self, venue, symbol, price, ts):
+        tick = {"price": price, "ts": ts}
+        with self._lock:
+            self._ticks[(venue, symbol)] = tick
+        self._notify("tick", venue, symbol, tick)
+
+    def update_candle(self, venue, symbol, candle):
+        with self._lock:
+            self._candles[(venue, symbol)] = candle
+        self._notify("candle", venue, symbol, candle)
+
+    def update_mark(self, venue, symbol, mark):
+        with self._lock:
+            self._marks[(venue, symbol)] = mark
+        self._notify("mark", venue, symbol, mark)
+
+    def tick(self, venue, symbol):
+        """최신 체결 {"price", "ts"} 를 반환합니다. 아직 받은 데이터가 없으면 None."""
+        with self._lock:
+            tick = self._ticks.get((venue, symbol))
+            return dict(tick) if tick else None
+
+    def latest_price(self, venue, symbol):
+        tick = self.tick(venue, symbol)
+        return tick["price"] if tick else None
+
+    def mark(self, venue, symbol):
+        """최신 마크 가격/펀딩 정보를 반환합니다. 아직 받은 데이터가 없으면 None."""
+        with self._lock:
+            mark = self._marks.get((venue, symbol))
+            return dict(mark) if mark else None
+
+    def candle(self, venue, symbol):
+        """진행 중인 1분 캔들을 반환합니다. 아직 받은 데이터가 없으면 None."""
+        with self._lock:
+            candle = self._candles.get((venue, symbol))
+            return dict(candle) if candle else None
+
+# ----------------------
+# 업비트 / 바이낸스 선물 WebSocket 구독
+# ----------------------
+def _utc_ms(text):
+    # 업비트 candle_date_time_utc: "2024-05-28T00:31:00"
+    return int(datetime.fromisoformat(text).replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+class MarketStream:
+    """
+    백그라운드 스레드 하나에서 asyncio 이벤트 루프를 돌리며
+    업비트(ticker, candle.1m)와 바이낸스 선물(@ticker, @kline_1m, @markPrice@1s) 채널을 구독합니다.
+    구독 목록이 바뀌면 해당 거래소 연결만 새 구독으로 다시 맺고, 끊기면 지수 백오프로 재연결합니다.
+    """
+    def __init__(self, store):
+        self.store = store
+        self._subs = {venue: set() for venue in VENUES}
+        self._lock = threading.Lock()
+        self._loop = None
+        self._changed = {}
+        self._thread = None
+
+    def subscribe(self, venue, symbol):
+        """심볼 구독을 추가합니다. 이미 구독 중이면 아무 일도 하지 않습니다."""
+        with self._lock:
+            if symbol in self._subs[venue]:
+                return
+            self._subs[venue].add(symbol)
+            self._ensure_started()
+        self._loop.call_soon_threadsafe(self._changed[venue].set)
+
+    def unsubscribe(self, venue, symbol):
+        with self._lock:
+            if symbol not in self._subs[venue]:
+                return
+            self._subs[venue].discard(symbol)
+        self._loop.call_soon_threadsafe(self._changed[venue].set)
+
+    def subscriptions(self, venue):
+        with self._lock:
+            return sorted(self._subs[venue])
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        self._loop = asyncio.new_event_loop()
+        ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(ready,), daemon=True, name="market-stream")
+        self._thread.start()
+        ready.wait()
+
+    def _run(self, ready):
+        asyncio.set_event_loop(self._loop)
+        self._changed = {venue: asyncio.Event() for venue in VENUES}
+        self._loop.create_task(self._venue_loop("upbit", self._upbit_session))
+        self._loop.create_task(self._venue_loop("binance", self._binance_session))
+        ready.set()
+        self._loop.run_forever()
+
+    async def _venue_loop(self, venue, session):
+        backoff = 1
+        changed = self._changed[venue]
+        while True:
+            changed.clear()
+            symbols = self.subscriptions(venue)
+            if not symbols:
+                await changed.wait()
+                continue
+            try:
+                await session(symbols, changed)
+                backoff = 1
+            except Exception:
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, settings.STREAM_MAX_BACKOFF)
+
+    async def _pump(self, ws, changed, handler):
+        # 메시지를 읽다가 구독 목록이 바뀌면 연결을 정리하고 돌아감 (상위 루프에서 새 구독으로 재연결)
+        async def read():
+            async for message in ws:
+                handler(json.loads(message))
+            raise ConnectionError("WebSocket 연결이 종료되었습니다.")
+
+        reader = asyncio.ensure_future(read())
+        waiter = asyncio.ensure_future(changed.wait())
+        done, pending = await asyncio.wait({reader, waiter}, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        if reader in done:
+            reader.result()
+
+    async def _upbit_session(self, markets, changed):
+        request = [
+            {"ticket": str(uuid.uuid4())},
+            {"type": "ticker", "codes": markets},
+            {"type": "candle.1m", "codes": markets},
+            {"format": "DEFAULT"},
+        ]
+        async with websockets.connect(UPBIT_WS_URL, ping_interval=settings.STREAM_PING_INTERVAL) as ws:
+            await ws.send(json.dumps(request))
+            await self._pump(ws, changed, self._on_upbit)
+
+    async def _binance_session(self, symbols, changed):
+        streams = "/".join(f"{s.lower()}@ticker/{s.lower()}@kline_1m/{s.lower()}@markPrice@1s" for s in symbols)
+        url = f"{BINANCE_FUTURES_WS_URL}?streams={streams}"
+        async with websockets.connect(url, ping_interval=settings.STREAM_PING_INTERVAL) as ws:
+            await self._pump(ws, changed, self._on_binance)
+
+    def _on_upbit(self, msg):
+        kind = msg.get("type", "")
+        code = msg.get("code")
+        if kind == "ticker":
+            self.store.update_tick("upbit", code, float(msg["trade_price"]), msg.get("trade_timestamp") or msg.get("timestamp"))
+        elif kind.startswith("candle"):
+            self.store.update_candle("upbit", code, {
+                "timestamp": _utc_ms(msg["candle_date_time_utc"]),
+                "open": float(msg["opening_price"]),
+                "high": float(msg["high_price"]),
+                "low": float(msg["low_price"]),
+                "close": float(msg["trade_price"]),
+                "volume": float(msg["candle_acc_trade_volume"]),
+                "closed": False,
+            })
+
+    def _on_binance(self, msg):
+        data = msg.get("data", msg)
+        kind = data.get("e")
+        if kind == "24hrTicker":
+            self.store.update_tick("binance", data["s"], float(data["c"]), data.get("E"))
+        elif kind == "markPriceUpdate":
+            self.store.update_mark("binance", data["s"], {
+                "price": float(data["p"]),
+                "funding_rate": float(data.get("r") or 0),
+                "next_funding": int(data.get("T") or 0),
+                "ts": data.get("E"),
+            })
+        elif kind == "kline":
+            k = data["k"]
+            self.store.update_candle("binance", data["s"], {
+                "timestamp": int(k["t"]),
+                "open": float(k["o"]),
+                "high": float(k["h"]),
+                "low": float(k["l"]),
+                "close": float(k["c"]),
+                "volume": float(k["v"]),
+                "closed": bool(k["x"]),
+            })
+
+
+# 프로세스 전체에서 공유하는 스트림 (첫 구독 시 백그라운드 스레드 시작)
+tick_store = TickStore()
+market_stream = MarketStream(tick_store)
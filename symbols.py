@@ -0,0 +1,351 @@
+import os
+import json
+import time
+import bisect
+import threading
+
+import settings
+from clients import get_binance_client
+from governor import upstream
+from lazy import lazy_import
+
+fdr = lazy_import("FinanceDataReader")
+pyupbit = lazy_import("pyupbit")
+
+# ----------------------
+# 주기적으로 갱신되는 프로세스 공용 인덱스
+# ----------------------
+class RefreshingIndex:
+    """
+    원본 목록을 한 번만 내려받아 인덱스를 만들어 두고, TTL이 지나면 백그라운드에서 다시 만듭니다.
+    갱신 중에도 기존 인덱스를 그대로 사용하므로 조회가 네트워크를 기다리지 않습니다.
+    하위 클래스는 fetch() (원본 목록 조회) 와 build(rows) (인덱스 생성) 를 구현합니다.
+    cache_file 을 지정하면 목록을 디스크에 저장해 두고, 콜드 스타트 시 네트워크 없이 불러옵니다.
+    """
+    ttl = 60 * 60
+    cache_file = None
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._index = None
+        self._loaded_at = 0.0
+        self._refreshing = False
+
+    def fetch(self):
+        raise NotImplementedError
+
+    def build(self, rows):
+        raise NotImplementedError
+
+    def index(self):
+        """현재 인덱스를 반환합니다. 최초 호출 시에만 동기적으로 로드합니다."""
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    self._load_initial()
+        if time.time() - self._loaded_at > self.ttl:
+            self.refresh_in_background()
+        return self._index
+
+    def refresh(self):
+        """원본 목록을 다시 받아 인덱스를 교체합니다."""
+        rows = self.fetch()
+        self._apply(rows, time.time())
+        self._write_disk(rows)
+
+    def refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._background_refresh, daemon=True).start()
+
+    def _background_refresh(self):
+        try:
+            self.refresh()
+        except Exception:
+            # 갱신 실패 시 기존 인덱스를 유지하고, 다음 TTL 경과 시 다시 시도
+            self._loaded_at = time.time()
+        finally:
+            self._refreshing = False
+
+    def _load_initial(self):
+        rows, saved_at = self._read_disk()
+        if rows is not None:
+            self._apply(rows, saved_at)
+            return
+        rows = self.fetch()
+        self._apply(rows, time.time())
+        self._write_disk(rows)
+
+    def _apply(self, rows, loaded_at):
+        # 새 인덱스를 다 만든 뒤 한 번에 교체 (조회 중인 스레드는 이전 인덱스를 계속 사용)
+        self._index = self.build(rows)
+        self._loaded_at = loaded_at
+
+    def _cache_path(self):
+        if not self.cache_file:
+            return None
+        return os.path.join(settings.CACHE_DIR, self.cache_file)
+
+    def _read_disk(self):
+        path = self._cache_path()
+        if not path or not os.path.exists(path):
+            return None, 0.0
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            return data["rows"], float(data["saved_at"])
+        except (OSError, ValueError, KeyError):
+            return None, 0.0
+
+    def _write_disk(self, rows):
+        path = self._cache_path()
+        if not path:
+            return
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"saved_at": time.time(), "rows": rows}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
+
+# ----------------------
+# KRX 종목 인덱스
+# ----------------------
+class KrxSymbolIndex(RefreshingIndex):
+    """
+    KRX 전체 종목 목록(fdr.StockListing)을 코드/이름으로 색인합니다.
+    - 종목코드 -> 종목명: dict 조회 (O(1))
+    - 종목명 검색: 정확히 일치 -> 접두어 일치(정렬 목록 이분 탐색) -> 부분 일치 순
+    """
+    ttl = settings.KRX_LISTING_TTL
+    cache_file = "krx_listing.json"
+
+    def fetch(self):
+        krx = upstream.call("krx", ("listing",), fdr.StockListing, 'KRX')
+        # 컬럼명 좌우 공백 제거
+        krx.columns = [col.strip() for col in krx.columns]
+        # 한글/영문 컬럼 모두 대응
+        col_map = {}
+        for col in krx.columns:
+            if col in ['종목코드', 'Code']:
+                col_map[col] = 'Symbol'
+            elif col in ['종목명', 'Name']:
+                col_map[col] = 'Name'
+        krx = krx.rename(columns=col_map)
+        if 'Symbol' not in krx.columns or 'Name' not in krx.columns:
+            raise ValueError("KRX 목록에 필수 컬럼('Symbol' 또는 'Name')이 존재하지 않습니다.")
+        return [
+            {"code": str(code), "name": str(name).strip()}
+            for code, name in zip(krx['Symbol'], krx['Name'])
+            if isinstance(name, str)
+        ]
+
+    def build(self, rows):
+        code_to_name = {}
+        name_to_pos = {}
+        ordered = []  # 원본 목록 순서의 (소문자 이름, 코드, 이름)
+        for row in rows:
+            code, name = row["code"], row["name"]
+            if code in code_to_name:
+                continue
+            code_to_name[code] = name
+            lower = name.lower()
+            name_to_pos.setdefault(lower, len(ordered))
+            ordered.append((lower, code, name))
+        sorted_names = sorted((lower, i) for i, (lower, _, _) in enumerate(ordered))
+        return {
+            "code_to_name": code_to_name,
+            "name_to_pos": name_to_pos,
+            "ordered": ordered,
+            "sorted_keys": [lower for lower, _ in sorted_names],
+            "sorted_pos": [i for _, i in sorted_names],
+        }
+
+    def name_of(self, code):
+        """종목코드에 해당하는 종목명을 반환합니다. 없으면 None."""
+        return self.index()["code_to_name"].get(code)
+
+    def search(self, query, limit=10):
+        """
+        종목명으로 검색하여 [(코드, 종목명), ...] 을 반환합니다. (대소문자 구분 없음)
+        정확히 일치하는 종목, 접두어가 일치하는 종목, 이름에 포함된 종목 순으로 정렬됩니다.
+        """
+        idx = self.index()
+        query = query.strip().lower()
+        if not query:
+            return []
+        ordered = idx["ordered"]
+        results = []
+        seen = set()
+
+        def add(pos):
+            if pos not in seen:
+                seen.add(pos)
+                results.append(pos)
+
+        exact = idx["name_to_pos"].get(query)
+        if exact is not None:
+            add(exact)
+
+        # 접두어 일치: 정렬된 이름 목록에서 이분 탐색
+        keys = idx["sorted_keys"]
+        start = bisect.bisect_left(keys, query)
+        prefix_hits = []
+        for i in range(start, len(keys)):
+            if not keys[i].startswith(query):
+                break
+            prefix_hits.append(idx["sorted_pos"][i])
+        for pos in sorted(prefix_hits):
+            add(pos)
+            if len(results) >= limit:
+                break
+
+        # 부분 일치: 앞의 두 단계로 채우지 못한 경우에만 전체 목록을 훑음
+        if len(results) < limit:
+            for pos, (lower, _, _) in enumerate(ordered):
+                if query in lower:
+                    add(pos)
+                    if len(results) >= limit:
+                        break
+
+        return [(ordered[pos][1], ordered[pos][2]) for pos in results[:limit]]
+
+    def find(self, query):
+        """검색 결과 중 가장 적합한 (코드, 종목명) 하나를 반환합니다. 없으면 None."""
+        found = self.search(query, limit=1)
+        return found[0] if found else None
+
+# ----------------------
+# 업비트 KRW 마켓 인덱스
+# ----------------------
+class UpbitMarketIndex(RefreshingIndex):
+    """
+    업비트 KRW 마켓 전체를 한글명/영문명/심볼로 색인합니다.
+    예: "비트코인", "bitcoin", "BTC", "KRW-BTC" 모두 "KRW-BTC" 로 조회됩니다.
+    """
+    ttl = settings.UPBIT_MARKETS_TTL
+    cache_file = "upbit_markets.json"
+
+    def fetch(self):
+        tickers = upstream.call("upbit", ("markets",), pyupbit.get_tickers, fiat="KRW", verbose=True)
+        if not tickers:
+            raise ValueError("업비트 마켓 목록을 가져오지 못했습니다.")
+        return [
+            {
+                "market": t["market"],
+                "korean_name": t.get("korean_name", ""),
+                "english_name": t.get("english_name", ""),
+            }
+            for t in tickers
+        ]
+
+    def build(self, rows):
+        markets = {}  # 마켓 코드 -> 원본 정보
+        by_key = {}   # 정규화된 이름/심볼 -> 마켓 코드
+        for row in rows:
+            market = row["market"]
+            markets[market] = row
+            symbol = market.split("-", 1)[1]
+            for key in (market, symbol, row["korean_name"], row["english_name"]):
+                key = key.strip().upper()
+                if key:
+                    by_key.setdefault(key, market)
+        return {"markets": markets, "by_key": by_key, "symbols": [m.split("-", 1)[1] for m in markets]}
+
+    def info(self, market):
+        """마켓 코드의 한글명/영문명 정보를 반환합니다. 없으면 None."""
+        return self.index()["markets"].get(market)
+
+    def find(self, query):
+        """
+        한글명, 영문명, 심볼(BTC), 마켓 코드(KRW-BTC) 중 하나로 마켓 코드를 찾습니다.
+        정확히 일치하는 항목이 없으면 심볼에 query가 포함된 첫 마켓을 반환합니다. 없으면 None.
+        """
+        idx = self.index()
+        query = query.strip().upper()
+        if not query:
+            return None
+        market = idx["by_key"].get(query)
+        if market is not None:
+            return market
+        for symbol in idx["symbols"]:
+            if query in symbol:
+                return "KRW-" + symbol
+        return None
+
+# ----------------------
+# 바이낸스 USDT 선물 심볼 인덱스
+# ----------------------
+class BinanceFuturesIndex(RefreshingIndex):
+    """
+    바이낸스 선물 exchangeInfo 의 심볼 목록을 심볼/기초자산으로 색인합니다.
+    예: "BTCUSDT", "BTC", "비트코인"(업비트 한글명 활용) 모두 "BTCUSDT" 로 조회됩니다.
+    """
+    ttl = settings.BINANCE_FUTURES_TTL
+    cache_file = "binance_futures.json"
+
+    def fetch(self):
+        info = upstream.call("binance", ("exchange_info",), get_binance_client().futures_exchange_info)
+        return [
+            {
+                "symbol": s["symbol"],
+                "base": s.get("baseAsset", ""),
+                "quote": s.get("quoteAsset", ""),
+                "contract": s.get("contractType", ""),
+                "status": s.get("status", ""),
+            }
+            for s in info.get("symbols", [])
+        ]
+
+    def build(self, rows):
+        symbols = {}  # 심볼 -> 원본 정보
+        by_base = {}  # 기초자산 -> USDT 무기한 심볼
+        for row in rows:
+            if row["status"] not in ("", "TRADING"):
+                continue
+            symbols[row["symbol"]] = row
+            if row["quote"] == "USDT" and row["contract"] in ("", "PERPETUAL"):
+                by_base.setdefault(row["base"], row["symbol"])
+        return {"symbols": symbols, "by_base": by_base, "ordered": list(symbols)}
+
+    def info(self, symbol):
+        """심볼의 기초자산/계약 정보를 반환합니다. 없으면 None."""
+        return self.index()["symbols"].get(symbol)
+
+    def find(self, query):
+        """
+        심볼(BTCUSDT), 기초자산(BTC) 또는 업비트 한글명(비트코인)으로 선물 심볼을 찾습니다.
+        일치 항목이 없으면 query가 포함된 첫 심볼, 그래도 없으면 query + "USDT" 를 반환합니다.
+        """
+        idx = self.index()
+        query = query.strip().upper()
+        if not query:
+            return None
+        if query in idx["symbols"]:
+            return query
+        if query in idx["by_base"]:
+            return idx["by_base"][query]
+        if not query.isascii():
+            # 한글명은 업비트 마켓 인덱스로 기초자산을 찾음 (예: 비트코인 -> KRW-BTC -> BTC)
+            try:
+                market = upbit_index.find(query)
+            except Exception:
+                market = None
+            if market is not None:
+                base = market.split("-", 1)[1]
+                if base in idx["by_base"]:
+                    return idx["by_base"][base]
+        for symbol in idx["ordered"]:
+            if query in symbol:
+                return symbol
+        return query if query.endswith("USDT") else query + "USDT"
+
+
+# 프로세스 전체에서 공유하는 인덱스 (Streamlit 세션/리런 간 공유)
+krx_index = KrxSymbolIndex()
+upbit_index = UpbitMarketIndex()
+binance_futures_index = BinanceFuturesIndex()
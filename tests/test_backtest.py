@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+
+from account import VirtualAccount
+from backtest import breakout, simulate, sma_cross
+
+
+def _data(open_, close):
+    open_, close = np.asarray(open_, dtype=np.float64), np.asarray(close, dtype=np.float64)
+    return {"open": open_, "high": np.maximum(open_, close) + 1, "low": np.minimum(open_, close) - 1, "close": close}
+
+
+DATA = _data([10, 11, 12, 13, 14, 15], [10.5, 11.5, 12.5, 13.5, 14.5, 15.5])
+# 봉 1 종가에 매수 결정, 봉 3 종가에 매도 결정 -> 봉 2 시가(12) 매수, 봉 4 시가(14) 매도
+HOLD = [False, True, True, False, False, False]
+
+
+def test_fills_at_next_bar_open_fractional():
+    result = simulate(DATA, HOLD, init_cash=1000)
+    qty = 1000 / 12
+    expected = [1000, 1000, qty * 12.5, qty * 13.5, qty * 14, qty * 14]
+    np.testing.assert_allclose(result["equity"], expected)
+    assert result["final_equity"] == pytest.approx(1000 * 14 / 12)
+    assert result["trades"] == 1 and result["win_rate"] == 100.0
+    assert result["exposure"] == pytest.approx(100 * 2 / 6)
+    assert result["max_drawdown_pct"] == 0.0
+
+
+def test_fills_at_next_bar_open_whole_units():
+    result = simulate(DATA, HOLD, init_cash=1000, whole_units=True)
+    # 1000 // 12 = 83 주, 잔여 현금 4
+    expected = [1000, 1000, 4 + 83 * 12.5, 4 + 83 * 13.5, 4 + 83 * 14, 4 + 83 * 14]
+    np.testing.assert_allclose(result["equity"], expected)
+
+
+def test_no_look_ahead():
+    # 결정한 봉의 종가나 이후 봉 값을 바꿔도 그 전까지의 평가금액은 그대로
+    changed = _data(DATA["open"].copy(), DATA["close"].copy())
+    changed["close"][1] = 1e6
+    changed["open"][5] = 1e6
+    base, other = simulate(DATA, HOLD, 1000)["equity"], simulate(changed, HOLD, 1000)["equity"]
+    np.testing.assert_array_equal(base[2:5], other[2:5])
+    # 마지막 봉에서 내린 결정은 체결할 다음 봉이 없으므로 거래 없음
+    last_only = simulate(DATA, [False] * 5 + [True], 1000)
+    assert last_only["trades"] == 0 and last_only["final_equity"] == 1000
+
+
+def test_whole_units_match_virtual_account_replay():
+    rng = np.random.default_rng(11)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, 300)))
+    data = _data(np.r_[100, close[:-1]] * (1 + rng.normal(0, 0.002, 300)), close)
+    hold = sma_cross(data, 5, 20)
+    whole = simulate(data, hold, init_cash=100_000_000, whole_units=True)
+    fractional = simulate(data, hold, init_cash=100_000_000)
+
+    # 같은 거래를 VirtualAccount 에 정수 주로 한 건씩 직접 재생
+    held = np.r_[False, hold[:-1]]
+    account = VirtualAccount(100_000_000)
+    qty = 0
+    for t in range(len(close)):
+        was = held[t - 1] if t else False
+        if held[t] and not was:
+            qty = int(float(account.get_cash()) // data["open"][t])
+            assert account.buy("x", data["open"][t], qty)
+        elif was and not held[t]:
+            assert account.sell("x", data["open"][t], qty)
+            qty = 0
+    final = float(account.get_cash()) + qty * close[-1]
+    assert whole["trades"] > 3
+    assert whole["final_equity"] == pytest.approx(final, rel=1e-12)
+    # 거래마다 남는 잔돈은 1 주 가격보다 작으므로 소수 수량 결과와의 차이도 그만큼으로 제한됨
+    assert abs(fractional["final_equity"] - whole["final_equity"]) / whole["final_equity"] < 1e-4
+    np.testing.assert_allclose(fractional["equity"], whole["equity"], rtol=1e-4)
+
+
+def test_whole_units_equal_fractional_when_cash_divides_evenly():
+    # 현금이 가격으로 나누어떨어지면 정수 주와 소수 수량 결과가 같음
+    data = _data([10, 12, 15, 10, 8, 16], [11, 13, 14, 9, 9, 17])
+    hold = [True, True, False, True, False, False]
+    fractional = simulate(data, hold, init_cash=1200)
+    whole = simulate(data, hold, init_cash=1200, whole_units=True)
+    np.testing.assert_allclose(fractional["equity"], whole["equity"])
+    # 봉 1 시가 12 에 100 주 -> 봉 3 시가 10 에 매도 1000 -> 봉 4 시가 8 에 125 주 -> 봉 5 시가 16 에 매도 2000
+    assert whole["equity"].tolist() == [1200, 1300, 1400, 1000, 1125, 2000]
+    assert whole["final_equity"] == 2000 and whole["trades"] == 2
+
+
+def test_breakout_uses_only_previous_bars():
+    data = _data([10] * 6, [10, 10, 10, 12, 9, 9])
+    data["high"][:] = 11
+    data["low"][:] = 9.5
+    hold = breakout(data, entry=2, exit=2)
+    # 봉 3 종가 12 > 직전 2 봉 고가 11 -> 보유, 봉 4 종가 9 < 직전 2 봉 저가 9.5 -> 정리
+    assert hold.tolist() == [False, False, False, True, False, False]
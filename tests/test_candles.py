@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+
+from candles import FIELDS, CandleBuffer
+
+MINUTE = 60_000
+
+
+def _bars(start, n):
+    ts = np.arange(start, start + n, dtype=np.int64) * MINUTE
+    base = np.arange(start, start + n, dtype=np.float64)
+    return ts, {"open": base, "high": base + 0.5, "low": base - 0.5, "close": base + 0.25, "volume": np.ones(n)}
+
+
+def test_extend_appends_newer_bars_and_overwrites_the_open_one():
+    buffer = CandleBuffer(10)
+    ts, cols = _bars(0, 3)
+    buffer.extend(ts, **cols)
+    # 마지막 봉(2분)을 다시 받으면 제자리 갱신, 그 이전 봉은 무시, 이후 봉만 추가
+    buffer.extend(np.array([1, 2, 3]) * MINUTE, open=[9, 9, 9], high=[9, 20, 30], low=[9, 1, 2],
+                  close=[9, 15, 25], volume=[9, 7, 8])
+    view = buffer.view()
+    np.testing.assert_array_equal(view["timestamp"], np.arange(4) * MINUTE)
+    np.testing.assert_array_equal(view["close"], [0.25, 1.25, 15, 25])
+    np.testing.assert_array_equal(view["volume"], [1, 1, 7, 8])
+    assert buffer.last_timestamp() == 3 * MINUTE
+
+
+def test_upsert_replaces_same_open_time_and_ignores_older():
+    buffer = CandleBuffer(5)
+    buffer.upsert(MINUTE, 1, 2, 0.5, 1.5, 10)
+    buffer.upsert(MINUTE, 1, 3, 0.5, 2.5, 12)       # 진행 중인 봉 갱신
+    buffer.upsert(0, 7, 7, 7, 7, 7)                  # 더 과거 -> 무시
+    buffer.upsert(2 * MINUTE, 2.5, 2.6, 2.4, 2.55, 1)
+    view = buffer.view()
+    assert len(buffer) == 2
+    np.testing.assert_array_equal(view["timestamp"], [MINUTE, 2 * MINUTE])
+    np.testing.assert_array_equal(view["high"], [3, 2.6])
+    np.testing.assert_array_equal(view["close"], [2.5, 2.55])
+
+
+def test_compaction_at_twice_capacity_keeps_the_latest_window():
+    buffer = CandleBuffer(4)
+    storage = buffer._ts
+    for i in range(8):                               # 2 * capacity 칸을 다 씀 (옮기지 않음)
+        buffer.upsert(i * MINUTE, i, i, i, i, 1)
+    assert buffer._ts is storage and len(buffer) == 4
+    buffer.upsert(8 * MINUTE, 8, 8, 8, 8, 1)         # 끝에 닿음 -> 최근 capacity 개만 새 배열로
+    assert buffer._ts is not storage
+    assert (buffer._start, buffer._end) == (0, 4)
+    np.testing.assert_array_equal(buffer.view()["timestamp"], np.arange(5, 9) * MINUTE)
+    np.testing.assert_array_equal(buffer.view()["close"], np.arange(5, 9))
+    np.testing.assert_array_equal(buffer.view(last=2)["open"], [7, 8])
+
+
+def test_batch_larger_than_capacity_keeps_only_the_newest():
+    buffer = CandleBuffer(4)
+    buffer.upsert(0, 0, 0, 0, 0, 1)
+    ts, cols = _bars(1, 10)
+    buffer.extend(ts, **cols)
+    np.testing.assert_array_equal(buffer.view()["timestamp"], np.arange(7, 11) * MINUTE)
+    for f in FIELDS:
+        np.testing.assert_array_equal(buffer.view()[f], cols[f][-4:])
+
+
+def test_views_stay_valid_after_compaction():
+    buffer = CandleBuffer(4)
+    ts, cols = _bars(0, 6)
+    buffer.extend(ts, **cols)
+    before = buffer.view()
+    frame = buffer.to_frame()
+    snapshot = {k: v.copy() for k, v in before.items()}
+    for i in range(6, 30):                           # 여러 번 옮겨도
+        buffer.upsert(i * MINUTE, i, i, i, i, 1)
+    # 이미 넘겨준 view / DataFrame 은 예전 배열을 그대로 보고 있어 값이 바뀌지 않음
+    for k in snapshot:
+        np.testing.assert_array_equal(before[k], snapshot[k])
+    np.testing.assert_array_equal(frame["close"].to_numpy(), snapshot["close"])
+    assert frame["timestamp"].iloc[-1] == pd.Timestamp(5 * MINUTE, unit="ms")
+    np.testing.assert_array_equal(buffer.view()["timestamp"], np.arange(26, 30) * MINUTE)
+
+
+def test_view_is_a_copy_free_slice():
+    buffer = CandleBuffer(8)
+    ts, cols = _bars(0, 5)
+    buffer.extend(ts, **cols)
+    view = buffer.view()
+    assert np.shares_memory(view["close"], buffer._cols["close"])
+    assert np.shares_memory(buffer.to_frame()["close"].to_numpy(), buffer._cols["close"])
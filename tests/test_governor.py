@@ -0,0 +1,93 @@
+import threading
+import time
+
+import pytest
+
+from governor import TokenBucket, UpstreamGovernor
+
+
+def test_bucket_charges_the_full_weight_beyond_burst(monkeypatch):
+    slept = []
+    monkeypatch.setattr("governor.time.sleep", slept.append)
+    bucket = TokenBucket(rate=10, burst=10)
+    # 25 번 요청하는 호출: 버스트 10 을 쓰고 15 를 빌림 -> 1.5 초
+    assert bucket.acquire(25) == pytest.approx(1.5, abs=0.01)
+    assert bucket.tokens == pytest.approx(-15, abs=0.1)
+    # 뒤이은 호출은 빌린 만큼 더 기다림
+    assert bucket.acquire(1) == pytest.approx(1.6, abs=0.01)
+    assert slept == pytest.approx([1.5, 1.6], abs=0.01)
+
+
+class _CountingFetch:
+    """호출 수를 세고, release 될 때까지 응답을 붙잡아 두는 가짜 upstream"""
+    def __init__(self, result=None, error=None):
+        self.calls = 0
+        self.release = threading.Event()
+        self.result = result
+        self.error = error
+
+    def __call__(self, *args):
+        self.calls += 1
+        self.release.wait(5)
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+def _run_concurrently(governor, n, call):
+    results = [None] * n
+    errors = [None] * n
+
+    def worker(i):
+        try:
+            results[i] = call()
+        except Exception as e:
+            errors[i] = e
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    # 먼저 온 하나가 요청 중이고 나머지가 모두 합류할 때까지 기다렸다가 응답을 풀어 줌
+    deadline = time.monotonic() + 5
+    while governor._flight.shared < n - 1 and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return threads, results, errors
+
+
+def test_concurrent_callers_with_the_same_key_share_one_call():
+    governor = UpstreamGovernor({"h": (1000, 1000)})
+    fetch = _CountingFetch(result={"price": 1})
+    threads, results, errors = _run_concurrently(governor, 8, lambda: governor.call("h", ("price", "X"), fetch, "X"))
+    fetch.release.set()
+    for t in threads:
+        t.join(5)
+    assert fetch.calls == 1
+    assert errors == [None] * 8
+    assert all(r is results[0] for r in results)
+    assert governor.stats()["hosts"]["h"]["calls"] == 1
+    assert governor.stats()["coalesced"] == 7
+    # 끝난 요청은 캐시하지 않음: 다음 호출은 새로 요청
+    governor.call("h", ("price", "X"), fetch, "X")
+    assert fetch.calls == 2
+
+
+def test_error_reaches_every_waiter():
+    governor = UpstreamGovernor({"h": (1000, 1000)})
+    fetch = _CountingFetch(error=ConnectionError("boom"))
+    threads, results, errors = _run_concurrently(governor, 5, lambda: governor.coalesce(("quote", "X"), fetch))
+    fetch.release.set()
+    for t in threads:
+        t.join(5)
+    assert fetch.calls == 1
+    assert all(isinstance(e, ConnectionError) and str(e) == "boom" for e in errors)
+
+
+def test_only_sent_requests_wait_for_tokens(monkeypatch):
+    slept = []
+    monkeypatch.setattr("governor.time.sleep", slept.append)
+    governor = UpstreamGovernor({"h": (10, 2)})
+    for i in range(4):
+        governor.call("h", ("price", i), lambda: i)
+    # 버스트 2 를 넘은 세 번째/네 번째 요청은 0.1 초, 0.2 초 대기
+    assert slept == pytest.approx([0.1, 0.2], abs=0.01)
+    assert governor.stats()["hosts"]["h"] == {"calls": 4, "waited": pytest.approx(0.3, abs=0.02)}
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from indicators import make_indicator
+
+SPECS = ["sma:20", "ema:20", "rsi:14", "macd:12,26,9", "bb:20,2", "vwap", "atr:14"]
+HOUR_MS = 60 * 60_000
+
+
+def _series(n=400, base=100.0, seed=7):
+    rng = np.random.default_rng(seed)
+    close = base * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    open_ = np.r_[close[0], close[:-1]]
+    spread = np.abs(rng.normal(0, 0.004, n)) * close
+    return {
+        # 1시간봉 400 개 (VWAP 세션이 여러 번 바뀜, 시작 시각은 세션 중간)
+        "timestamp": np.arange(n, dtype=np.int64) * HOUR_MS + 5 * HOUR_MS,
+        "open": open_,
+        "high": np.maximum(open_, close) + spread,
+        "low": np.minimum(open_, close) - spread,
+        "close": close,
+        "volume": rng.uniform(0, 10, n),
+    }
+
+
+def _bar(data, i):
+    return {"timestamp": int(data["timestamp"][i]), **{k: float(data[k][i]) for k in ("open", "high", "low", "close", "volume")}}
+
+
+def _head(data, n):
+    return {k: v[:n] for k, v in data.items()}
+
+
+def _assert_same(incremental, expected, spec):
+    for name, values in expected.items():
+        np.testing.assert_allclose(incremental[name], values, rtol=1e-9, atol=1e-9, equal_nan=True, err_msg=f"{spec} {name}")
+
+
+@pytest.mark.parametrize("spec", SPECS)
+def test_update_bar_by_bar_matches_compute(spec):
+    data = _series()
+    expected = make_indicator(spec).compute(data)
+    indicator = make_indicator(spec)
+    rows = [indicator.update(_bar(data, i)) for i in range(len(data["close"]))]
+    _assert_same({name: [row[name] for row in rows] for name in expected}, expected, spec)
+
+
+@pytest.mark.parametrize("spec", SPECS)
+@pytest.mark.parametrize("seeded", [1, 30, 250])
+def test_seed_then_update_and_peek_match_compute(spec, seeded):
+    data = _series()
+    n = len(data["close"])
+    expected = make_indicator(spec).compute(data)
+    indicator = make_indicator(spec)
+    indicator.seed(_head(data, seeded))
+    peeked, updated = [], []
+    for i in range(seeded, n):
+        bar = _bar(data, i)
+        peeked.append(indicator.peek(bar))
+        # 진행 중인 봉을 여러 번 peek 해도 상태가 바뀌지 않음
+        _assert_same(indicator.peek(bar), peeked[-1], spec)
+        updated.append(indicator.update(bar))
+    tail = {name: values[seeded:] for name, values in expected.items()}
+    _assert_same({name: [row[name] for row in updated] for name in expected}, tail, spec)
+    _assert_same({name: [row[name] for row in peeked] for name in expected}, tail, spec)
+
+
+def test_bollinger_welford_window_stays_accurate_at_large_prices():
+    # 큰 가격 + 작은 변동: 제곱합 방식이면 상쇄 오차가 커지는 구간
+    data = _series(n=3000, base=1e8, seed=3)
+    data["close"] = 1e8 + np.round(data["close"] - 1e8, 2)
+    expected = make_indicator("bb:20,2").compute(data)
+    indicator = make_indicator("bb:20,2")
+    rows = [indicator.update(_bar(data, i)) for i in range(len(data["close"]))]
+    width = np.array([row["bb_upper"] - row["bb_lower"] for row in rows])
+    np.testing.assert_allclose(width, expected["bb_upper"] - expected["bb_lower"], rtol=1e-6, atol=1e-4, equal_nan=True)
@@ -0,0 +1,121 @@
+import gc
+import time
+
+import pytest
+
+import journal as journal_module
+from account import VirtualAccount
+from journal import AccountJournal, AccountRegistry
+from margin import FuturesAccount, FuturesAccountRegistry
+
+
+def test_spot_snapshot_plus_tail_replay(tmp_path):
+    journal = AccountJournal(str(tmp_path / "accounts.db"))
+    account = journal.attach("alice", VirtualAccount(), snapshot_every=3)
+    account.deposit(1000)
+    account.buy("krx:005930", "100.1", 3)
+    account.sell("krx:005930", "120.3", 1)     # seq 3: 스냅샷
+    account.buy("upbit:KRW-BTC", "0.7", 10)
+    account.sell("krx:005930", "99.9", 2)
+
+    assert journal.latest_snapshot("alice")["seq"] == 3
+    restored = journal.load("alice")
+    assert restored.seq == 5
+    assert restored.snapshot() == account.snapshot()
+    assert journal.load("bob").seq == 0
+
+
+def test_futures_snapshot_plus_tail_replay(tmp_path):
+    journal = AccountJournal(str(tmp_path / "accounts.db"))
+    account = journal.attach_futures("alice", FuturesAccount(mmr=0.004, fee_rate=0.0004), snapshot_every=4)
+    account.deposit(1000)
+    account.configure("BTCUSDT", 10, "isolated")
+    account.order("BTCUSDT", "buy", 0.3, 101.7)
+    account.configure("ETHUSDT", 20, "cross")
+    account.order("ETHUSDT", "sell", 1.1, 33.3)
+    account.update_mark("ETHUSDT", 33.3, funding_rate=0.0003, next_funding=1_000)
+    account.update_mark("ETHUSDT", 34.1, next_funding=2_000)   # seq 4: 펀딩, 스냅샷
+    account.order("BTCUSDT", "sell", 0.1, 105.3)
+    account.update_mark("BTCUSDT", 80)                           # 격리 롱 청산
+
+    kinds = [e["kind"] for e in account.events]
+    assert kinds == ["deposit", "open", "open", "funding", "close", "liquidation"]
+    assert journal.latest_snapshot("alice", "futures_snapshots")["seq"] == 4
+
+    restored = journal.load_futures("alice")
+    assert restored.seq == account.seq
+    assert restored.snapshot() == account.snapshot()
+    assert restored.balance == account.balance
+    # 복구한 계좌도 이어서 거래 가능
+    restored.update_mark("ETHUSDT", 34.1)
+    assert restored.available() == pytest.approx(account.available())
+
+
+def test_futures_full_replay_without_snapshot(tmp_path):
+    journal = AccountJournal(str(tmp_path / "accounts.db"))
+    account = journal.attach_futures("alice", FuturesAccount(), snapshot_every=1000)
+    account.deposit(500)
+    account.configure("BTCUSDT", 3, "cross")
+    account.order("BTCUSDT", "buy", 0.01, 60000)
+    account.order("BTCUSDT", "sell", 0.004, 61000)
+    assert journal.latest_snapshot("alice", "futures_snapshots") is None
+    assert journal.load_futures("alice").snapshot() == account.snapshot()
+
+
+def test_registry_evicts_least_recently_used_but_shares_live_accounts(tmp_path, monkeypatch):
+    monkeypatch.setattr(journal_module, "_shared", AccountJournal(str(tmp_path / "accounts.db")))
+    registry = AccountRegistry(max_size=1, idle=None)
+    alice = registry.get("alice")
+    alice.deposit(1000)
+    alice.buy("krx:005930", "100", 3)
+    assert registry.get("bob") is not None
+    assert len(registry._accounts) == 1          # alice 는 캐시에서 밀려남
+
+    # 세션이 아직 들고 있으면 같은 객체를 다시 돌려줌 (journal 에 seq 를 겹쳐 쓰지 않도록)
+    assert registry.get("alice") is alice
+    registry.get("bob")
+    del alice
+    gc.collect()
+    assert "alice" not in registry._accounts
+
+    # 메모리에서 해제된 뒤 다시 열면 journal 에서 복구되고, 이어서 쓴 기록도 남음
+    restored = registry.get("alice")
+    assert restored.seq == 2 and restored.cash == 700
+    restored.deposit(1)
+    assert journal_module.shared_journal().load("alice").seq == 3
+
+
+def test_registry_drops_idle_accounts(tmp_path, monkeypatch):
+    monkeypatch.setattr(journal_module, "_shared", AccountJournal(str(tmp_path / "accounts.db")))
+    registry = AccountRegistry(max_size=None, idle=0.01)
+    registry.get("alice")
+    time.sleep(0.02)
+    registry.get("bob")
+    assert len(registry._accounts) == 1
+    gc.collect()
+    assert "alice" not in registry._accounts and "bob" in registry._accounts
+
+
+def test_futures_registry_evicts_and_restores_from_journal(tmp_path):
+    journal = AccountJournal(str(tmp_path / "accounts.db"))
+
+    class _Store:
+        def add_listener(self, listener):
+            pass
+
+    registry = FuturesAccountRegistry(_Store(), lambda: journal, max_size=1, idle=None)
+    alice = registry.get("alice")
+    alice.deposit(1000)
+    alice.configure("BTCUSDT", 5, "cross")
+    alice.order("BTCUSDT", "buy", 0.5, 100)
+    snapshot = alice.snapshot()
+    registry.get("bob")
+    assert registry.get("alice") is alice
+    registry.get("bob")
+    del alice
+    gc.collect()
+    assert "alice" not in registry._accounts
+    assert [a for a in registry._accounts.values() if a.holds("BTCUSDT")] == []
+
+    restored = registry.get("alice")
+    assert restored.snapshot() == snapshot
@@ -0,0 +1,106 @@
+import threading
+import time
+
+import pytest
+
+from margin import FuturesAccount, FuturesAccountRegistry
+
+
+def _account(balance, mode, leverage, symbol="BTCUSDT"):
+    # 수수료 0, 유지 증거금률 0.4% 로 청산 가격을 손으로 계산한 값과 비교
+    account = FuturesAccount(balance, mmr=0.004, fee_rate=0.0)
+    account.configure(symbol, leverage, mode)
+    return account
+
+
+def test_isolated_long_liquidation_price():
+    account = _account(1000, "isolated", 10)
+    assert account.order("BTCUSDT", "buy", 1, 100)
+    # 증거금 10, (100 - 10) / (1 - 0.004)
+    liq = account.risk()["liquidation_price"][0]
+    assert liq == pytest.approx(90 / 0.996)
+    assert liq == pytest.approx(90.36, abs=0.01)
+
+    account.update_mark("BTCUSDT", 90.5)
+    assert account.positions_frame().shape[0] == 1
+    account.update_mark("BTCUSDT", 90.3)
+    assert account.positions_frame().empty
+    # 격리는 증거금만 잃음
+    assert account.balance == pytest.approx(990)
+    assert account.events[-1]["kind"] == "liquidation"
+
+
+def test_cross_short_liquidation_price():
+    account = _account(100, "cross", 10)
+    assert account.order("BTCUSDT", "sell", 1, 100)
+    # 교차는 지갑 전체가 증거금: (100 + 100) / (1 + 0.004)
+    liq = account.risk()["liquidation_price"][0]
+    assert liq == pytest.approx(200 / 1.004)
+    assert liq == pytest.approx(199.2, abs=0.01)
+
+    account.update_mark("BTCUSDT", 199.0)
+    assert account.positions_frame().shape[0] == 1
+    account.update_mark("BTCUSDT", 199.3)
+    assert account.positions_frame().empty
+    assert account.balance == pytest.approx(0.7)
+
+
+def test_funding_settles_when_next_funding_time_moves():
+    account = _account(1000, "cross", 5)
+    assert account.order("BTCUSDT", "buy", 2, 100)
+    account.update_mark("BTCUSDT", 100, funding_rate=0.0001, next_funding=1_000)
+    # 같은 펀딩 시각 안에서는 정산하지 않음
+    account.update_mark("BTCUSDT", 110, funding_rate=0.0002, next_funding=1_000)
+    assert account.balance == pytest.approx(1000)
+    # 펀딩 시각이 넘어가면 직전 비율(0.0002)로 정산: 롱 2 * 120 * 0.0002 지불
+    account.update_mark("BTCUSDT", 120, next_funding=2_000)
+    assert account.balance == pytest.approx(1000 - 2 * 120 * 0.0002)
+    funding = account.events[-1]
+    assert funding["kind"] == "funding" and funding["pnl"] == pytest.approx(-0.048)
+
+
+def test_isolated_funding_comes_out_of_position_margin():
+    account = _account(1000, "isolated", 10)
+    account.order("BTCUSDT", "sell", 1, 100)
+    account.update_mark("BTCUSDT", 100, funding_rate=-0.001, next_funding=1_000)
+    account.update_mark("BTCUSDT", 100, next_funding=2_000)
+    # 비율이 음수면 숏이 지불
+    assert account.risk()["margin"][0] == pytest.approx(10 - 0.1)
+    assert account.balance == pytest.approx(1000 - 0.1)
+
+
+def test_order_rejected_without_margin():
+    account = _account(5, "isolated", 10)
+    assert not account.order("BTCUSDT", "buy", 1, 100)
+    assert account.positions_frame().empty
+
+
+class _Store:
+    def __init__(self):
+        self.listeners = []
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+
+def test_registry_applies_marks_off_the_stream_thread_to_holders_only():
+    store = _Store()
+    registry = FuturesAccountRegistry(store)
+    holder, flat = registry.get("holder"), registry.get("flat")
+    holder.deposit(1000)
+    holder.configure("BTCUSDT", 10, "isolated")
+    holder.order("BTCUSDT", "buy", 1, 100)
+    flat.deposit(1000)
+    seen = []
+    update = holder.update_mark
+    holder.update_mark = lambda *args: seen.append(threading.current_thread().name) or update(*args)
+    flat.update_mark = lambda *args: seen.append("flat")
+
+    for listener in store.listeners:
+        listener("mark", "binance", "BTCUSDT", {"price": 80.0})
+
+    deadline = time.monotonic() + 5
+    while holder.holds("BTCUSDT") and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not holder.holds("BTCUSDT")       # 80 은 청산 가격(≈90.36) 아래
+    assert seen == ["futures-mark"]
@@ -0,0 +1,76 @@
+import codecs
+import glob
+import os
+
+import pytest
+
+import naver_parser
+from naver_parser import ItemPageScanner, fast_extract, parse_item_page, soup_extract
+
+FIXTURES = sorted(glob.glob(os.path.join(os.path.dirname(__file__), os.pardir, "bench", "fixtures", "naver", "item_*.html")))
+
+
+def _decode(raw):
+    m = naver_parser._CHARSET_RE.search(raw[:4096])
+    return raw.decode(m.group(1).decode("ascii") if m else "utf-8", errors="replace")
+
+
+def _scan_text(html, size):
+    scanner = ItemPageScanner()
+    for pos in range(0, len(html), size):
+        if scanner.feed(html[pos:pos + size]):
+            return scanner.name, scanner.price
+    return scanner.finish()
+
+
+def _scan_bytes(raw, size):
+    # 응답을 바이트 조각으로 받아 증분 디코딩 (멀티바이트 글자가 조각 경계에 걸림)
+    m = naver_parser._CHARSET_RE.search(raw[:4096])
+    decoder = codecs.getincrementaldecoder(m.group(1).decode("ascii") if m else "utf-8")(errors="replace")
+    scanner = ItemPageScanner()
+    for pos in range(0, len(raw), size):
+        if scanner.feed(decoder.decode(raw[pos:pos + size])):
+            return scanner.name, scanner.price
+    scanner.feed(decoder.decode(b"", final=True))
+    return scanner.finish()
+
+
+def test_fixtures_exist():
+    assert len(FIXTURES) >= 3
+
+
+@pytest.mark.parametrize("path", FIXTURES, ids=os.path.basename)
+def test_fast_stream_and_soup_agree(path):
+    with open(path, "rb") as f:
+        raw = f.read()
+    html = _decode(raw)
+    expected = soup_extract(html)
+    assert None not in expected
+
+    marker = html.find(naver_parser._PRICE_MARKER)
+    if "layout_changed" in path:
+        # 구조가 바뀐 페이지: 빠른 경로는 못 찾고, 전체 파싱으로 대체
+        assert marker < 0 and None in fast_extract(html)
+        sizes = (1, 7, naver_parser._CHUNK_SIZE)
+    else:
+        assert fast_extract(html) == expected
+        # 1, 7 글자 조각 / 마커 한가운데서 끊기는 조각 / 실제 수신 크기
+        sizes = (1, 7, marker + len(naver_parser._PRICE_MARKER) // 2, naver_parser._CHUNK_SIZE)
+    assert parse_item_page(html) == expected
+    for size in sizes:
+        assert _scan_text(html, size) == expected, size
+    assert _scan_bytes(raw, 3) == expected
+
+
+@pytest.mark.parametrize("split", range(1, len(naver_parser._PRICE_MARKER)))
+def test_scanner_finds_marker_split_across_chunks(split):
+    html = (
+        "<html>" + "x" * 3000
+        + '<div class="wrap_company"><h2><a href="#">테스트&amp;코</a></h2></div>'
+        + '<p class="no_today"><em><span class="blind">12,345</span></em></p>' + "y" * 3000
+    )
+    cut = html.find(naver_parser._PRICE_MARKER) + split
+    scanner = ItemPageScanner()
+    assert not scanner.feed(html[:cut])
+    scanner.feed(html[cut:])
+    assert scanner.finish() == ("테스트&코", 12345) == soup_extract(html)
@@ -0,0 +1,90 @@
+import gc
+import threading
+import time
+
+from account import VirtualAccount, instrument
+from orders import OrderBook
+
+
+class _Store:
+    def __init__(self):
+        self.listeners = []
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+
+def _book(history_size=500):
+    return OrderBook(_Store(), None, history_size=history_size)
+
+
+def test_oco_fill_cancels_other_leg():
+    book = _book()
+    account = VirtualAccount(10000)
+    account.buy(instrument("krx", "005930"), 100, 10)
+    take_profit = book.place(account, "krx", "005930", "sell", "take_profit", 120, 10, group="exit")
+    stop = book.place(account, "krx", "005930", "sell", "stop", 90, 10, group="exit")
+
+    assert book.on_price("krx", "005930", 110) == []
+    assert book.on_price("krx", "005930", 121) == [take_profit]
+    assert take_profit.status == "filled" and take_profit.filled_price == 121
+    assert stop.status == "cancelled"
+    # 취소된 손절은 가격이 내려와도 다시 체결되지 않음
+    assert book.on_price("krx", "005930", 80) == []
+    assert account.holdings[instrument("krx", "005930")] == 0
+
+
+def test_limit_fills_at_level_or_better():
+    book = _book()
+    account = VirtualAccount(1000)
+    order = book.place(account, "krx", "000660", "buy", "limit", 50, 1)
+    assert book.on_price("krx", "000660", 45) == [order]
+    assert order.filled_price == 45
+
+
+def test_finished_orders_leave_the_book():
+    book = _book(history_size=2)
+    account = VirtualAccount(1000)
+    for _ in range(3):
+        book.cancel(book.place(account, "krx", "000660", "buy", "limit", 10, 1).id)
+    pending = book.place(account, "krx", "000660", "buy", "limit", 10, 1)
+    assert [o["id"] for o in book.orders()] == [pending.id, 3, 2]
+    assert [o["status"] for o in book.orders(status="open")] == ["open"]
+
+
+def test_history_is_capped_per_account_and_released_with_it():
+    book = _book(history_size=2)
+    busy, quiet = VirtualAccount(1000), VirtualAccount(1000)
+    kept = book.place(quiet, "krx", "000660", "buy", "limit", 10, 1)
+    book.cancel(kept.id)
+    for _ in range(5):
+        book.cancel(book.place(busy, "krx", "000660", "buy", "limit", 10, 1).id)
+    # 다른 계좌의 주문이 많아도 밀려나지 않음
+    assert [o["id"] for o in book.orders(quiet)] == [kept.id]
+    assert [o["id"] for o in book.orders(busy)] == [6, 5]
+    assert [o["id"] for o in book.orders()] == [6, 5, kept.id]
+
+    del busy
+    gc.collect()
+    assert [o["id"] for o in book.orders()] == [kept.id]
+
+
+def test_stream_ticks_are_matched_off_the_listener_thread():
+    store = _Store()
+    book = OrderBook(store, None)
+    account = VirtualAccount(1000)
+    filled_on = []
+    buy = account.buy
+    account.buy = lambda *args: filled_on.append(threading.current_thread().name) or buy(*args)
+    order = book.place(account, "krx", "000660", "buy", "limit", 50, 1)
+
+    for listener in store.listeners:
+        listener("tick", "krx", "000660", {"price": 55, "ts": 0})
+        listener("tick", "krx", "999999", {"price": 1, "ts": 0})   # 주문 없는 심볼은 큐에 넣지 않음
+        listener("tick", "krx", "000660", {"price": 49, "ts": 0})
+
+    deadline = time.monotonic() + 5
+    while order.status == "open" and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert order.status == "filled" and order.filled_price == 49
+    assert filled_on == ["order-matcher"]
@@ -0,0 +1,115 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from candles import FIELDS, CandleBuffer
+from resample import TIMEFRAMES, TimeframeAggregator, resample_ohlcv
+
+MINUTE = 60_000
+DAY = TIMEFRAMES["1d"]
+
+
+def _minutes(start, n, seed=1, gaps=True):
+    rng = np.random.default_rng(seed)
+    ts = start + np.arange(n, dtype=np.int64) * MINUTE
+    if gaps:
+        # 거래가 없는 분은 봉이 없음
+        ts = ts[rng.random(n) > 0.1]
+    close = 100 + np.cumsum(rng.normal(0, 0.5, len(ts)))
+    open_ = close + rng.normal(0, 0.2, len(ts))
+    return {
+        "timestamp": ts,
+        "open": open_,
+        "high": np.maximum(open_, close) + rng.random(len(ts)),
+        "low": np.minimum(open_, close) - rng.random(len(ts)),
+        "close": close,
+        "volume": rng.uniform(0, 5, len(ts)),
+    }
+
+
+def _buffer(view, capacity=10_000):
+    buffer = CandleBuffer(capacity)
+    buffer.extend(view["timestamp"], **{f: view[f] for f in FIELDS})
+    return buffer
+
+
+def _view(buffer):
+    return {k: np.array(v) for k, v in buffer.view().items()}
+
+
+@pytest.mark.parametrize("timeframe", ["5m", "15m", "1h", "1d"])
+def test_reduceat_buckets_match_pandas_resample(timeframe):
+    view = _minutes(DAY * 19_800 + 13 * MINUTE, 3000)
+    bars = resample_ohlcv(view, timeframe)
+
+    df = pd.DataFrame({f: view[f] for f in FIELDS}, index=pd.to_datetime(view["timestamp"], unit="ms"))
+    expected = df.resample(pd.Timedelta(milliseconds=TIMEFRAMES[timeframe]), origin="epoch").agg(
+        {"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"}
+    ).dropna(subset=["open"])
+
+    np.testing.assert_array_equal(bars["timestamp"], expected.index.asi8 // 1_000_000)
+    for f in FIELDS:
+        np.testing.assert_allclose(bars[f], expected[f].to_numpy(), rtol=1e-12, err_msg=f)
+
+
+def test_empty_view_resamples_to_empty():
+    bars = resample_ohlcv(_buffer(_minutes(0, 0)).view(), "1h")
+    assert all(len(v) == 0 for v in bars.values())
+
+
+def _expected_complete(source, timeframe, complete_from):
+    bars = resample_ohlcv(source.view(), timeframe)
+    keep = bars["timestamp"] >= complete_from
+    return {k: v[keep] for k, v in bars.items()}
+
+
+def test_incremental_sync_across_bucket_boundary_matches_full_resample():
+    start = DAY * 19_800            # 정각(일봉 경계)에서 시작
+    data = _minutes(start, 200, gaps=False)
+    source = _buffer({k: v[:40] for k, v in data.items()})
+    aggregator = TimeframeAggregator(source, "15m")
+    aggregator.sync()
+    assert aggregator.complete_from == start
+
+    rng = np.random.default_rng(5)
+    for i in range(40, 200):
+        # 진행 중인 봉이 여러 번 갱신된 뒤 다음 봉으로 넘어감 (15분 경계를 여러 번 지남)
+        for close in (data["close"][i] + rng.normal(0, 0.3, 2)).tolist() + [data["close"][i]]:
+            source.upsert(int(data["timestamp"][i]), data["open"][i], max(data["high"][i], close),
+                          min(data["low"][i], close), close, data["volume"][i])
+            target = aggregator.sync()
+            expected = _expected_complete(source, "15m", start)
+            got = _view(target)
+            np.testing.assert_array_equal(got["timestamp"], expected["timestamp"])
+            for f in FIELDS:
+                np.testing.assert_allclose(got[f], expected[f], rtol=1e-12, err_msg=f"{i} {f}")
+    assert len(target) == 200 // 15 + 1
+
+
+def test_partial_leading_bucket_is_dropped_and_stays_dropped():
+    hour = TIMEFRAMES["1h"]
+    start = DAY * 19_800 + 37 * MINUTE      # 00:37 부터 기록 -> 00:00 시간봉은 일부만 있음
+    data = _minutes(start, 150, gaps=False)
+    source = _buffer({k: v[:100] for k, v in data.items()})   # 00:37 ~ 02:16
+    aggregator = TimeframeAggregator(source, "1h")
+
+    got = _view(aggregator.sync())
+    assert aggregator.complete_from == DAY * 19_800 + hour
+    np.testing.assert_array_equal(got["timestamp"], [DAY * 19_800 + hour, DAY * 19_800 + 2 * hour])
+    # 01:00 봉의 시가는 01:00 1분봉의 시가 (00:xx 봉이 섞이지 않음)
+    assert got["open"][0] == data["open"][23]
+
+    for i in range(100, 150):
+        source.upsert(*(data[k][i] for k in ("timestamp",) + FIELDS))
+        got = _view(aggregator.sync())
+        assert got["timestamp"][0] == DAY * 19_800 + hour
+
+    # 정각에서 시작하면 첫 봉도 완성된 봉이므로 남김
+    aligned = TimeframeAggregator(_buffer(_minutes(DAY * 19_800, 90, gaps=False)), "1h")
+    assert _view(aligned.sync())["timestamp"][0] == DAY * 19_800
+
+
+def test_short_record_gives_no_daily_bar():
+    # 1분봉 200 개(3시간 남짓)로는 온전한 일봉이 없음
+    aggregator = TimeframeAggregator(_buffer(_minutes(DAY * 19_800 + 9 * TIMEFRAMES["1h"], 200)), "1d")
+    assert len(aggregator.sync()) == 0
@@ -0,0 +1,154 @@
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import backfill
+import store
+from store import COLUMNS, ColumnStore
+
+MINUTE = 60_000
+DAY = 24 * 60 * MINUTE
+T0 = 19_800 * DAY       # 2024-03-18 00:00 UTC
+
+
+def _cols(ts, offset=0.0):
+    ts = np.asarray(ts, dtype=np.int64)
+    base = ts / MINUTE + offset
+    return {"open": base, "high": base + 1, "low": base - 1, "close": base + 0.5, "volume": np.ones(len(ts))}
+
+
+def _partition_dir(s, name, venue="upbit", symbol="KRW-BTC", interval="1m"):
+    return os.path.join(s.root, venue, symbol, interval, name)
+
+
+def test_write_replaces_overlapping_timestamps(tmp_path):
+    s = ColumnStore(str(tmp_path))
+    first = T0 + np.arange(5) * MINUTE
+    s.write("upbit", "KRW-BTC", "1m", first, **_cols(first))
+    # 뒤쪽 두 봉은 새 값으로, 순서가 섞이고 같은 시각이 두 번 있어도 마지막 값이 남음
+    second = T0 + np.array([6, 3, 4, 5, 6]) * MINUTE
+    cols = _cols(second, offset=1000)
+    cols["close"][-1] = 42.0
+    s.write("upbit", "KRW-BTC", "1m", second, **cols)
+
+    data = s.read("upbit", "KRW-BTC", "1m")
+    np.testing.assert_array_equal(data["timestamp"], T0 + np.arange(7) * MINUTE)
+    minutes = np.arange(7) + T0 / MINUTE
+    np.testing.assert_array_equal(data["open"], np.where(np.arange(7) >= 3, minutes + 1000, minutes))
+    assert data["close"][-1] == 42.0
+    assert s.last_timestamp("upbit", "KRW-BTC", "1m") == T0 + 6 * MINUTE
+
+
+def test_write_splits_partitions_and_read_slices_across_them(tmp_path):
+    s = ColumnStore(str(tmp_path))
+    ts = T0 + DAY - 3 * MINUTE + np.arange(6) * MINUTE        # 자정을 넘김
+    s.write("upbit", "KRW-BTC", "1m", ts, **_cols(ts))
+    assert s.partitions("upbit", "KRW-BTC", "1m") == ["2024-03-18", "2024-03-19"]
+    data = s.read("upbit", "KRW-BTC", "1m", start=int(ts[1]), end=int(ts[4]))
+    np.testing.assert_array_equal(data["timestamp"], ts[1:5])
+    frame = s.read_frame("upbit", "KRW-BTC", "1m", tz="Asia/Seoul")
+    assert frame["timestamp"].iloc[0] == pd.Timestamp("2024-03-19 08:57")
+    # 일봉은 연 단위 파티션
+    s.write("krx", "005930", "1d", [T0, T0 + DAY], **_cols([T0, T0 + DAY]))
+    assert s.partitions("krx", "005930", "1d") == ["2024"]
+
+
+def test_read_is_memory_mapped_within_one_partition(tmp_path):
+    s = ColumnStore(str(tmp_path))
+    ts = T0 + np.arange(100) * MINUTE
+    s.write("upbit", "KRW-BTC", "1m", ts, **_cols(ts))
+    data = s.read("upbit", "KRW-BTC", "1m", start=int(ts[10]), end=int(ts[19]))
+    assert all(isinstance(v, np.memmap) for v in data.values())
+    assert len(data["close"]) == 10 and data["close"][0] == ts[10] / MINUTE + 0.5
+
+
+def test_each_write_commits_a_new_version_and_removes_the_old(tmp_path):
+    s = ColumnStore(str(tmp_path))
+    ts = T0 + np.arange(3) * MINUTE
+    s.write("upbit", "KRW-BTC", "1m", ts, **_cols(ts))
+    s.write("upbit", "KRW-BTC", "1m", ts + 3 * MINUTE, **_cols(ts + 3 * MINUTE))
+    path = _partition_dir(s, "2024-03-18")
+    assert store._committed_version(path) == "2"
+    assert sorted(os.listdir(path)) == sorted(["_commit"] + [f"{c}.2.npy" for c in COLUMNS])
+
+
+def test_crash_mid_write_keeps_the_committed_version(tmp_path, monkeypatch):
+    s = ColumnStore(str(tmp_path))
+    ts = T0 + np.arange(3) * MINUTE
+    s.write("upbit", "KRW-BTC", "1m", ts, **_cols(ts))
+
+    real_save = store._save_synced
+    saved = []
+
+    def crash_after_three(path, array):
+        if len(saved) == 3:
+            raise OSError("disk full")
+        saved.append(path)
+        real_save(path, array)
+
+    monkeypatch.setattr(store, "_save_synced", crash_after_three)
+    more = T0 + np.arange(3, 8) * MINUTE
+    with pytest.raises(OSError):
+        s.write("upbit", "KRW-BTC", "1m", more, **_cols(more))
+    # 컬럼 세 개만 새 버전으로 쓰였지만 _commit 은 그대로라 이전 버전을 읽음
+    path = _partition_dir(s, "2024-03-18")
+    assert store._committed_version(path) == "1"
+    data = s.read("upbit", "KRW-BTC", "1m")
+    assert {len(v) for v in data.values()} == {3}
+
+    monkeypatch.setattr(store, "_save_synced", real_save)
+    s.write("upbit", "KRW-BTC", "1m", more, **_cols(more))
+    assert len(s.read("upbit", "KRW-BTC", "1m")["timestamp"]) == 8
+    # 중단된 쓰기가 남긴 버전 2 파일은 다시 쓴 버전 2 로 덮어써짐
+    assert store._committed_version(path) == "2"
+    assert sorted(os.listdir(path)) == sorted(["_commit"] + [f"{c}.2.npy" for c in COLUMNS])
+
+
+def test_legacy_partition_is_read_and_migrated(tmp_path):
+    s = ColumnStore(str(tmp_path))
+    path = _partition_dir(s, "2024-03-18")
+    os.makedirs(path)
+    ts = T0 + np.arange(4) * MINUTE
+    cols = {"timestamp": ts, **_cols(ts)}
+    for col in COLUMNS:
+        np.save(os.path.join(path, f"{col}.npy"), cols[col])
+    assert len(s.read("upbit", "KRW-BTC", "1m")["timestamp"]) == 4
+
+    s.write("upbit", "KRW-BTC", "1m", [T0 + 4 * MINUTE], **_cols([T0 + 4 * MINUTE]))
+    assert store._committed_version(path) == "1"
+    assert len(s.read("upbit", "KRW-BTC", "1m")["timestamp"]) == 5
+    assert not os.path.exists(os.path.join(path, "close.npy"))
+
+
+def test_legacy_partition_with_torn_columns_is_skipped(tmp_path):
+    s = ColumnStore(str(tmp_path))
+    path = _partition_dir(s, "2024-03-18")
+    os.makedirs(path)
+    ts = T0 + np.arange(4) * MINUTE
+    cols = {"timestamp": ts, **_cols(ts)}
+    for col in COLUMNS:
+        np.save(os.path.join(path, f"{col}.npy"), cols[col][:3] if col == "volume" else cols[col])
+    assert len(s.read("upbit", "KRW-BTC", "1m")["timestamp"]) == 0
+    assert s.last_timestamp("upbit", "KRW-BTC", "1m") is None
+
+
+def test_incremental_backfill_refetches_the_last_stored_day(tmp_path, monkeypatch):
+    s = ColumnStore(str(tmp_path))
+    monkeypatch.setattr(backfill, "column_store", s)
+    starts = []
+
+    def fetch_daily(code, start, end, source="pykrx"):
+        starts.append(start)
+        days = pd.date_range(start.date(), end.date())
+        value = float(len(starts))          # 요청마다 다른 값 (장중 값 -> 마감 값)
+        return pd.DataFrame({c: value for c in ("open", "high", "low", "close", "volume")}, index=days)
+
+    monkeypatch.setattr(backfill, "fetch_daily", fetch_daily)
+    assert backfill.backfill_symbol("005930", start=datetime(2024, 3, 18), end=datetime(2024, 3, 19)) == 2
+    assert backfill.backfill_symbol("005930", end=datetime(2024, 3, 20)) == 2
+    assert starts[1] == datetime(2024, 3, 19)
+    frame = s.read_frame("krx", "005930", "1d")
+    assert frame["close"].tolist() == [1.0, 2.0, 2.0]